@@ -1,18 +1,26 @@
-import time
-import json
-from typing import Any
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
 
-from fastapi import FastAPI, HTTPException, Response
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
 from backend.ara.agents.reporter import export_pdf_bytes
-from backend.ara.graph import build_graph
-from backend.ara.logger import InMemoryLogger
-from backend.ara.schemas import ResearchState
+from backend.ara.graph import aclose_checkpointer, get_graph
+from backend.ara.jobs import JobQueueFull, JobStateError, ResearchJob, get_job_manager
+from backend.ara.memory import awarm_up_memory
+from backend.ara.metrics import render_metrics
+from backend.ara.packing import awarm_up_tokenizer
+from backend.ara.sse import SSEWriter, gzip_stream, slim_result
+from backend.ara.transport import aclose_async_client, close_session
 
-SOURCE_EVENT_STAGGER_SECONDS = 0.15
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
 
 
 class ResearchRunRequest(BaseModel):
@@ -24,7 +32,22 @@ class PdfExportRequest(BaseModel):
     title: str = "ARA Research Report"
 
 
-app = FastAPI(title="Autonomous Research Agent API", version="0.1.0")
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Compile the graph once, before the first request. Chroma and the tokenizer are loaded in the
+    # background, and Tavily and reportlab on first use, so /health answers without them (or their settings).
+    get_graph()
+    warm_ups = [asyncio.create_task(awarm_up_memory()), asyncio.create_task(awarm_up_tokenizer())]
+    get_job_manager().start()
+    yield
+    await asyncio.gather(*warm_ups)
+    await get_job_manager().stop()
+    await aclose_checkpointer()
+    close_session()
+    await aclose_async_client()
+
+
+app = FastAPI(title="Autonomous Research Agent API", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -35,148 +58,163 @@ app.add_middleware(
 )
 
 
+@app.exception_handler(JobQueueFull)
+async def queue_full(_request: Request, exc: JobQueueFull) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc), "queue_depth": exc.queue_depth, "running": exc.running},
+        headers={"Retry-After": "30"},
+    )
+
+
 @app.get("/health")
 def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+def metrics() -> Response:
+    rendered = render_metrics()
+    if rendered is None:
+        raise HTTPException(status_code=404, detail="Metrics are disabled.")
+    body, content_type = rendered
+    return Response(content=body, media_type=content_type)
+
+
 @app.post("/api/research/run")
-def run_research(request: ResearchRunRequest) -> dict[str, Any]:
+async def run_research(request: ResearchRunRequest) -> dict[str, Any]:
+    """Runs (or joins the in-flight/recent run of) the query and returns the full final state."""
     query = request.query.strip()
     if not query:
         raise HTTPException(status_code=400, detail="Query must not be empty.")
 
-    logger = InMemoryLogger()
-    graph = build_graph(logger)
-    initial_state = _build_initial_state(query)
-
-    try:
-        result = graph.invoke(initial_state)
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail=f"Research run failed: {exc}") from exc
+    job, _ = get_job_manager().submit(query)
+    await job.wait()
+    if job.status != "done":
+        raise HTTPException(status_code=500, detail=job.error)
+    return job.result
 
-    return result
 
+def _sse_response(frames: AsyncIterator[str], request: Request, gzip: bool) -> StreamingResponse:
+    headers = dict(SSE_HEADERS)
+    body = frames
+    if gzip and "gzip" in request.headers.get("accept-encoding", "").lower():
+        body = gzip_stream(frames)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(body, media_type="text/event-stream", headers=headers)
 
-def _build_initial_state(query: str) -> dict[str, Any]:
-    return ResearchState(
-        query=query,
-        status="running",
-        created_at=time.time(),
-        logs=[],
-        plan=[],
-        tool_results=[],
-        sources=[],
-        memory_context=[],
-        draft_report="",
-        final_report="",
-    ).model_dump()
 
+def _job_events(job: ResearchJob, writer: SSEWriter, after_id: int = 0) -> AsyncIterator[str]:
+    async def frames():
+        async for event_id, event, payload in job.subscribe(after_id):
+            for frame in writer.render(event, payload, event_id):
+                yield frame
 
-def _sse(event: str, payload: dict[str, Any]) -> str:
-    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+    return frames()
 
 
 @app.get("/api/research/stream")
-def stream_research(query: str) -> StreamingResponse:
+async def stream_research(
+    request: Request,
+    query: str,
+    batch: bool = False,
+    full: bool = False,
+    gzip: bool = False,
+) -> StreamingResponse:
+    """
+    `batch=1` sends each node's plan steps and sources as single `plan_batch`/`source_batch` frames.
+    `full=1` keeps source page text and tool_results in the `result` event.
+    `gzip=1` compresses the stream when the client accepts gzip.
+    The run is a background job: identical queries in flight share it, and it keeps running if
+    this connection drops (resume via /api/research/jobs/{id}/events).
+    """
     clean_query = query.strip()
     if not clean_query:
         raise HTTPException(status_code=400, detail="Query must not be empty.")
 
-    logger = InMemoryLogger()
-    graph = build_graph(logger)
-    initial_state = _build_initial_state(clean_query)
-
-    node_labels = {
-        "planner_node": "Planning",
-        "memory_retrieve_node": "Retrieving Memory",
-        "research_node": "Researching Sources",
-        "summarize_node": "Generating Draft",
-        "critic_node": "Revising Report",
-        "memory_store_node": "Storing Memory",
+    job, _ = get_job_manager().submit(clean_query)
+    return _sse_response(_job_events(job, SSEWriter(batch=batch, full=full)), request, gzip)
+
+
+@app.post("/api/research/jobs", status_code=202)
+async def create_research_job(request: ResearchRunRequest) -> dict[str, Any]:
+    """`reused` is true when the query joined an in-flight run or a recently finished one."""
+    query = request.query.strip()
+    if not query:
+        raise HTTPException(status_code=400, detail="Query must not be empty.")
+
+    manager = get_job_manager()
+    job, reused = manager.submit(query)
+    return {
+        **job.summary(),
+        "reused": reused,
+        "queue_depth": manager.queue_depth,
+        "events_url": f"/api/research/jobs/{job.id}/events",
+        "result_url": f"/api/research/jobs/{job.id}",
     }
 
-    def event_generator():
-        latest_state = dict(initial_state)
-        yield _sse(
-            "status",
-            {
-                "phase": "starting",
-                "message": "Research run started.",
-                "query": clean_query,
-            },
-        )
-
-        try:
-            for update in graph.stream(initial_state, stream_mode="updates"):
-                for node_name, node_update in update.items():
-                    if isinstance(node_update, dict):
-                        latest_state.update(node_update)
-
-                        if "plan" in node_update and isinstance(node_update["plan"], list):
-                            plan = node_update["plan"]
-                            for idx, step in enumerate(plan, start=1):
-                                yield _sse(
-                                    "plan",
-                                    {
-                                        "index": idx,
-                                        "text": str(step),
-                                        "total": len(plan),
-                                    },
-                                )
-
-                        if "sources" in node_update and isinstance(node_update["sources"], list):
-                            sources = node_update["sources"]
-                            for idx, source in enumerate(sources, start=1):
-                                if not isinstance(source, dict):
-                                    continue
-                                yield _sse(
-                                    "source",
-                                    {
-                                        "index": idx,
-                                        "total": len(sources),
-                                        "title": source.get("title", ""),
-                                        "url": source.get("url", ""),
-                                        "snippet": source.get("snippet", ""),
-                                        "type": source.get("type", "web"),
-                                    },
-                                )
-                                time.sleep(SOURCE_EVENT_STAGGER_SECONDS)
-
-                        if "logs" in node_update and isinstance(node_update["logs"], list):
-                            logs = node_update["logs"]
-                            if logs:
-                                yield _sse("log", {"text": logs[-1]})
-
-                    logs = latest_state.get("logs", [])
-                    last_log = logs[-1] if logs else ""
-
-                    yield _sse(
-                        "progress",
-                        {
-                            "node": node_name,
-                            "label": node_labels.get(node_name, node_name),
-                            "status": "completed",
-                            "plan_count": len(latest_state.get("plan", [])),
-                            "source_count": len(latest_state.get("sources", [])),
-                            "last_log": last_log,
-                        },
-                    )
-
-            yield _sse("result", latest_state)
-            yield _sse("done", {"ok": True})
-        except Exception as exc:
-            yield _sse("error", {"message": f"Research run failed: {exc}"})
-
-    return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        },
-    )
+
+def _get_job(job_id: str) -> ResearchJob:
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired research job.")
+    return job
+
+
+@app.get("/api/research/jobs/{job_id}")
+async def get_research_job(job_id: str, full: bool = False) -> dict[str, Any]:
+    """Job status; `result` is set once the run is done (slimmed unless `full=1`)."""
+    job = _get_job(job_id)
+    result = None
+    if job.result is not None:
+        result = job.result if full else slim_result(job.result)
+    return {**job.summary(), "result": result}
+
+
+@app.get("/api/research/jobs/{job_id}/events")
+async def stream_research_job(
+    job_id: str,
+    request: Request,
+    batch: bool = False,
+    full: bool = False,
+    gzip: bool = False,
+    last_event_id: int = Header(0, alias="Last-Event-ID"),
+) -> StreamingResponse:
+    """
+    Replays the job's events after `Last-Event-ID` (all of them by default), then follows it live.
+    Disconnecting does not stop the job. Query options match /api/research/stream.
+    """
+    job = _get_job(job_id)
+    return _sse_response(_job_events(job, SSEWriter(batch=batch, full=full), last_event_id), request, gzip)
+
+
+@app.post("/api/research/jobs/{job_id}/resume", status_code=202)
+async def resume_research_job(job_id: str) -> dict[str, Any]:
+    """Continues a failed or interrupted run from its last completed node, under the same id."""
+    try:
+        job = await get_job_manager().resume(job_id)
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail="No checkpoint for this research job.") from exc
+    except JobStateError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    return job.summary()
+
+
+@app.post("/api/research/jobs/{job_id}/revise", status_code=202)
+async def revise_research_job(job_id: str) -> dict[str, Any]:
+    """Queues a new job that reruns only summarize and critic over this job's sources."""
+    try:
+        job, reused = await get_job_manager().revise(job_id)
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail="No sources recorded for this research job.") from exc
+
+    return {
+        **job.summary(),
+        "reused": reused,
+        "events_url": f"/api/research/jobs/{job.id}/events",
+        "result_url": f"/api/research/jobs/{job.id}",
+    }
 
 
 @app.post("/api/research/pdf")
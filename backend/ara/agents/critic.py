@@ -1,4 +1,18 @@
+import asyncio
+import json
+import re
+from dataclasses import dataclass
+from typing import Callable
+
 from backend.ara.azure_llm import AzureChatLLM
+from backend.ara.config import (
+    CRITIC_MODE,
+    CRITIC_SECTION_CONCURRENCY,
+    CRITIC_SECTION_GROUP_TOKENS,
+    CRITIC_SECTIONS_MIN_TOKENS,
+)
+from backend.ara.packing import count_tokens
+from backend.ara.transport import run_sync
 
 SYSTEM = """You are CriticAgent.
 Review the draft report for:
@@ -22,15 +36,247 @@ Format:
 ...
 """
 
-def run_critic(draft_report: str) -> str:
+SECTION_SYSTEM = """You are CriticAgent, reviewing some sections of a research report draft.
+Check each section for:
+- Missing citations where factual claims are made
+- Over-claiming beyond the cited sources
+- Vague wording that can be made more specific
+
+Only edit sections that need it. Return JSON only, no prose and no code fence:
+{"critique": ["<short bullet>", ...],
+ "edits": [{"section": "<section id>", "content": "<full replacement Markdown for that section's body, without its heading>"}]}
+
+Rules for edits:
+- Keep the existing citation markers [n]; only add markers that appear in the References.
+- Keep ### sub-headings inside a section's body.
+- Return "edits": [] if the sections are fine.
+"""
+
+_SECTION_HEADING = re.compile(r"^##(?!#)\s*(.+?)\s*$", re.M)
+_TITLE_LINE = re.compile(r"^\s*#(?!#)[^\n]*\n?")
+_JSON_OBJECT = re.compile(r"\{[\s\S]*\}")
+
+_REVISED_HEADING = re.compile(r"^\s*##\s*Revised\s+Report\s*:?\s*$\n?", re.I | re.M)
+_CRITIQUE_HEADING = "## critique"
+
+
+class _RevisedReportFilter:
+    """
+    Forwards only the streamed text after the "## Revised Report" heading. If the response
+    does not open with a critique, the model skipped the headings and everything is forwarded.
+    """
+
+    def __init__(self, on_delta: Callable[[str], None]):
+        self.on_delta = on_delta
+        self.buffer = ""
+        self.passthrough = False
+
+    def __call__(self, piece: str) -> None:
+        if self.passthrough:
+            self.on_delta(piece)
+            return
+        self.buffer += piece
+        head = self.buffer.lstrip().lower()
+        if head and not (head.startswith(_CRITIQUE_HEADING) or _CRITIQUE_HEADING.startswith(head)):
+            self._release(self.buffer)
+            return
+        m = _REVISED_HEADING.search(self.buffer)
+        # The heading only counts once its line is complete.
+        if m and m.group(0).endswith("\n"):
+            self._release(self.buffer[m.end():])
+
+    def _release(self, text: str) -> None:
+        self.passthrough = True
+        self.buffer = ""
+        if text:
+            self.on_delta(text)
+
+
+def _critic_messages(draft_report: str) -> list[dict]:
+    return [
+        {"role": "system", "content": SYSTEM},
+        {"role": "user", "content": draft_report},
+    ]
+
+
+def run_critic(draft_report: str, mode: str | None = None) -> str:
+    """Sync entry point for scripts; runs arun_critic on a new event loop."""
+    return run_sync(arun_critic(draft_report, mode=mode))
+
+
+async def arun_critic(
+    draft_report: str,
+    on_delta: Callable[[str], None] | None = None,
+    mode: str | None = None,
+) -> str:
+    """
+    `on_delta` receives the revised report (not the critique) as it streams in. `mode` overrides
+    CRITIC_MODE for this call.
+    """
+    if uses_section_critic(draft_report, mode):
+        return await _arun_section_critic(draft_report, on_delta)
     llm = AzureChatLLM()
-    return llm.chat(
-        messages=[
-            {"role": "system", "content": SYSTEM},
-            {"role": "user", "content": draft_report},
-        ],
+    return await llm.achat(
+        messages=_critic_messages(draft_report),
         temperature=0.2,
         max_tokens=2200,
         continue_on_length=True,
         max_continuations=2,
+        on_delta=_RevisedReportFilter(on_delta) if on_delta is not None else None,
     )
+
+
+@dataclass
+class DraftSection:
+    id: str
+    heading: str
+    body: str
+    # The report title is kept as its own section so section edits can never replace it.
+    editable: bool = True
+
+    def render(self) -> str:
+        head = f"## {self.heading}\n" if self.heading else ""
+        return f"{head}{self.body.strip()}\n"
+
+
+def split_sections(draft: str) -> list[DraftSection]:
+    """
+    Splits on `##` headings. A leading `# Title` line is a read-only "title" section; the rest of
+    the text before the first `##` heading (the intro) is section s0 with no heading.
+    """
+    sections: list[DraftSection] = []
+    matches = list(_SECTION_HEADING.finditer(draft))
+    preamble = draft[: matches[0].start()] if matches else draft
+    title = _TITLE_LINE.match(preamble)
+    if title:
+        sections.append(DraftSection("title", "", title.group(0), editable=False))
+        preamble = preamble[title.end():]
+    if preamble.strip():
+        sections.append(DraftSection("s0", "", preamble))
+    for i, m in enumerate(matches, 1):
+        end = matches[i].start() if i < len(matches) else len(draft)
+        sections.append(DraftSection(f"s{i}", m.group(1), draft[m.end():end]))
+    return sections
+
+
+def apply_section_edits(sections: list[DraftSection], edits: list[dict]) -> list[DraftSection]:
+    """Replaces the body of each edited section; unknown or read-only ids and empty replacements are ignored."""
+    by_id = {s.id: s for s in sections if s.editable}
+    revised = {s.id: s for s in sections}
+    for edit in edits:
+        if not isinstance(edit, dict):
+            continue
+        section = by_id.get(str(edit.get("section", "")))
+        content = str(edit.get("content") or "").strip()
+        if section is None or not content:
+            continue
+        # Drop a repeated heading if the model included it in the replacement.
+        if section.heading:
+            content = re.sub(rf"^##\s*{re.escape(section.heading)}\s*\n", "", content, flags=re.I).strip()
+        revised[section.id] = DraftSection(section.id, section.heading, content + "\n")
+    return [revised[s.id] for s in sections]
+
+
+def _is_references(section: DraftSection) -> bool:
+    return section.heading.strip().lower().startswith("reference")
+
+
+def _section_groups(sections: list[DraftSection]) -> list[list[DraftSection]]:
+    """Consecutive reviewable sections, packed up to CRITIC_SECTION_GROUP_TOKENS per critic call."""
+    groups: list[list[DraftSection]] = []
+    current: list[DraftSection] = []
+    tokens = 0
+    for section in sections:
+        if not section.editable or _is_references(section) or not section.body.strip():
+            continue
+        cost = count_tokens(section.body)
+        if current and tokens + cost > CRITIC_SECTION_GROUP_TOKENS:
+            groups.append(current)
+            current, tokens = [], 0
+        current.append(section)
+        tokens += cost
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _section_messages(sections: list[DraftSection], group: list[DraftSection]) -> list[dict]:
+    outline = "\n".join(f"{s.id}: {s.heading or '(introduction)'}" for s in sections if s.editable)
+    references = next((s.body.strip() for s in sections if _is_references(s)), "(none)")
+    body = "\n\n".join(f"[section {s.id}] {s.heading or '(introduction)'}\n{s.body.strip()}" for s in group)
+    user_payload = f"""REPORT OUTLINE:
+{outline}
+
+REFERENCES:
+{references}
+
+SECTIONS TO REVIEW:
+{body}
+"""
+    return [
+        {"role": "system", "content": SECTION_SYSTEM},
+        {"role": "user", "content": user_payload},
+    ]
+
+
+def _parse_section_review(text: str) -> tuple[list[str], list[dict]]:
+    m = _JSON_OBJECT.search(text or "")
+    if not m:
+        return [], []
+    try:
+        data = json.loads(m.group(0))
+    except ValueError:
+        return [], []
+    if not isinstance(data, dict):
+        return [], []
+    critique = [str(c) for c in data.get("critique") or [] if str(c).strip()]
+    edits = data.get("edits") if isinstance(data.get("edits"), list) else []
+    return critique, edits
+
+
+def _assemble_review(sections: list[DraftSection], reviews: list[str]) -> str:
+    """Same "## Critique / ## Revised Report" shape as the full-report critic, built from local edits."""
+    critique: list[str] = []
+    edits: list[dict] = []
+    for text in reviews:
+        c, e = _parse_section_review(text)
+        critique.extend(c)
+        edits.extend(e)
+    revised = "\n".join(s.render() for s in apply_section_edits(sections, edits))
+    bullets = "\n".join(f"- {c}" for c in critique) or "- No section needed changes."
+    return f"## Critique\n{bullets}\n## Revised Report\n{revised}"
+
+
+def uses_section_critic(draft_report: str, mode: str | None = None) -> bool:
+    """
+    CRITIC_MODE=sections always reviews per section, "full" never does, and "auto" does once the
+    draft reaches CRITIC_SECTIONS_MIN_TOKENS. A draft without `##` sections is reviewed whole.
+    """
+    mode = mode or CRITIC_MODE
+    if mode == "full" or sum(s.editable for s in split_sections(draft_report)) < 2:
+        return False
+    return mode == "sections" or count_tokens(draft_report) >= CRITIC_SECTIONS_MIN_TOKENS
+
+
+async def _arun_section_critic(draft_report: str, on_delta: Callable[[str], None] | None = None) -> str:
+    """
+    Reviews groups of `##` sections concurrently and applies the returned edits to the draft
+    locally; unchanged sections cost no output tokens. `on_delta` gets the revised report once.
+    """
+    llm = AzureChatLLM()
+    sections = split_sections(draft_report)
+    sem = asyncio.Semaphore(max(1, CRITIC_SECTION_CONCURRENCY))
+
+    async def review(group: list[DraftSection]) -> str:
+        async with sem:
+            try:
+                return await llm.achat(messages=_section_messages(sections, group), temperature=0.2, max_tokens=1200)
+            except Exception as e:
+                print(f"Section critic call failed: {e}")
+                return ""
+
+    reviews = await asyncio.gather(*(review(g) for g in _section_groups(sections)))
+    review_text = _assemble_review(sections, list(reviews))
+    if on_delta is not None:
+        _RevisedReportFilter(on_delta)(review_text)
+    return review_text
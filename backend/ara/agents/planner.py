@@ -2,6 +2,7 @@ import json
 import re
 
 from backend.ara.azure_llm import AzureChatLLM
+from backend.ara.transport import run_sync
 
 SYSTEM = """You are PlannerAgent for an Autonomous Research Agent.
 Create a concise step-by-step plan (5-8 steps max) to research the user's query.
@@ -70,16 +71,14 @@ def _fallback_plan(query: str) -> list[str]:
     ]
 
 
-def run_planner(query: str) -> list[str]:
-    llm = AzureChatLLM()
-    content = llm.chat(
-        messages=[
-            {"role": "system", "content": SYSTEM},
-            {"role": "user", "content": query},
-        ],
-        temperature=0.2,
-        max_tokens=400,
-    )
+def _planner_messages(query: str) -> list[dict]:
+    return [
+        {"role": "system", "content": SYSTEM},
+        {"role": "user", "content": query},
+    ]
+
+
+def _finalize_plan(content: str, query: str) -> list[str]:
     plan = _coerce_plan(content)
 
     # Keep unique/non-empty while preserving order.
@@ -99,3 +98,19 @@ def run_planner(query: str) -> list[str]:
         deduped = _fallback_plan(query)
 
     return deduped[:8]
+
+
+def run_planner(query: str) -> list[str]:
+    """Sync entry point for scripts; runs arun_planner on a new event loop."""
+    return run_sync(arun_planner(query))
+
+
+async def arun_planner(query: str) -> list[str]:
+    llm = AzureChatLLM()
+    content = await llm.achat(
+        messages=_planner_messages(query),
+        temperature=0.2,
+        max_tokens=400,
+        semantic_cache=True,
+    )
+    return _finalize_plan(content, query)
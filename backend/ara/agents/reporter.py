@@ -2,17 +2,7 @@ import io
 import re
 from xml.sax.saxutils import escape
 
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-from reportlab.lib.units import inch
-from reportlab.platypus import (
-    ListFlowable,
-    ListItem,
-    Paragraph,
-    Preformatted,
-    SimpleDocTemplate,
-    Spacer,
-)
+# reportlab is imported inside the PDF functions: only PDF export needs it, not the pipeline.
 
 def extract_revised(text: str) -> str:
     text = (text or "").strip()
@@ -90,6 +80,8 @@ def _inline_markup(text: str) -> str:
 
 
 def _build_styles():
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+
     styles = getSampleStyleSheet()
     code_parent = styles["Code"] if "Code" in styles.byName else styles["BodyText"]
     return {
@@ -151,6 +143,9 @@ def _build_styles():
 
 
 def _markdown_to_story(markdown_text: str, title: str):
+    from reportlab.lib.units import inch
+    from reportlab.platypus import ListFlowable, ListItem, Paragraph, Preformatted, Spacer
+
     styles = _build_styles()
     story = [Paragraph(_inline_markup(title), styles["title"]), Spacer(1, 0.08 * inch)]
     normalized_title = re.sub(r"\s+", " ", title).strip().lower()
@@ -286,6 +281,10 @@ def _markdown_to_story(markdown_text: str, title: str):
     return story
 
 def export_pdf_bytes(title: str, markdown_text: str) -> bytes:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate
+
     markdown_text = normalize_markdown_report(markdown_text, title=title)
     buf = io.BytesIO()
     doc = SimpleDocTemplate(
@@ -1,36 +1,184 @@
+import asyncio
 import time
-from backend.ara.tavily_search import tavily_search
-from backend.ara.tools.arxiv_tool import arxiv_search
-from backend.ara.tools.web_fetch import fetch_clean_text
 
-def run_research(query: str) -> tuple[list[dict], list[dict]]:
+from backend.ara.config import (
+    ARXIV_MAX_RESULTS,
+    FETCH_CONCURRENCY,
+    RESEARCH_ARXIV_SUBQUERIES,
+    RESEARCH_DEADLINE_SECONDS,
+    RESEARCH_MAX_SOURCES,
+    RESEARCH_MAX_SUBQUERIES,
+    RESEARCH_SUBQUERY_CONCURRENCY,
+)
+from backend.ara.tavily_search import atavily_search
+from backend.ara.tools.arxiv_tool import aarxiv_search
+from backend.ara.tools.web_fetch import afetch_clean_text, canonical_url
+from backend.ara.transport import run_sync
+
+
+async def _afetch_contents(urls: list[str], deadline: float) -> list[tuple[str, float]]:
     """
-    Returns:
-      web_sources: [{title,url,snippet,content,accessed_at}]
-      arxiv_sources: [{title,url,snippet,published,authors,accessed_at}]
+    Fetch all URLs concurrently (at most FETCH_CONCURRENCY in flight) and return
+    (content, accessed_at) in input order. URLs that fail or are still running at the
+    deadline come back as empty content.
     """
-    web = tavily_search(query)
+    sem = asyncio.Semaphore(FETCH_CONCURRENCY)
+
+    async def fetch_one(url: str) -> tuple[str, float]:
+        if not url:
+            return "", time.time()
+        async with sem:
+            try:
+                content = await afetch_clean_text(url)
+            except Exception:
+                content = ""
+        return content, time.time()
+
+    tasks = [asyncio.create_task(fetch_one(url)) for url in urls]
+    if not tasks:
+        return []
+    done, pending = await asyncio.wait(tasks, timeout=max(0.0, deadline - time.monotonic()))
+    # Stragglers are cancelled and keep an empty placeholder; the batch is not held up.
+    for task in pending:
+        task.cancel()
+    return [task.result() if task in done else ("", time.time()) for task in tasks]
+
+
+def _build_web_sources(web: list[dict], fetched: list[tuple[str, float]]) -> list[dict]:
     web_sources = []
-    for item in web:
-        url = item.get("url", "")
-        content = ""
-        try:
-            if url:
-                content = fetch_clean_text(url)
-        except Exception:
-            content = ""
+    for item, (content, accessed_at) in zip(web, fetched):
         web_sources.append({
             "title": item.get("title", ""),
-            "url": url,
+            "url": item.get("url", ""),
             "snippet": item.get("snippet", ""),
             "content": content,
-            "accessed_at": time.time(),
+            "accessed_at": accessed_at,
         })
+    return web_sources
+
 
-    papers = arxiv_search(query)
+def _build_arxiv_sources(papers: list[dict]) -> list[dict]:
     arxiv_sources = []
     for p in papers:
         p["accessed_at"] = time.time()
         arxiv_sources.append(p)
+    return arxiv_sources
+
+
+def run_research(query: str) -> tuple[list[dict], list[dict]]:
+    """Sync entry point for scripts; runs arun_research on a new event loop."""
+    return run_sync(arun_research(query))
+
+
+async def arun_research(query: str) -> tuple[list[dict], list[dict]]:
+    """
+    Searches Tavily and arXiv for the query and fetches the web results' pages; arXiv runs
+    alongside the web fetches on the same event loop.
+
+    Returns:
+      web_sources: [{title,url,snippet,content,accessed_at}]
+      arxiv_sources: [{title,url,snippet,published,authors,accessed_at}]
+    """
+    deadline = time.monotonic() + RESEARCH_DEADLINE_SECONDS
+    arxiv_task = asyncio.create_task(aarxiv_search(query))
+
+    web = await atavily_search(query)
+    fetched = await _afetch_contents([item.get("url", "") for item in web], deadline)
+    web_sources = _build_web_sources(web, fetched)
+
+    try:
+        papers = await asyncio.wait_for(arxiv_task, timeout=max(0.0, deadline - time.monotonic()))
+    except Exception:
+        papers = []
+
+    return web_sources, _build_arxiv_sources(papers)
+
+
+# Tavily rejects very long queries; plan steps are appended to the user query.
+_MAX_SUBQUERY_CHARS = 380
+
+
+def build_subqueries(query: str, plan: list[str]) -> list[str]:
+    """The raw query first, then one sub-query per plan step, capped by RESEARCH_MAX_SUBQUERIES."""
+    subqueries = [query]
+    for step in plan:
+        if len(subqueries) >= RESEARCH_MAX_SUBQUERIES:
+            break
+        subqueries.append(f"{query} - {step}"[:_MAX_SUBQUERY_CHARS])
+    return subqueries
+
+
+def _merge_hits(hit_lists: list[list[dict]], limit: int, seen: set[str]) -> list[dict]:
+    """
+    Round-robin over the per-sub-query rankings so every sub-query's top hits make the
+    budget, skipping URLs already in `seen` (which is updated in place).
+    """
+    merged: list[dict] = []
+    for rank in range(max((len(hits) for hits in hit_lists), default=0)):
+        for hits in hit_lists:
+            if len(merged) >= limit:
+                return merged
+            if rank >= len(hits):
+                continue
+            key = canonical_url(hits[rank].get("url", ""))
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            merged.append(hits[rank])
+    return merged
+
+
+async def _gather_until(tasks: list[asyncio.Task], deadline: float) -> list[list[dict]]:
+    """Results of the tasks that finished by the deadline (failed or late ones count as empty)."""
+    if not tasks:
+        return []
+    done, pending = await asyncio.wait(tasks, timeout=max(0.0, deadline - time.monotonic()))
+    for task in pending:
+        task.cancel()
+    return [task.result() if task in done and not task.exception() else [] for task in tasks]
+
+
+async def arun_plan_research(query: str, plan: list[str]) -> tuple[list[dict], list[dict], list[dict]]:
+    """
+    Plan-driven research: search Tavily for the query plus one sub-query per plan step
+    (and arXiv for the first RESEARCH_ARXIV_SUBQUERIES of them) concurrently, then merge
+    and URL-deduplicate into one source set of at most RESEARCH_MAX_SOURCES.
+
+    Returns:
+      web_sources, arxiv_sources: same shape as run_research
+      searches: [{subquery, tavily, arxiv}] raw hits per sub-query
+    """
+    deadline = time.monotonic() + RESEARCH_DEADLINE_SECONDS
+    subqueries = build_subqueries(query, plan)
+    # One semaphore per provider: a search waiting out arXiv's rate limit must not hold
+    # a slot that a Tavily search could use.
+    sems = {search: asyncio.Semaphore(RESEARCH_SUBQUERY_CONCURRENCY) for search in (aarxiv_search, atavily_search)}
+
+    async def limited(search, subquery: str) -> list[dict]:
+        async with sems[search]:
+            return await search(subquery)
+
+    arxiv_subqueries = subqueries[:RESEARCH_ARXIV_SUBQUERIES]
+    arxiv_tasks = [asyncio.create_task(limited(aarxiv_search, sq)) for sq in arxiv_subqueries]
+    web_tasks = [asyncio.create_task(limited(atavily_search, sq)) for sq in subqueries]
+
+    # arXiv keeps its own share of the budget so web fetches can start before it returns.
+    arxiv_budget = min(ARXIV_MAX_RESULTS, RESEARCH_MAX_SOURCES // 2) if arxiv_tasks else 0
+    seen: set[str] = set()
+    web_hits = await _gather_until(web_tasks, deadline)
+    web = _merge_hits(web_hits, limit=max(1, RESEARCH_MAX_SOURCES - arxiv_budget), seen=seen)
+    fetched = await _afetch_contents([item.get("url", "") for item in web], deadline)
+    web_sources = _build_web_sources(web, fetched)
+
+    arxiv_hits = await _gather_until(arxiv_tasks, deadline)
+    papers = _merge_hits(arxiv_hits, limit=arxiv_budget, seen=seen)
+
+    searches = []
+    for idx, subquery in enumerate(subqueries):
+        searches.append({
+            "subquery": subquery,
+            "tavily": web_hits[idx] if idx < len(web_hits) else [],
+            "arxiv": arxiv_hits[idx] if idx < len(arxiv_hits) else [],
+        })
 
-    return web_sources, arxiv_sources
+    return web_sources, _build_arxiv_sources(papers), searches
@@ -1,4 +1,18 @@
+import asyncio
+from typing import Callable
+
 from backend.ara.azure_llm import AzureChatLLM
+from backend.ara.config import (
+    SUMMARIZER_INPUT_TOKEN_BUDGET,
+    SUMMARIZER_MAP_CONCURRENCY,
+    SUMMARIZER_MAP_GROUP_SIZE,
+    SUMMARIZER_MAP_INPUT_TOKEN_BUDGET,
+    SUMMARIZER_MAP_REDUCE_MIN_SOURCES,
+    SUMMARIZER_MAX_SOURCES,
+    SUMMARIZER_MODE,
+)
+from backend.ara.packing import count_tokens, pack_sources, truncate_tokens
+from backend.ara.transport import run_sync
 
 SYSTEM = """You are SummarizerAgent.
 Given the user query, memory context (prior notes), and gathered sources (snippets + extracted text),
@@ -25,19 +39,6 @@ Required Markdown structure:
 """
 
 
-def _format_sources(sources: list[dict], snippet_chars: int, content_chars: int, limit: int) -> str:
-    lines: list[str] = []
-    for i, s in enumerate(sources[:limit], 1):
-        title = (s.get("title") or "")[:160]
-        url = s.get("url", "")
-        snippet = (s.get("snippet") or "")[:snippet_chars]
-        content = (s.get("content") or "")[:content_chars]
-        lines.append(
-            f"[{i}] {title}\nURL: {url}\nSnippet: {snippet}\nExtract: {content}\n"
-        )
-    return "\n".join(lines)
-
-
 def _fallback_report(query: str, sources: list[dict]) -> str:
     refs = []
     for i, s in enumerate(sources[:8], 1):
@@ -76,52 +77,172 @@ No validated finding available because the summarizer step returned no content.
 """
 
 
-def run_summarizer(query: str, memory_context: list[str], sources: list[dict]) -> str:
-    llm = AzureChatLLM()
-    memory_text = "\n".join(memory_context[:6])
+MAP_SYSTEM = """You are SummarizerAgent, taking notes for a research report.
+From the sources below, write short bullet notes of the facts relevant to the query.
+
+Rules:
+- Every bullet ends with the citation marker(s) of the source(s) it comes from, using the [n] numbers given.
+- Do not invent facts or sources; skip sources with nothing relevant.
+- Keep concrete details: dates, numbers, names, limitations.
+- At most 8 bullets. No headings, no introduction.
+"""
+
+
+def uses_map_reduce(sources: list[dict]) -> bool:
+    if SUMMARIZER_MODE == "map_reduce":
+        return len(sources) > 1
+    return SUMMARIZER_MODE == "auto" and len(sources) >= SUMMARIZER_MAP_REDUCE_MIN_SOURCES
+
+
+def _map_groups(sources: list[dict]) -> list[tuple[int, list[dict]]]:
+    """(number of the group's first source, group) over the first SUMMARIZER_MAX_SOURCES sources."""
+    size = max(1, SUMMARIZER_MAP_GROUP_SIZE)
+    capped = sources[:SUMMARIZER_MAX_SOURCES]
+    return [(start + 1, capped[start:start + size]) for start in range(0, len(capped), size)]
+
+
+def _map_messages(query: str, first_number: int, group: list[dict]) -> list[dict]:
+    header = f"""QUERY:
+{query}
+
+SOURCES:
+"""
+    budget = SUMMARIZER_MAP_INPUT_TOKEN_BUDGET - count_tokens(MAP_SYSTEM) - count_tokens(header)
+    packed = pack_sources(query, group, budget, first_number=first_number)
+    return [
+        {"role": "system", "content": MAP_SYSTEM},
+        {"role": "user", "content": header + packed.text},
+    ]
+
+
+def _reduce_messages(query: str, memory_context: list[str], sources: list[dict], notes: list[str]) -> list[dict]:
+    memory_text = truncate_tokens("\n".join(memory_context[:6]), SUMMARIZER_INPUT_TOKEN_BUDGET // 8)
+    references = "\n".join(
+        f"[{i}] {(s.get('title') or '')[:160]} - {s.get('url', '')}"
+        for i, s in enumerate(sources[:SUMMARIZER_MAX_SOURCES], 1)
+    )
+    header = f"""QUERY:
+{query}
+
+MEMORY CONTEXT (prior relevant notes):
+{memory_text}
+
+SOURCE LIST (cite only these numbers):
+{references}
+
+NOTES (cited facts extracted from the sources):
+"""
+    budget = SUMMARIZER_INPUT_TOKEN_BUDGET - count_tokens(SYSTEM) - count_tokens(header)
+    user_payload = header + truncate_tokens("\n".join(notes), budget)
+    return [
+        {"role": "system", "content": SYSTEM},
+        {"role": "user", "content": user_payload},
+    ]
+
+
+async def _amap_notes(llm: AzureChatLLM, query: str, sources: list[dict]) -> list[str]:
+    sem = asyncio.Semaphore(max(1, SUMMARIZER_MAP_CONCURRENCY))
+
+    async def note(first_number: int, group: list[dict]) -> str:
+        async with sem:
+            try:
+                return await llm.achat(
+                    messages=_map_messages(query, first_number, group), temperature=0.1, max_tokens=500
+                )
+            except Exception as e:
+                print(f"Summarizer map call failed: {e}")
+                return ""
+
+    notes = await asyncio.gather(*(note(n, g) for n, g in _map_groups(sources)))
+    return [n.strip() for n in notes if (n or "").strip()]
+
+
+def _first_pass_messages(query: str, memory_context: list[str], sources: list[dict]) -> list[dict]:
+    memory_text = truncate_tokens("\n".join(memory_context[:6]), SUMMARIZER_INPUT_TOKEN_BUDGET // 8)
 
-    # First pass: richer context, but capped to avoid oversized prompts.
-    user_payload = f"""QUERY:
+    # First pass: sources fill whatever of the input budget the prompt and memory leave.
+    header = f"""QUERY:
 {query}
 
 MEMORY CONTEXT (prior relevant notes):
 {memory_text}
 
 SOURCES:
-{_format_sources(sources, snippet_chars=350, content_chars=700, limit=10)}
 """
+    budget = SUMMARIZER_INPUT_TOKEN_BUDGET - count_tokens(SYSTEM) - count_tokens(header)
+    user_payload = header + pack_sources(query, sources, budget).text
+    return [
+        {"role": "system", "content": SYSTEM},
+        {"role": "user", "content": user_payload},
+    ]
 
-    draft = llm.chat(
-        messages=[
-            {"role": "system", "content": SYSTEM},
-            {"role": "user", "content": user_payload},
-        ],
+
+def _retry_messages(query: str, sources: list[dict]) -> list[dict]:
+    # Retry with half the budget and no memory if the first call returns empty.
+    header = f"""QUERY:
+{query}
+
+Return a complete Markdown report using ONLY the sources below. If evidence is limited, say so explicitly.
+
+SOURCES:
+"""
+    budget = SUMMARIZER_INPUT_TOKEN_BUDGET // 2 - count_tokens(SYSTEM) - count_tokens(header)
+    retry_payload = header + pack_sources(query, sources, budget, snippet_tokens=40).text
+    return [
+        {"role": "system", "content": SYSTEM},
+        {"role": "user", "content": retry_payload},
+    ]
+
+
+def run_summarizer(query: str, memory_context: list[str], sources: list[dict]) -> str:
+    """Sync entry point for scripts; runs arun_summarizer on a new event loop."""
+    return run_sync(arun_summarizer(query, memory_context, sources))
+
+
+async def arun_summarizer(
+    query: str,
+    memory_context: list[str],
+    sources: list[dict],
+    on_delta: Callable[[str], None] | None = None,
+) -> str:
+    """
+    `on_delta` receives the draft text as it streams in (retry pass included). With map-reduce,
+    only the reduce call streams; if every map call fails it falls back to the single pass.
+    """
+    llm = AzureChatLLM()
+
+    if uses_map_reduce(sources):
+        notes = await _amap_notes(llm, query, sources)
+        if notes:
+            draft = await llm.achat(
+                messages=_reduce_messages(query, memory_context, sources, notes),
+                temperature=0.2,
+                max_tokens=2200,
+                continue_on_length=True,
+                max_continuations=2,
+                on_delta=on_delta,
+            )
+            if (draft or "").strip():
+                return draft
+
+    draft = await llm.achat(
+        messages=_first_pass_messages(query, memory_context, sources),
         temperature=0.2,
         max_tokens=2200,
         continue_on_length=True,
         max_continuations=2,
+        on_delta=on_delta,
     )
     if (draft or "").strip():
         return draft
 
-    # Retry with a much smaller payload if the first call returns empty.
-    retry_payload = f"""QUERY:
-{query}
-
-Return a complete Markdown report using ONLY the sources below. If evidence is limited, say so explicitly.
-
-SOURCES:
-{_format_sources(sources, snippet_chars=180, content_chars=240, limit=6)}
-"""
-    retry = llm.chat(
-        messages=[
-            {"role": "system", "content": SYSTEM},
-            {"role": "user", "content": retry_payload},
-        ],
+    retry = await llm.achat(
+        messages=_retry_messages(query, sources),
         temperature=0.2,
         max_tokens=2000,
         continue_on_length=True,
         max_continuations=2,
+        on_delta=on_delta,
     )
     if (retry or "").strip():
         return retry
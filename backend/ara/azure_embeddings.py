@@ -1,22 +1,124 @@
-import requests
-from backend.ara.config import AZURE_EMBEDDING_ENDPOINT, AZURE_EMBEDDING_API_KEY, AZURE_EMBEDDING_DEPLOYMENT_NAME
+import asyncio
+import sqlite3
+import time
+
+import numpy as np
+
+from backend.ara.config import AZURE_EMBEDDING_API_KEY, AZURE_EMBEDDING_DEPLOYMENT_NAME, required
+from backend.ara.metrics import observe_embedding, record_cache
+from backend.ara.embedding_cache import BatcherRegistry, get_embedding_cache, text_hash
+from backend.ara.transport import arequest, get_session
+
+_SHARED_EMBEDDER = None
+
+
+def get_shared_embedder() -> "AzureEmbeddings":
+    """Process-wide embedder, so concurrent runs share one micro-batcher."""
+    global _SHARED_EMBEDDER
+    if _SHARED_EMBEDDER is None:
+        _SHARED_EMBEDDER = AzureEmbeddings()
+    return _SHARED_EMBEDDER
+
 
 class AzureEmbeddings:
-    def __init__(self, endpoint: str = AZURE_EMBEDDING_ENDPOINT, api_key: str = AZURE_EMBEDDING_API_KEY):
-        self.endpoint = endpoint
+    def __init__(self, endpoint: str | None = None, api_key: str = AZURE_EMBEDDING_API_KEY):
+        self.endpoint = endpoint or required("AZURE_EMBEDDING_ENDPOINT")
         self.api_key = api_key
+        self._batchers = BatcherRegistry(self._arequest)
 
-    def embed(self, texts: list[str]) -> list[list[float]]:
+    def _headers(self) -> dict:
         headers = {"Content-Type": "application/json"}
         if self.api_key:
             headers["api-key"] = self.api_key
+        return headers
 
-        payload = {
+    def _payload(self, texts: list[str]) -> dict:
+        return {
             "model": AZURE_EMBEDDING_DEPLOYMENT_NAME,
             "input": texts,
         }
 
-        resp = requests.post(self.endpoint, headers=headers, json=payload, timeout=90)
+    @staticmethod
+    def _to_array(data: dict) -> np.ndarray:
+        return np.asarray([item["embedding"] for item in data["data"]], dtype=np.float32)
+
+    def _request(self, texts: list[str]) -> np.ndarray:
+        resp = get_session().post(self.endpoint, headers=self._headers(), json=self._payload(texts), timeout=90)
+        resp.raise_for_status()
+        return self._to_array(resp.json())
+
+    async def _arequest(self, texts: list[str]) -> np.ndarray:
+        resp = await arequest("POST", self.endpoint, headers=self._headers(), json=self._payload(texts), timeout=90)
         resp.raise_for_status()
-        data = resp.json()
-        return [item["embedding"] for item in data["data"]]
\ No newline at end of file
+        return self._to_array(resp.json())
+
+    @staticmethod
+    def _cache_get(hashes: list[str]) -> dict[str, np.ndarray]:
+        cache = get_embedding_cache()
+        if cache is None:
+            return {}
+        try:
+            return cache.get_many(AZURE_EMBEDDING_DEPLOYMENT_NAME, hashes)
+        except sqlite3.Error:
+            return {}
+
+    @staticmethod
+    def _cache_put(items: dict[str, np.ndarray]) -> None:
+        cache = get_embedding_cache()
+        if cache is None:
+            return
+        try:
+            cache.put_many(AZURE_EMBEDDING_DEPLOYMENT_NAME, items)
+        except sqlite3.Error:
+            pass
+
+    @staticmethod
+    def _missing(texts: list[str], hashes: list[str], found: dict) -> list[str]:
+        missing = {}
+        for text, h in zip(texts, hashes):
+            if h not in found:
+                missing.setdefault(h, text)
+        return list(missing.values())
+
+    def embed_array(self, texts: list[str]) -> np.ndarray:
+        """Embeddings as a (len(texts), dim) float32 array, served from the cache where possible."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        hashes = [text_hash(t) for t in texts]
+        found = self._cache_get(hashes)
+        missing = self._missing(texts, hashes, found)
+        record_cache("embedding", "hit", len(texts) - len(missing))
+        record_cache("embedding", "miss", len(missing))
+        if missing:
+            started = time.perf_counter()
+            vectors = self._request(missing)
+            observe_embedding(time.perf_counter() - started, len(missing))
+            fresh = dict(zip((text_hash(t) for t in missing), vectors))
+            self._cache_put(fresh)
+            found.update(fresh)
+        return np.stack([found[h] for h in hashes])
+
+    async def aembed_array(self, texts: list[str]) -> np.ndarray:
+        """Async embed_array; cache misses go through the per-loop micro-batcher."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        hashes = [text_hash(t) for t in texts]
+        found = await asyncio.to_thread(self._cache_get, hashes)
+        missing = self._missing(texts, hashes, found)
+        record_cache("embedding", "hit", len(texts) - len(missing))
+        record_cache("embedding", "miss", len(missing))
+        if missing:
+            # Timed from the caller's side, so it includes the micro-batching wait.
+            started = time.perf_counter()
+            vectors = await self._batchers.get().embed(missing)
+            observe_embedding(time.perf_counter() - started, len(missing))
+            fresh = dict(zip((text_hash(t) for t in missing), vectors))
+            await asyncio.to_thread(self._cache_put, fresh)
+            found.update(fresh)
+        return np.stack([found[h] for h in hashes])
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_array(texts).tolist()
+
+    async def aembed(self, texts: list[str]) -> list[list[float]]:
+        return (await self.aembed_array(texts)).tolist()
@@ -1,11 +1,230 @@
-import requests
-from backend.ara.config import AZURE_LLM_ENDPOINT, AZURE_LLM_API_KEY, AZURE_LLM_DEPLOYMENT_NAME
+import contextvars
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Iterator
+
+from backend.ara.azure_embeddings import get_shared_embedder
+from backend.ara.config import AZURE_LLM_API_KEY, AZURE_LLM_DEPLOYMENT_NAME, required
+from backend.ara.llm_cache import CachedResponse, ResponseCache, get_llm_cache
+from backend.ara.metrics import observe_llm, record_cache
+from backend.ara.transport import arequest, astream_request, run_sync
+
+CONTINUE_PROMPT = (
+    "Continue exactly from where you stopped. "
+    "Do not repeat previous text. Return only the continuation."
+)
+
+# Recorders active in the current context; tasks spawned inside (e.g. gather) inherit them.
+_RECORDERS: contextvars.ContextVar[tuple["LLMCallRecorder", ...]] = contextvars.ContextVar(
+    "ara_llm_recorders", default=()
+)
+
+
+@dataclass
+class LLMCall:
+    """Metadata of one chat call, continuations included."""
+
+    seconds: float
+    segments: int = 0
+    finish_reasons: list[str] = field(default_factory=list)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    streamed: bool = False
+    cache: str = ""
+
+    @property
+    def continued(self) -> bool:
+        return any(fr.lower() == "length" for fr in self.finish_reasons[:-1])
+
+
+class LLMCallRecorder:
+    """Collects the LLMCall records of every chat call made while it is active."""
+
+    def __init__(self):
+        self.calls: list[LLMCall] = []
+
+    def summary(self) -> dict:
+        api_calls = [c for c in self.calls if not c.cache]
+        seconds = sum(c.seconds for c in api_calls)
+        completion_tokens = sum(c.completion_tokens for c in api_calls)
+        return {
+            "calls": len(self.calls),
+            "cache_hits": len(self.calls) - len(api_calls),
+            "seconds": round(seconds, 3),
+            "prompt_tokens": sum(c.prompt_tokens for c in api_calls),
+            "completion_tokens": completion_tokens,
+            "completion_tokens_per_second": round(completion_tokens / seconds, 1) if seconds else 0.0,
+            "segments": sum(c.segments for c in api_calls),
+            "continued": sum(1 for c in api_calls if c.continued),
+            "finish_reasons": dict(Counter(fr for c in api_calls for fr in c.finish_reasons)),
+        }
+
+    def describe(self) -> str:
+        s = self.summary()
+        return (
+            f"calls={s['calls']} (cached={s['cache_hits']}), finish_reasons={s['finish_reasons']}, "
+            f"segments={s['segments']}, continued={s['continued']}, "
+            f"tokens={s['prompt_tokens']}+{s['completion_tokens']}, seconds={s['seconds']}"
+        )
+
+
+@contextmanager
+def record_llm_calls() -> Iterator[LLMCallRecorder]:
+    """Records chat calls made in this context, including from tasks it starts; recorders nest."""
+    recorder = LLMCallRecorder()
+    token = _RECORDERS.set(_RECORDERS.get() + (recorder,))
+    try:
+        yield recorder
+    finally:
+        _RECORDERS.reset(token)
+
+
+def _record_call(call: LLMCall) -> None:
+    for recorder in _RECORDERS.get():
+        recorder.calls.append(call)
+    if not call.cache:
+        observe_llm(call.seconds, call.prompt_tokens, call.completion_tokens, call.segments, call.finish_reasons, call.streamed)
+
+
+class _Completion:
+    """Accumulates one chat completion across `finish_reason == "length"` continuations."""
+
+    def __init__(
+        self,
+        messages: list[dict],
+        temperature: float,
+        max_tokens: int,
+        continue_on_length: bool,
+        max_continuations: int,
+    ):
+        self.base_messages = list(messages)
+        self.working_messages = list(self.base_messages)
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.continue_on_length = continue_on_length
+        self.max_continuations = max_continuations
+        self.chunks: list[str] = []
+        self.finish_reasons: list[str] = []
+        self.usage_records: list[dict] = []
+        self.raw: dict | None = None
+        self.started = time.perf_counter()
+
+    def payload(self) -> dict:
+        return {
+            # Keep deployment name in payload for your tracking/debugging even if endpoint already routes it.
+            "model": AZURE_LLM_DEPLOYMENT_NAME,
+            "messages": self.working_messages,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+        }
+
+    def absorb(self, data: dict, extract_text) -> bool:
+        """Record one response segment. Returns True when no further continuation is needed."""
+        try:
+            choice = data["choices"][0]
+            finish_reason = choice.get("finish_reason", "")
+            message = choice.get("message", {})
+            piece = extract_text(message.get("content", ""))
+        except Exception:
+            self.raw = data
+            return True
+
+        return self.record(piece, finish_reason, data.get("usage"))
+
+    def record(self, piece: str, finish_reason: str, usage: dict | None) -> bool:
+        """Record one segment's text (whole response or assembled stream). Same return as absorb."""
+        self.chunks.append(piece or "")
+        self.finish_reasons.append(str(finish_reason or ""))
+        if isinstance(usage, dict):
+            self.usage_records.append(usage)
+
+        if not (self.continue_on_length and str(finish_reason).lower() == "length"):
+            return True
+
+        if len(self.chunks) > self.max_continuations:
+            return True
+
+        assembled = "".join(self.chunks)
+        self.working_messages = self.base_messages + [
+            {"role": "assistant", "content": assembled},
+            {"role": "user", "content": CONTINUE_PROMPT},
+        ]
+        return False
+
+    def call(self, streamed: bool) -> LLMCall:
+        return LLMCall(
+            seconds=time.perf_counter() - self.started,
+            segments=len(self.chunks),
+            finish_reasons=list(self.finish_reasons),
+            prompt_tokens=sum(int(u.get("prompt_tokens") or 0) for u in self.usage_records),
+            completion_tokens=sum(int(u.get("completion_tokens") or 0) for u in self.usage_records),
+            streamed=streamed,
+        )
+
+    def meta(self) -> dict:
+        if self.raw is not None:
+            return {"raw": self.raw}
+        finish_reasons = self.finish_reasons
+        return {
+            "finish_reasons": finish_reasons,
+            "continued": any(fr.lower() == "length" for fr in finish_reasons[:-1]) if finish_reasons else False,
+            "segments": len(self.chunks),
+            "usage": self.usage_records,
+        }
+
+    def text(self) -> str:
+        if self.raw is not None:
+            return str(self.raw)
+        return "".join(self.chunks)
+
+    def params(self) -> dict:
+        return {
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "continue_on_length": self.continue_on_length,
+            "max_continuations": self.max_continuations,
+        }
+
+    def cacheable(self) -> bool:
+        return self.raw is None and bool("".join(self.chunks).strip())
+
+
+class _CacheLookup:
+    """Cache keys for one chat call; the semantic level keys on the last message's embedding."""
+
+    def __init__(self, llm_cache: ResponseCache, completion: _Completion, semantic: bool):
+        messages = completion.base_messages
+        params = completion.params()
+        self.cache = llm_cache
+        self.key = llm_cache.make_key(AZURE_LLM_DEPLOYMENT_NAME, messages, params)
+        self.namespace = None
+        self.semantic_text = ""
+        if semantic and llm_cache.semantic_enabled and messages:
+            self.namespace = llm_cache.semantic_namespace(AZURE_LLM_DEPLOYMENT_NAME, messages, params)
+            self.semantic_text = str(messages[-1].get("content", ""))
+        self.vector: list[float] | None = None
+
+    def similar(self, vector: list[float]) -> CachedResponse | None:
+        self.vector = vector
+        return self.cache.get_similar(self.namespace, vector)
+
+    def store(self, text: str, meta: dict) -> None:
+        response = self.cache.put(self.key, text, meta)
+        if self.namespace is not None and self.vector is not None:
+            self.cache.put_similar(self.key, self.namespace, self.vector, response)
+
 
 class AzureChatLLM:
-    last_call_meta = {}
+    """
+    Azure chat completions client. Call metadata (usage, latency, segments, finish reasons) is
+    on `last_response_meta` for this instance and goes to any active `record_llm_calls()`.
+    """
 
-    def __init__(self, endpoint: str = AZURE_LLM_ENDPOINT, api_key: str = AZURE_LLM_API_KEY):
-        self.endpoint = endpoint
+    def __init__(self, endpoint: str | None = None, api_key: str = AZURE_LLM_API_KEY):
+        self.endpoint = endpoint or required("AZURE_LLM_ENDPOINT")
         self.api_key = api_key
         self.last_response_meta = {}
 
@@ -25,77 +244,162 @@ class AzureChatLLM:
             return "".join(parts)
         return "" if content is None else str(content)
 
-    def chat(
-        self,
-        messages: list[dict],
-        temperature: float = 0.2,
-        max_tokens: int = 1200,
-        continue_on_length: bool = False,
-        max_continuations: int = 2,
-    ) -> str:
+    def _headers(self) -> dict:
         headers = {
             "Content-Type": "application/json",
         }
         if self.api_key:
             headers["api-key"] = self.api_key
+        return headers
 
-        base_messages = list(messages)
-        working_messages = list(base_messages)
-        chunks: list[str] = []
-        finish_reasons: list[str] = []
-        usage_records: list[dict] = []
-
-        for continuation_idx in range(max_continuations + 1):
-            payload = {
-                # Keep deployment name in payload for your tracking/debugging even if endpoint already routes it.
-                "model": AZURE_LLM_DEPLOYMENT_NAME,
-                "messages": working_messages,
-                "temperature": temperature,
-                "max_tokens": max_tokens,
-            }
-
-            resp = requests.post(self.endpoint, headers=headers, json=payload, timeout=90)
-            resp.raise_for_status()
-            data = resp.json()
+    def _finish(self, completion: _Completion, streamed: bool = False) -> str:
+        self.last_response_meta = completion.meta()
+        _record_call(completion.call(streamed))
+        return completion.text()
 
+    def _finish_cached(self, hit: CachedResponse, level: str) -> str:
+        record_cache("llm", "hit" if level == "exact" else level)
+        self.last_response_meta = {**hit.meta, "cache": level}
+        _record_call(LLMCall(seconds=0.0, finish_reasons=list(hit.meta.get("finish_reasons", [])), cache=level))
+        return hit.text
+
+    def _cache_lookup(self, completion: _Completion, cache: bool, semantic_cache: bool) -> _CacheLookup | None:
+        llm_cache = get_llm_cache() if cache else None
+        if llm_cache is None:
+            return None
+        return _CacheLookup(llm_cache, completion, semantic_cache)
+
+    async def _alookup(
+        self, completion: _Completion, cache: bool, semantic_cache: bool
+    ) -> tuple[_CacheLookup | None, str | None]:
+        """Returns the cache keys for this call and the cached text on a hit."""
+        lookup = self._cache_lookup(completion, cache, semantic_cache)
+        if lookup is None:
+            return None, None
+        hit = lookup.cache.get(lookup.key)
+        if hit is not None:
+            return lookup, self._finish_cached(hit, "exact")
+        if lookup.namespace is not None:
             try:
-                choice = data["choices"][0]
-                finish_reason = choice.get("finish_reason", "")
-                message = choice.get("message", {})
-                piece = self._extract_text(message.get("content", ""))
+                hit = lookup.similar((await get_shared_embedder().aembed([lookup.semantic_text]))[0])
             except Exception:
-                self.last_response_meta = {"raw": data}
-                AzureChatLLM.last_call_meta = self.last_response_meta
-                return str(data)
+                hit = None
+            if hit is not None:
+                return lookup, self._finish_cached(hit, "semantic")
+        record_cache("llm", "miss")
+        return lookup, None
 
-            chunks.append(piece or "")
-            finish_reasons.append(str(finish_reason or ""))
-            if isinstance(data.get("usage"), dict):
-                usage_records.append(data["usage"])
+    def _store(self, lookup: _CacheLookup | None, completion: _Completion, text: str) -> None:
+        if lookup is not None and completion.cacheable():
+            lookup.store(text, self.last_response_meta)
 
-            if not (continue_on_length and str(finish_reason).lower() == "length"):
-                break
+    def chat(
+        self,
+        messages: list[dict],
+        temperature: float = 0.2,
+        max_tokens: int = 1200,
+        continue_on_length: bool = False,
+        max_continuations: int = 2,
+        cache: bool = True,
+        semantic_cache: bool = False,
+    ) -> str:
+        """
+        Sync entry point for scripts; runs achat on a new event loop.
+        `cache=False` bypasses the response cache for this call; `semantic_cache=True`
+        also allows near-duplicate hits (used for planner prompts).
+        """
+        return run_sync(self.achat(
+            messages, temperature, max_tokens, continue_on_length, max_continuations, cache, semantic_cache
+        ))
 
-            if continuation_idx >= max_continuations:
+    async def achat(
+        self,
+        messages: list[dict],
+        temperature: float = 0.2,
+        max_tokens: int = 1200,
+        continue_on_length: bool = False,
+        max_continuations: int = 2,
+        cache: bool = True,
+        semantic_cache: bool = False,
+        on_delta: Callable[[str], None] | None = None,
+    ) -> str:
+        """`on_delta` switches to a streamed request and is called with each text delta."""
+        if on_delta is not None:
+            pieces: list[str] = []
+            async for piece in self.astream_chat(
+                messages, temperature, max_tokens, continue_on_length, max_continuations, cache
+            ):
+                pieces.append(piece)
+                on_delta(piece)
+            return "".join(pieces)
+
+        completion = _Completion(messages, temperature, max_tokens, continue_on_length, max_continuations)
+        lookup, cached = await self._alookup(completion, cache, semantic_cache)
+        if cached is not None:
+            return cached
+
+        headers = self._headers()
+        while True:
+            resp = await arequest("POST", self.endpoint, headers=headers, json=completion.payload(), timeout=90)
+            resp.raise_for_status()
+            if completion.absorb(resp.json(), self._extract_text):
                 break
+        text = self._finish(completion)
+        self._store(lookup, completion, text)
+        return text
 
-            assembled = "".join(chunks)
-            working_messages = base_messages + [
-                {"role": "assistant", "content": assembled},
-                {
-                    "role": "user",
-                    "content": (
-                        "Continue exactly from where you stopped. "
-                        "Do not repeat previous text. Return only the continuation."
-                    ),
-                },
-            ]
-
-        self.last_response_meta = {
-            "finish_reasons": finish_reasons,
-            "continued": any(fr.lower() == "length" for fr in finish_reasons[:-1]) if finish_reasons else False,
-            "segments": len(chunks),
-            "usage": usage_records,
-        }
-        AzureChatLLM.last_call_meta = self.last_response_meta
-        return "".join(chunks)
+    async def astream_chat(
+        self,
+        messages: list[dict],
+        temperature: float = 0.2,
+        max_tokens: int = 1200,
+        continue_on_length: bool = False,
+        max_continuations: int = 2,
+        cache: bool = True,
+    ) -> AsyncIterator[str]:
+        """
+        Like achat, but yields text deltas as they arrive (`"stream": true`). A segment that
+        ends with finish_reason "length" is continued in a new streamed request, and its
+        deltas are yielded seamlessly. A cache hit is yielded as a single delta.
+        """
+        completion = _Completion(messages, temperature, max_tokens, continue_on_length, max_continuations)
+        lookup, cached = await self._alookup(completion, cache, False)
+        if cached is not None:
+            yield cached
+            return
+
+        headers = self._headers()
+        while True:
+            pieces: list[str] = []
+            finish_reason = ""
+            usage = None
+            # Streamed responses only report usage when asked, in a final chunk with empty choices.
+            payload = {**completion.payload(), "stream": True, "stream_options": {"include_usage": True}}
+            async with astream_request("POST", self.endpoint, headers=headers, json=payload, timeout=90) as resp:
+                if resp.is_error:
+                    await resp.aread()
+                    resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        chunk = json.loads(data)
+                    except ValueError:
+                        continue
+                    if isinstance(chunk.get("usage"), dict):
+                        usage = chunk["usage"]
+                    # Azure sends a leading chunk with empty choices for content-filter results.
+                    for choice in chunk.get("choices") or []:
+                        piece = self._extract_text((choice.get("delta") or {}).get("content"))
+                        if piece:
+                            pieces.append(piece)
+                            yield piece
+                        if choice.get("finish_reason"):
+                            finish_reason = choice["finish_reason"]
+            if completion.record("".join(pieces), finish_reason, usage):
+                break
+        text = self._finish(completion, streamed=True)
+        self._store(lookup, completion, text)
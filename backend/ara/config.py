@@ -11,13 +11,38 @@ def env(name: str, default: str | None = None) -> str:
         raise RuntimeError(f"Missing environment variable: {name}")
     return val
 
-AZURE_LLM_ENDPOINT = env("AZURE_LLM_ENDPOINT")
+
+def required(name: str) -> str:
+    """
+    Value of a required setting, raising if it is unset. Checked where the setting is first used
+    rather than at import, so /health and PDF export work without service credentials.
+    """
+    val = globals().get(name)
+    if not val:
+        raise RuntimeError(f"Missing environment variable: {name}")
+    return val
+
+
+AZURE_LLM_ENDPOINT = env("AZURE_LLM_ENDPOINT", "")
 AZURE_LLM_API_KEY = env("AZURE_LLM_API_KEY", "")
 AZURE_LLM_DEPLOYMENT_NAME = env("AZURE_LLM_DEPLOYMENT_NAME", "grok-3-mini")
 
-AZURE_EMBEDDING_ENDPOINT = env("AZURE_EMBEDDING_ENDPOINT")
+# Opt-in response cache under AzureChatLLM.chat; the semantic level is used for planner prompts.
+LLM_CACHE_ENABLED = env("LLM_CACHE_ENABLED", "false").strip().lower() in {"1", "true", "yes"}
+LLM_CACHE_TTL_SECONDS = float(env("LLM_CACHE_TTL_SECONDS", "3600"))
+LLM_CACHE_MAX_ENTRIES = int(env("LLM_CACHE_MAX_ENTRIES", "512"))
+LLM_SEMANTIC_CACHE_ENABLED = env("LLM_SEMANTIC_CACHE_ENABLED", "false").strip().lower() in {"1", "true", "yes"}
+LLM_SEMANTIC_CACHE_THRESHOLD = float(env("LLM_SEMANTIC_CACHE_THRESHOLD", "0.95"))
+LLM_SEMANTIC_CACHE_MAX_ENTRIES = int(env("LLM_SEMANTIC_CACHE_MAX_ENTRIES", "256"))
+
+AZURE_EMBEDDING_ENDPOINT = env("AZURE_EMBEDDING_ENDPOINT", "")
 AZURE_EMBEDDING_API_KEY = env("AZURE_EMBEDDING_API_KEY", "")
 AZURE_EMBEDDING_DEPLOYMENT_NAME = env("AZURE_EMBEDDING_DEPLOYMENT_NAME", "text-embedding-3-large")
+EMBEDDING_CACHE_ENABLED = env("EMBEDDING_CACHE_ENABLED", "true").strip().lower() in {"1", "true", "yes"}
+EMBEDDING_CACHE_PATH = env("EMBEDDING_CACHE_PATH", "./ara_cache/embeddings.sqlite3")
+EMBEDDING_CACHE_MAX_ENTRIES = int(env("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+EMBEDDING_BATCH_MAX_SIZE = int(env("EMBEDDING_BATCH_MAX_SIZE", "64"))
+EMBEDDING_BATCH_MAX_WAIT_MS = float(env("EMBEDDING_BATCH_MAX_WAIT_MS", "10"))
 
 CHROMA_PERSIST_DIR = env("CHROMA_PERSIST_DIR", "./chroma_db")
 CHROMA_COLLECTION = env("CHROMA_COLLECTION", "ara_memory")
@@ -25,6 +50,86 @@ CHROMA_COLLECTION = env("CHROMA_COLLECTION", "ara_memory")
 DDG_MAX_RESULTS = int(env("DDG_MAX_RESULTS", "8"))
 ARXIV_MAX_RESULTS = int(env("ARXIV_MAX_RESULTS", "5"))
 FETCH_MAX_CHARS = int(env("FETCH_MAX_CHARS", "12000"))
+FETCH_TIMEOUT_SECONDS = float(env("FETCH_TIMEOUT_SECONDS", "30"))
+FETCH_CONCURRENCY = int(env("FETCH_CONCURRENCY", "8"))
+RESEARCH_DEADLINE_SECONDS = float(env("RESEARCH_DEADLINE_SECONDS", "45"))
+
+PAGE_CACHE_ENABLED = env("PAGE_CACHE_ENABLED", "true").strip().lower() in {"1", "true", "yes"}
+PAGE_CACHE_PATH = env("PAGE_CACHE_PATH", "./ara_cache/pages.sqlite3")
+PAGE_CACHE_TTL_SECONDS = float(env("PAGE_CACHE_TTL_SECONDS", "86400"))
+PAGE_CACHE_MAX_BYTES = int(env("PAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Chunk-and-rerank of fetched page text before summarization (embedding cosine vs the query).
+RERANK_ENABLED = env("RERANK_ENABLED", "true").strip().lower() in {"1", "true", "yes"}
+RERANK_PASSAGE_CHARS = int(env("RERANK_PASSAGE_CHARS", "600"))
+RERANK_MAX_PASSAGES_PER_SOURCE = int(env("RERANK_MAX_PASSAGES_PER_SOURCE", "24"))
+RERANK_TOP_K_PER_SOURCE = int(env("RERANK_TOP_K_PER_SOURCE", "3"))
+RERANK_TOP_K_GLOBAL = int(env("RERANK_TOP_K_GLOBAL", "30"))
+
+# Prompt tokens for the summarizer's input (system prompt, memory and packed source passages).
+SUMMARIZER_INPUT_TOKEN_BUDGET = int(env("SUMMARIZER_INPUT_TOKEN_BUDGET", "6000"))
+# "single" packs all sources into one prompt; "map_reduce" writes cited notes per group of sources
+# concurrently, then one reduce call writes the report; "auto" uses map-reduce from MIN_SOURCES up.
+SUMMARIZER_MODE = env("SUMMARIZER_MODE", "auto").strip().lower()
+SUMMARIZER_MAP_REDUCE_MIN_SOURCES = int(env("SUMMARIZER_MAP_REDUCE_MIN_SOURCES", "16"))
+SUMMARIZER_MAP_GROUP_SIZE = int(env("SUMMARIZER_MAP_GROUP_SIZE", "3"))
+SUMMARIZER_MAP_CONCURRENCY = int(env("SUMMARIZER_MAP_CONCURRENCY", "4"))
+SUMMARIZER_MAP_INPUT_TOKEN_BUDGET = int(env("SUMMARIZER_MAP_INPUT_TOKEN_BUDGET", "2500"))
+SUMMARIZER_MAX_SOURCES = int(env("SUMMARIZER_MAX_SOURCES", "40"))
+# tiktoken encoding used to count prompt tokens; falls back to chars/4 when unavailable.
+TOKENIZER_ENCODING = env("TOKENIZER_ENCODING", "o200k_base")
+
+# Critic: "full" rewrites the whole draft; "sections" reviews groups of `##` sections and applies
+# JSON edits locally; "auto" uses sections from CRITIC_SECTIONS_MIN_TOKENS up.
+CRITIC_MODE = env("CRITIC_MODE", "auto").strip().lower()
+CRITIC_SECTIONS_MIN_TOKENS = int(env("CRITIC_SECTIONS_MIN_TOKENS", "1500"))
+CRITIC_SECTION_GROUP_TOKENS = int(env("CRITIC_SECTION_GROUP_TOKENS", "800"))
+CRITIC_SECTION_CONCURRENCY = int(env("CRITIC_SECTION_CONCURRENCY", "4"))
+# Local draft quality score (0-1): skip the critic at or above SKIP, limit it to section edits at
+# or above DOWNGRADE. QUALITY_MIN_WORDS is the length that earns the full length score.
+CRITIC_SKIP_SCORE = float(env("CRITIC_SKIP_SCORE", "0.9"))
+CRITIC_DOWNGRADE_SCORE = float(env("CRITIC_DOWNGRADE_SCORE", "0.75"))
+QUALITY_MIN_WORDS = int(env("QUALITY_MIN_WORDS", "300"))
+
+# "query" searches the raw query only; "plan" also searches one sub-query per plan step.
+RESEARCH_MODE = env("RESEARCH_MODE", "query").strip().lower()
+RESEARCH_MAX_SUBQUERIES = int(env("RESEARCH_MAX_SUBQUERIES", "6"))
+# Per provider: at most this many Tavily and this many arXiv searches in flight.
+RESEARCH_SUBQUERY_CONCURRENCY = int(env("RESEARCH_SUBQUERY_CONCURRENCY", "4"))
+RESEARCH_ARXIV_SUBQUERIES = int(env("RESEARCH_ARXIV_SUBQUERIES", "2"))
+RESEARCH_MAX_SOURCES = int(env("RESEARCH_MAX_SOURCES", "20"))
+TAVILY_MIN_INTERVAL_SECONDS = float(env("TAVILY_MIN_INTERVAL_SECONDS", "0.2"))
+ARXIV_MIN_INTERVAL_SECONDS = float(env("ARXIV_MIN_INTERVAL_SECONDS", "3.0"))
+# Service base URLs; overridden to point at local stand-ins (see backend/bench/fakes.py).
+ARXIV_API_URL = env("ARXIV_API_URL", "https://export.arxiv.org/api/query")
+
+# LangGraph checkpoints for job runs (keyed by job id) so failed runs resume from the last completed node.
+CHECKPOINT_ENABLED = env("CHECKPOINT_ENABLED", "true").strip().lower() in {"1", "true", "yes"}
+CHECKPOINT_PATH = env("CHECKPOINT_PATH", "./ara_cache/checkpoints.sqlite3")
+
+# Background research jobs: concurrent runs, waiting runs before 429, and how long results are kept.
+# Every run/stream/jobs request is a job. Workers are coroutines on the event loop, so the real
+# limit is upstream (LLM and search quotas) rather than threads or CPU.
+JOB_WORKERS = int(env("JOB_WORKERS", "16"))
+JOB_QUEUE_MAX = int(env("JOB_QUEUE_MAX", "64"))
+JOB_RETENTION_SECONDS = float(env("JOB_RETENTION_SECONDS", "3600"))
+JOB_MAX_RETAINED = int(env("JOB_MAX_RETAINED", "200"))
+# Identical queries (case/whitespace-insensitive) share one run; finished results are reused this long.
+JOB_RESULT_CACHE_TTL_SECONDS = float(env("JOB_RESULT_CACHE_TTL_SECONDS", "300"))
+
+# Run logs: records kept per run (ring buffer) and an optional JSON-lines file every record is appended to.
+LOG_BUFFER_SIZE = int(env("LOG_BUFFER_SIZE", "1000"))
+LOG_JSONL_PATH = env("LOG_JSONL_PATH", "")
+METRICS_ENABLED = env("METRICS_ENABLED", "true").strip().lower() in {"1", "true", "yes"}
+
+HTTP_POOL_CONNECTIONS = int(env("HTTP_POOL_CONNECTIONS", "16"))
+HTTP_POOL_MAXSIZE = int(env("HTTP_POOL_MAXSIZE", "32"))
+HTTP_MAX_CONNECTIONS = int(env("HTTP_MAX_CONNECTIONS", "200"))
+HTTP_MAX_RETRIES = int(env("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_FACTOR = float(env("HTTP_BACKOFF_FACTOR", "0.5"))
+HTTP_BACKOFF_JITTER = float(env("HTTP_BACKOFF_JITTER", "0.5"))
+HTTP_BACKOFF_MAX = float(env("HTTP_BACKOFF_MAX", "20"))
 
-TAVILY_API_KEY = env("TAVILY_API_KEY")
+TAVILY_API_KEY = env("TAVILY_API_KEY", "")
 TAVILY_MAX_RESULTS = int(env("TAVILY_MAX_RESULTS", "8"))
+TAVILY_API_BASE_URL = env("TAVILY_API_BASE_URL", "https://api.tavily.com")
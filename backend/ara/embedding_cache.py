@@ -0,0 +1,223 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+import weakref
+from typing import Awaitable, Callable
+
+import numpy as np
+
+from backend.ara.config import (
+    EMBEDDING_BATCH_MAX_SIZE,
+    EMBEDDING_BATCH_MAX_WAIT_MS,
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    EMBEDDING_CACHE_PATH,
+)
+from backend.ara.sqlite_store import ThreadLocalSQLite
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    dim INTEGER NOT NULL,
+    vector BLOB NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (model, text_hash)
+);
+CREATE INDEX IF NOT EXISTS embeddings_accessed_at ON embeddings (accessed_at);
+-- Row count kept by triggers, so checking the size bound doesn't scan the table.
+CREATE TABLE IF NOT EXISTS embeddings_stats (id INTEGER PRIMARY KEY CHECK (id = 1), entries INTEGER NOT NULL);
+INSERT OR IGNORE INTO embeddings_stats (id, entries)
+    SELECT 1, COUNT(*) FROM embeddings WHERE NOT EXISTS (SELECT 1 FROM embeddings_stats);
+CREATE TRIGGER IF NOT EXISTS embeddings_count_insert AFTER INSERT ON embeddings
+    BEGIN UPDATE embeddings_stats SET entries = entries + 1 WHERE id = 1; END;
+CREATE TRIGGER IF NOT EXISTS embeddings_count_delete AFTER DELETE ON embeddings
+    BEGIN UPDATE embeddings_stats SET entries = entries - 1 WHERE id = 1; END;
+"""
+
+# Evict down to this fraction of the entry budget so eviction doesn't run on every insert.
+_EVICT_TARGET_RATIO = 0.9
+# Read hits only refresh accessed_at in batches of this many, instead of one write per read.
+_TOUCH_FLUSH_SIZE = 256
+
+_SHARED_CACHE = None
+_SHARED_CACHE_FAILED = False
+_SHARED_LOCK = threading.Lock()
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache keyed by (model, sha256(text)). Vectors are stored as raw
+    float32 bytes (4 bytes per dimension) rather than JSON lists of Python floats.
+
+    LRU order is approximate: read hits are buffered and written back with the next insert or
+    every _TOUCH_FLUSH_SIZE hits, so hits since the last flush are lost if the process exits.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.db = ThreadLocalSQLite(path, _SCHEMA)
+        self.max_entries = max_entries
+        self._touched: dict[tuple[str, str], float] = {}
+        self._touch_lock = threading.Lock()
+
+    def get_many(self, model: str, hashes: list[str]) -> dict[str, np.ndarray]:
+        if not hashes:
+            return {}
+        conn = self.db.conn()
+        unique = list(dict.fromkeys(hashes))
+        placeholders = ",".join("?" for _ in unique)
+        rows = conn.execute(
+            f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+            (model, *unique),
+        ).fetchall()
+        if rows:
+            now = time.time()
+            with self._touch_lock:
+                self._touched.update(((model, h), now) for h, _ in rows)
+                flush = len(self._touched) >= _TOUCH_FLUSH_SIZE
+            if flush:
+                self._flush_touches(conn)
+        return {h: np.frombuffer(blob, dtype=np.float32) for h, blob in rows}
+
+    def put_many(self, model: str, items: dict[str, np.ndarray]) -> None:
+        if not items:
+            return
+        now = time.time()
+        conn = self.db.conn()
+        self._flush_touches(conn)
+        # An upsert rather than INSERT OR REPLACE, whose implicit delete would skip the count trigger.
+        conn.executemany(
+            "INSERT INTO embeddings (model, text_hash, dim, vector, accessed_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (model, text_hash) DO UPDATE SET "
+            "dim = excluded.dim, vector = excluded.vector, accessed_at = excluded.accessed_at",
+            [
+                (model, h, int(vec.shape[0]), np.asarray(vec, dtype=np.float32).tobytes(), now)
+                for h, vec in items.items()
+            ],
+        )
+        self._evict(conn)
+
+    def _flush_touches(self, conn: sqlite3.Connection) -> None:
+        with self._touch_lock:
+            touched, self._touched = self._touched, {}
+        if touched:
+            conn.executemany(
+                "UPDATE embeddings SET accessed_at = ? WHERE model = ? AND text_hash = ?",
+                [(ts, model, h) for (model, h), ts in touched.items()],
+            )
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        count = conn.execute("SELECT entries FROM embeddings_stats WHERE id = 1").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        excess = count - int(self.max_entries * _EVICT_TARGET_RATIO)
+        conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY accessed_at ASC LIMIT ?)",
+            (excess,),
+        )
+
+
+def get_embedding_cache() -> EmbeddingCache | None:
+    """Process-wide embedding cache, or None when EMBEDDING_CACHE_ENABLED is off or the file can't be opened."""
+    global _SHARED_CACHE, _SHARED_CACHE_FAILED
+    if not EMBEDDING_CACHE_ENABLED or _SHARED_CACHE_FAILED:
+        return None
+    if _SHARED_CACHE is None:
+        with _SHARED_LOCK:
+            if _SHARED_CACHE is None and not _SHARED_CACHE_FAILED:
+                try:
+                    _SHARED_CACHE = EmbeddingCache(EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES)
+                except (OSError, sqlite3.Error) as e:
+                    print(f"Embedding cache disabled: {e}")
+                    _SHARED_CACHE_FAILED = True
+    return _SHARED_CACHE
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent embed requests (e.g. from different research runs) into one API
+    call of at most `max_batch` texts, waiting at most `max_wait` seconds to fill a batch.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[list[str]], Awaitable[np.ndarray]],
+        max_batch: int = EMBEDDING_BATCH_MAX_SIZE,
+        max_wait: float = EMBEDDING_BATCH_MAX_WAIT_MS / 1000,
+    ):
+        self._send = send
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait)
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._inflight: set[asyncio.Task] = set()
+
+    async def embed(self, texts: list[str]) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            fut = loop.create_future()
+            self._pending.append((text, fut))
+            futures.append(fut)
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+        if self._pending and self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return np.stack(await asyncio.gather(*futures))
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch, self._pending = self._pending[: self.max_batch], self._pending[self.max_batch:]
+            task = asyncio.get_running_loop().create_task(self._send_batch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _send_batch(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        unique = list(dict.fromkeys(text for text, _ in batch))
+        error: Exception | None = None
+        try:
+            vectors = await self._send(unique)
+            if len(vectors) != len(unique):
+                raise ValueError(f"Embedding API returned {len(vectors)} vectors for {len(unique)} texts")
+            by_text = dict(zip(unique, vectors))
+            for text, fut in batch:
+                if not fut.done():
+                    fut.set_result(by_text[text])
+        except Exception as exc:
+            error = exc
+        finally:
+            # Every waiter gets an outcome, so no embed() call hangs; without an error the batch
+            # was cancelled (CancelledError propagates after this block).
+            for _, fut in batch:
+                if not fut.done():
+                    if error is None:
+                        fut.cancel()
+                    else:
+                        fut.set_exception(error)
+
+
+class BatcherRegistry:
+    """One EmbeddingBatcher per event loop (futures and timers are loop-bound)."""
+
+    def __init__(self, send: Callable[[list[str]], Awaitable[np.ndarray]]):
+        self._send = send
+        self._batchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, EmbeddingBatcher]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def get(self) -> EmbeddingBatcher:
+        loop = asyncio.get_running_loop()
+        batcher = self._batchers.get(loop)
+        if batcher is None:
+            batcher = EmbeddingBatcher(self._send)
+            self._batchers[loop] = batcher
+        return batcher
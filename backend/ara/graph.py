@@ -1,15 +1,36 @@
-from typing import TypedDict, List, Dict, Any
-from langgraph.graph import StateGraph, END
+import asyncio
+import os
+import sqlite3
+import time
+import weakref
+from typing import Annotated, Callable, TypedDict, List, Dict, Any
 
-from backend.ara.logger import InMemoryLogger
+import numpy as np
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.graph import StateGraph, START, END
+
+from backend.ara.logger import InMemoryLogger, NodeLogger, append_logs
+from backend.ara.azure_embeddings import get_shared_embedder
 from backend.ara.memory import MemoryStore, make_id
+from backend.ara.metrics import observe_node, record_critic
+from backend.ara.rerank import rerank_sources
 from backend.ara.schemas import ToolResult, SourceItem
-from backend.ara.azure_llm import AzureChatLLM
+from backend.ara.azure_llm import record_llm_calls
+from backend.ara.config import (
+    CHECKPOINT_ENABLED,
+    CHECKPOINT_PATH,
+    CRITIC_DOWNGRADE_SCORE,
+    CRITIC_SKIP_SCORE,
+    RERANK_ENABLED,
+    RESEARCH_MODE,
+)
+from backend.ara.quality import score_draft
 
-from backend.ara.agents.planner import run_planner
-from backend.ara.agents.researcher import run_research
-from backend.ara.agents.summarizer import run_summarizer
-from backend.ara.agents.critic import run_critic
+from backend.ara.agents.planner import arun_planner
+from backend.ara.agents.researcher import arun_plan_research, arun_research
+from backend.ara.agents.summarizer import arun_summarizer, uses_map_reduce
+from backend.ara.agents.critic import arun_critic, uses_section_critic
 from backend.ara.agents.reporter import extract_revised, normalize_markdown_report, is_placeholder_report
 
 class GraphState(TypedDict, total=False):
@@ -22,33 +43,103 @@ class GraphState(TypedDict, total=False):
     memory_context: List[str]
     draft_report: str
     final_report: str
-    logs: List[str]
+    quality: Dict[str, Any]
+    # Each node returns only the lines it logged; the reducer appends them.
+    logs: Annotated[List[str], append_logs]
+
+_GRAPH = None
+_CHECKPOINTERS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, BaseCheckpointSaver]" = weakref.WeakKeyDictionary()
+# Serializes first use per loop, so concurrent workers don't each open (and one leak) a connection.
+_CHECKPOINTER_LOCKS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+_RUN_GRAPHS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = weakref.WeakKeyDictionary()
+_CHECKPOINT_FAILED = False
+
+
+def run_config(
+    logger: InMemoryLogger,
+    emit: Callable[[str, dict], None] | None = None,
+    thread_id: str | None = None,
+) -> RunnableConfig:
+    """
+    Per-run config for the shared graph; nodes read the run's logger from here.
+    `memo` holds per-run values computed once and shared by several nodes.
+    `emit(event, payload)` receives out-of-band events (LLM token deltas) for streaming clients.
+    `thread_id` keys the run's checkpoints on checkpointed graphs (the job id).
+    """
+    configurable = {"logger": logger, "memo": {}, "emit": emit}
+    if thread_id is not None:
+        configurable["thread_id"] = thread_id
+    return {"configurable": configurable}
+
+
+def _node_logger(config: RunnableConfig) -> NodeLogger:
+    try:
+        return NodeLogger(config["configurable"]["logger"], (config.get("metadata") or {}).get("langgraph_node", ""))
+    except (KeyError, TypeError) as exc:
+        raise RuntimeError("Graph runs need a logger; pass config=run_config(logger).") from exc
+
 
-def build_graph(logger: InMemoryLogger):
-    mem = MemoryStore()
+def _delta_emitter(config: RunnableConfig, event: str) -> Callable[[str], None] | None:
+    emit = (config.get("configurable") or {}).get("emit")
+    if emit is None:
+        return None
+    return lambda text: emit(event, {"text": text})
 
-    def node_plan(state: GraphState) -> GraphState:
+
+async def query_embedding(config: RunnableConfig, query: str) -> np.ndarray:
+    """The run's query embedding, computed once and reused by memory retrieval and reranking."""
+    memo = config["configurable"].setdefault("memo", {})
+    task = memo.get("query_embedding")
+    if task is None:
+        task = asyncio.ensure_future(get_shared_embedder().aembed_array([query]))
+        memo["query_embedding"] = task
+    return (await task)[0]
+
+
+def _graph_nodes(mem: MemoryStore | None) -> dict[str, Callable]:
+    """Node functions by name; `mem` is only used by the memory nodes."""
+
+    async def node_plan(state: GraphState, config: RunnableConfig) -> GraphState:
+        logger = _node_logger(config)
         q = state["query"]
         logger.log("PlannerAgent: generating plan")
-        plan = run_planner(q)
+        plan = await arun_planner(q)
         logger.log(f"PlannerAgent: plan steps={len(plan)}")
-        state["plan"] = plan
-        state["logs"] = logger.dump()
-        return state
+        return {"plan": plan, "logs": logger.dump()}
 
-    def node_memory_retrieve(state: GraphState) -> GraphState:
+    async def node_memory_retrieve(state: GraphState, config: RunnableConfig) -> GraphState:
+        logger = _node_logger(config)
         q = state["query"]
         logger.log("Memory: retrieving similar past research")
-        ctx = mem.search(q, k=5)
-        state["memory_context"] = ctx
+        q_emb = await query_embedding(config, q)
+        ctx = await mem.asearch(q, k=5, query_embedding=q_emb.tolist())
         logger.log(f"Memory: retrieved items={len(ctx)}")
-        state["logs"] = logger.dump()
-        return state
+        return {"memory_context": ctx, "logs": logger.dump()}
 
-    def node_research(state: GraphState) -> GraphState:
+    async def node_research(state: GraphState, config: RunnableConfig) -> GraphState:
+        logger = _node_logger(config)
         q = state["query"]
-        logger.log("ResearchAgent: running Tavily + arXiv search + fetching pages")
-        web_sources, arxiv_sources = run_research(q)
+        if RESEARCH_MODE == "plan":
+            plan = state.get("plan", [])
+            logger.log(f"ResearchAgent: running plan-driven Tavily + arXiv sub-queries (plan steps={len(plan)})")
+            web_sources, arxiv_sources, searches = await arun_plan_research(q, plan)
+            tool_results = []
+            for search in searches:
+                tool_results.append(
+                    ToolResult(tool="tavily_search", query=search["subquery"], results=search["tavily"]).model_dump()
+                )
+                if search["arxiv"]:
+                    tool_results.append(
+                        ToolResult(tool="arxiv_search", query=search["subquery"], results=search["arxiv"]).model_dump()
+                    )
+            logger.log(f"ResearchAgent: sub-queries={len(searches)}")
+        else:
+            logger.log("ResearchAgent: running Tavily + arXiv search + fetching pages")
+            web_sources, arxiv_sources = await arun_research(q)
+            tool_results = [
+                ToolResult(tool="tavily_search", query=q, results=web_sources).model_dump(),
+                ToolResult(tool="arxiv_search", query=q, results=arxiv_sources).model_dump(),
+            ]
 
         # Build unified sources list for report generator
         sources = []
@@ -73,72 +164,109 @@ def build_graph(logger: InMemoryLogger):
                 "authors": p.get("authors", []),
             })
 
-        state["sources"] = sources
+        logger.log(f"ResearchAgent: sources collected={len(sources)}")
+        return {"sources": sources, "tool_results": tool_results, "logs": logger.dump()}
 
-        state["tool_results"] = [
-            ToolResult(tool="tavily_search", query=q, results=web_sources).model_dump(),
-            ToolResult(tool="arxiv_search", query=q, results=arxiv_sources).model_dump(),
-        ]
+    async def node_rerank(state: GraphState, config: RunnableConfig) -> GraphState:
+        logger = _node_logger(config)
+        sources = state.get("sources", [])
+        logger.log("Rerank: scoring fetched passages against the query")
+        try:
+            q_emb = await query_embedding(config, state["query"])
+            reranked, kept, scored = await rerank_sources(q_emb, sources)
+        except Exception as e:
+            # The summarizer's packer falls back to lexical passage ranking.
+            logger.log(f"Rerank: failed, using lexical ranking: {e}", level="warning")
+            return {"logs": logger.dump()}
+        logger.log(f"Rerank: kept passages={kept} of {scored}")
+        return {"sources": reranked, "logs": logger.dump()}
 
-        logger.log(f"ResearchAgent: sources collected={len(sources)}")
-        state["logs"] = logger.dump()
-        return state
-
-    def node_summarize(state: GraphState) -> GraphState:
-        logger.log("SummarizerAgent: drafting report with citations")
-        draft = run_summarizer(
-            query=state["query"],
-            memory_context=state.get("memory_context", []),
-            sources=state.get("sources", []),
-        )
-        state["draft_report"] = draft
-        llm_meta = getattr(AzureChatLLM, "last_call_meta", {}) or {}
-        if llm_meta:
-            logger.log(
-                "SummarizerAgent: llm finish_reasons="
-                f"{llm_meta.get('finish_reasons', [])}, segments={llm_meta.get('segments', 1)}, "
-                f"continued={llm_meta.get('continued', False)}"
+    async def node_summarize(state: GraphState, config: RunnableConfig) -> GraphState:
+        logger = _node_logger(config)
+        mode = "map-reduce" if uses_map_reduce(state.get("sources", [])) else "single pass"
+        logger.log(f"SummarizerAgent: drafting report with citations ({mode})")
+        with record_llm_calls() as llm_calls:
+            draft = await arun_summarizer(
+                query=state["query"],
+                memory_context=state.get("memory_context", []),
+                sources=state.get("sources", []),
+                on_delta=_delta_emitter(config, "draft_delta"),
             )
+        if llm_calls.calls:
+            logger.log(f"SummarizerAgent: llm {llm_calls.describe()}")
         logger.log(f"SummarizerAgent: draft chars={len((draft or '').strip())}")
         logger.log("SummarizerAgent: draft complete")
-        state["logs"] = logger.dump()
-        return state
+        return {"draft_report": draft, "logs": logger.dump()}
 
-    def node_critic(state: GraphState) -> GraphState:
+    async def node_critic(state: GraphState, config: RunnableConfig) -> GraphState:
+        logger = _node_logger(config)
         draft_report = (state.get("draft_report", "") or "").strip()
         if not draft_report:
             logger.log("CriticAgent: skipped (empty draft)")
-            state["final_report"] = normalize_markdown_report(
+            final_report = normalize_markdown_report(
                 state.get("draft_report", ""),
                 title="ARA Research Report",
             )
-            state["logs"] = logger.dump()
-            return state
-
-        logger.log("CriticAgent: reviewing + improving report")
-        crit = run_critic(draft_report)
-        llm_meta = getattr(AzureChatLLM, "last_call_meta", {}) or {}
-        if llm_meta:
-            logger.log(
-                "CriticAgent: llm finish_reasons="
-                f"{llm_meta.get('finish_reasons', [])}, segments={llm_meta.get('segments', 1)}, "
-                f"continued={llm_meta.get('continued', False)}"
-            )
+            return {"final_report": final_report, "logs": logger.dump()}
+
+        quality = score_draft(draft_report, state.get("sources", []))
+        logger.log(
+            f"CriticAgent: draft quality={quality.score:.2f} (citations={quality.citation_coverage:.2f}, "
+            f"headings={quality.heading_coverage:.2f}, references={quality.reference_consistency:.2f}, "
+            f"length={quality.length:.2f})"
+        )
+        on_delta = _delta_emitter(config, "report_delta")
+        # A decent draft only gets the cheaper per-section review, never a full rewrite; when it
+        # has too few `##` sections for that, it is accepted as is.
+        downgrade = quality.score >= CRITIC_DOWNGRADE_SCORE
+        skip_reason = ""
+        if quality.score >= CRITIC_SKIP_SCORE:
+            skip_reason = f"quality {quality.score:.2f} >= {CRITIC_SKIP_SCORE}"
+        elif downgrade and not uses_section_critic(draft_report, "sections"):
+            skip_reason = f"quality {quality.score:.2f} >= {CRITIC_DOWNGRADE_SCORE}, too few sections for section review"
+        if skip_reason:
+            logger.log(f"CriticAgent: skipped ({skip_reason})", quality=quality.score)
+            final_report = normalize_markdown_report(draft_report, title="ARA Research Report")
+            if on_delta is not None:
+                on_delta(final_report)
+            record_critic("skipped")
+            return {
+                "final_report": final_report,
+                "quality": {**quality.as_dict(), "critic": "skipped"},
+                "logs": logger.dump(),
+            }
+
+        mode = "sections" if downgrade else None
+        if mode:
+            logger.log(f"CriticAgent: downgraded to section review (quality {quality.score:.2f} >= {CRITIC_DOWNGRADE_SCORE})")
+        critic_mode = "sections" if uses_section_critic(draft_report, mode) else "full"
+        if critic_mode == "sections":
+            logger.log("CriticAgent: reviewing report section by section (structured edits)")
+        else:
+            logger.log("CriticAgent: reviewing + improving report")
+        record_critic(critic_mode)
+        with record_llm_calls() as llm_calls:
+            crit = await arun_critic(draft_report, on_delta=on_delta, mode=mode)
+        if llm_calls.calls:
+            logger.log(f"CriticAgent: llm {llm_calls.describe()}")
         logger.log(f"CriticAgent: response chars={len((crit or '').strip())}")
         revised = extract_revised(crit)
         final_report = normalize_markdown_report(revised, title="ARA Research Report")
         if is_placeholder_report(final_report):
-            logger.log("CriticAgent: revised report empty; falling back to summarizer draft")
+            logger.log("CriticAgent: revised report empty; falling back to summarizer draft", level="warning")
             final_report = normalize_markdown_report(draft_report, title="ARA Research Report")
         if is_placeholder_report(final_report):
-            logger.log("CriticAgent: draft also empty; falling back to critic raw output")
+            logger.log("CriticAgent: draft also empty; falling back to critic raw output", level="warning")
             final_report = normalize_markdown_report(crit, title="ARA Research Report")
-        state["final_report"] = final_report
         logger.log("CriticAgent: revision complete")
-        state["logs"] = logger.dump()
-        return state
+        return {
+            "final_report": final_report,
+            "quality": {**quality.as_dict(), "critic": critic_mode},
+            "logs": logger.dump(),
+        }
 
-    def node_memory_store(state: GraphState) -> GraphState:
+    async def node_memory_store(state: GraphState, config: RunnableConfig) -> GraphState:
+        logger = _node_logger(config)
         logger.log("Memory: storing research notes")
         q = state["query"]
         report = state.get("final_report", "")
@@ -154,29 +282,223 @@ def build_graph(logger: InMemoryLogger):
         ids = [make_id("report")]
 
         try:
-            mem.add([note], metas, ids)
+            await mem.aadd([note], metas, ids)
             logger.log("Memory: stored successfully")
         except Exception as e:
-            logger.log(f"Memory: store failed: {e}")
+            logger.log(f"Memory: store failed: {e}", level="warning")
+
+        return {"status": "done", "logs": logger.dump()}
+
+    return {
+        "planner_node": node_plan,
+        "memory_retrieve_node": node_memory_retrieve,
+        "research_node": node_research,
+        "rerank_node": node_rerank,
+        "summarize_node": node_summarize,
+        "critic_node": node_critic,
+        "memory_store_node": node_memory_store,
+    }
+
+
+def _timed(name: str, node: Callable):
+    """Wraps a node so its duration is recorded (Prometheus and the run's timing breakdown)."""
+
+    async def timed_node(state: GraphState, config: RunnableConfig) -> GraphState:
+        started = time.perf_counter()
+        with record_llm_calls() as llm_calls:
+            try:
+                return await node(state, config)
+            finally:
+                observe_node(name, time.perf_counter() - started, llm_calls.summary())
+
+    return timed_node
 
-        state["status"] = "done"
-        state["logs"] = logger.dump()
-        return state
 
+def build_graph(checkpointer: BaseCheckpointSaver | None = None):
+    nodes = _graph_nodes(MemoryStore())
+    if not RERANK_ENABLED:
+        del nodes["rerank_node"]
     g = StateGraph(GraphState)
-    g.add_node("planner_node", node_plan)
-    g.add_node("memory_retrieve_node", node_memory_retrieve)
-    g.add_node("research_node", node_research)
-    g.add_node("summarize_node", node_summarize)
-    g.add_node("critic_node", node_critic)
-    g.add_node("memory_store_node", node_memory_store)
-
-    g.set_entry_point("planner_node")
-    g.add_edge("planner_node", "memory_retrieve_node")
-    g.add_edge("memory_retrieve_node", "research_node")
-    g.add_edge("research_node", "summarize_node")
+    for name, node in nodes.items():
+        g.add_node(name, _timed(name, node))
+
+    # Research output reaches the summarizer through the passage reranker when it is enabled.
+    evidence = "research_node"
+    if RERANK_ENABLED:
+        g.add_edge("research_node", "rerank_node")
+        evidence = "rerank_node"
+
+    # Planning, memory retrieval and research only need the query: fan out from START
+    # and join before the summarizer, which is the first node that needs all three.
+    # In plan mode research searches one sub-query per plan step, so it waits for the planner.
+    if RESEARCH_MODE == "plan":
+        g.add_edge(START, "planner_node")
+        g.add_edge(START, "memory_retrieve_node")
+        g.add_edge("planner_node", "research_node")
+        g.add_edge(["memory_retrieve_node", evidence], "summarize_node")
+    else:
+        for node in ["planner_node", "memory_retrieve_node", "research_node"]:
+            g.add_edge(START, node)
+        g.add_edge(["planner_node", "memory_retrieve_node", evidence], "summarize_node")
     g.add_edge("summarize_node", "critic_node")
     g.add_edge("critic_node", "memory_store_node")
     g.add_edge("memory_store_node", END)
 
-    return g.compile()
+    return g.compile(checkpointer=checkpointer)
+
+
+def build_revision_graph(checkpointer: BaseCheckpointSaver | None = None):
+    """Summarize -> critic only, over the sources and memory context already in the input state."""
+    nodes = _graph_nodes(None)
+    g = StateGraph(GraphState)
+    g.add_node("summarize_node", _timed("summarize_node", nodes["summarize_node"]))
+    g.add_node("critic_node", _timed("critic_node", nodes["critic_node"]))
+    g.add_edge(START, "summarize_node")
+    g.add_edge("summarize_node", "critic_node")
+    g.add_edge("critic_node", END)
+    return g.compile(checkpointer=checkpointer)
+
+
+def get_graph():
+    """Compiled graph shared by every request in this process."""
+    global _GRAPH
+    if _GRAPH is None:
+        _GRAPH = build_graph()
+    return _GRAPH
+
+
+async def get_checkpointer() -> BaseCheckpointSaver | None:
+    """
+    SQLite checkpointer for the running event loop (aiosqlite connections are loop-bound), or
+    None when checkpointing is disabled or langgraph-checkpoint-sqlite is not installed.
+    """
+    global _CHECKPOINT_FAILED
+    if not CHECKPOINT_ENABLED or _CHECKPOINT_FAILED:
+        return None
+    loop = asyncio.get_running_loop()
+    saver = _CHECKPOINTERS.get(loop)
+    if saver is not None:
+        return saver
+    async with _CHECKPOINTER_LOCKS.setdefault(loop, asyncio.Lock()):
+        saver = _CHECKPOINTERS.get(loop)
+        if saver is None and not _CHECKPOINT_FAILED:
+            try:
+                import aiosqlite
+                from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+                os.makedirs(os.path.dirname(os.path.abspath(CHECKPOINT_PATH)), exist_ok=True)
+                saver = AsyncSqliteSaver(aiosqlite.connect(CHECKPOINT_PATH))
+                await saver.setup()
+            except Exception as e:
+                print(f"Checkpointing disabled: {e}")
+                _CHECKPOINT_FAILED = True
+                return None
+            _CHECKPOINTERS[loop] = saver
+    return saver
+
+
+async def aclose_checkpointer() -> None:
+    saver = _CHECKPOINTERS.pop(asyncio.get_running_loop(), None)
+    if saver is not None:
+        await saver.conn.close()
+
+
+async def get_run_graph(kind: str = "research"):
+    """
+    Checkpointed graph for job runs on this event loop; `kind="revise"` is the summarize/critic
+    graph. Falls back to an uncheckpointed graph when checkpointing is unavailable.
+    """
+    checkpointer = await get_checkpointer()
+    if checkpointer is None:
+        return get_graph() if kind == "research" else build_revision_graph()
+    graphs = _RUN_GRAPHS.setdefault(asyncio.get_running_loop(), {})
+    if kind not in graphs:
+        graphs[kind] = build_graph(checkpointer) if kind == "research" else build_revision_graph(checkpointer)
+    return graphs[kind]
+
+
+def _prune_thread_checkpoints(thread_id: str) -> None:
+    conn = sqlite3.connect(CHECKPOINT_PATH, timeout=10, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+            conn.execute(
+                "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_id <> "
+                "(SELECT MAX(checkpoint_id) FROM checkpoints WHERE thread_id = ?)",
+                (thread_id, thread_id),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+
+def _delete_checkpoints(thread_ids: list[str], older_than: float | None, keep: set[str]) -> int:
+    conn = sqlite3.connect(CHECKPOINT_PATH, timeout=10, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            targets = set(thread_ids)
+            if older_than is not None:
+                # Checkpoint ids are uuid6 strings, so they sort by creation time; the leading
+                # 48 bits of the timestamp are enough for a cutoff.
+                uuid_time = int(older_than * 10_000_000) + 0x01B21DD213814000
+                prefix = f"{uuid_time >> 12:012x}"
+                cutoff = f"{prefix[:8]}-{prefix[8:]}"
+                rows = conn.execute(
+                    "SELECT thread_id FROM checkpoints GROUP BY thread_id HAVING MAX(checkpoint_id) < ?",
+                    (cutoff,),
+                )
+                targets.update(row[0] for row in rows)
+            targets -= keep
+            for thread_id in targets:
+                conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+                conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            conn.execute("COMMIT")
+            return len(targets)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+
+async def prune_checkpoints(thread_id: str) -> None:
+    """
+    Drops a finished run's intermediate checkpoints, keeping the final state for revisions.
+
+    The saver has no API for this, so it deletes from the `checkpoints`/`writes` tables of
+    langgraph-checkpoint-sqlite 2.0.x (pinned in requirements.txt; recheck the schema before
+    raising the pin). It uses its own short-lived connection in a worker thread, and SQLite's
+    write lock, instead of the saver's internals; if the schema changes, pruning fails with a
+    log line and runs go on.
+    """
+    if await get_checkpointer() is None:
+        return
+    try:
+        # A plain thread rather than aiosqlite: a cancelled job can't leave the connection open.
+        await asyncio.to_thread(_prune_thread_checkpoints, thread_id)
+    except Exception as e:
+        print(f"Checkpoint prune failed: {e}")
+
+
+async def delete_checkpoints(
+    thread_ids: list[str],
+    older_than: float | None = None,
+    keep: set[str] | None = None,
+) -> int:
+    """
+    Deletes every checkpoint of the given threads and, with `older_than` (a Unix time), of any
+    thread whose latest checkpoint is older, except the threads in `keep`. Returns how many
+    threads were removed. Same schema dependency and fail-soft behaviour as prune_checkpoints.
+    """
+    if await get_checkpointer() is None or not (thread_ids or older_than is not None):
+        return 0
+    try:
+        return await asyncio.to_thread(_delete_checkpoints, thread_ids, older_than, keep or set())
+    except Exception as e:
+        print(f"Checkpoint delete failed: {e}")
+        return 0
@@ -0,0 +1,337 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator
+
+from backend.ara.config import (
+    JOB_MAX_RETAINED,
+    JOB_QUEUE_MAX,
+    JOB_RESULT_CACHE_TTL_SECONDS,
+    JOB_RETENTION_SECONDS,
+    JOB_WORKERS,
+)
+from backend.ara.graph import delete_checkpoints, get_checkpointer, get_run_graph, prune_checkpoints
+from backend.ara.metrics import set_job_counts
+from backend.ara.run_stream import build_initial_state, stream_graph_run
+
+_SHARED_MANAGER = None
+# How often evicted jobs' checkpoints are deleted and old threads swept from the checkpoint DB.
+_SWEEP_INTERVAL_SECONDS = 60.0
+
+
+def normalize_query(query: str) -> str:
+    """Single-flight key: case and whitespace differences do not make a new run."""
+    return " ".join(query.lower().split())
+
+
+class JobQueueFull(Exception):
+    def __init__(self, queue_depth: int, running: int):
+        super().__init__(f"Research queue is full ({queue_depth} waiting, {running} running).")
+        self.queue_depth = queue_depth
+        self.running = running
+
+
+class JobStateError(Exception):
+    """The job exists but cannot do what was asked in its current state."""
+
+
+class ResearchJob:
+    """
+    One background research run and its event log. Events are kept for the job's lifetime so
+    subscribers can join late or resume after a dropped connection; event ids start at 1.
+    `kind="revise"` jobs rerun summarize/critic over another job's sources (`source_id`).
+    The job id is also the run's checkpoint thread id.
+    """
+
+    def __init__(
+        self,
+        query: str,
+        kind: str = "research",
+        job_id: str | None = None,
+        source_id: str | None = None,
+        initial_state: dict[str, Any] | None = None,
+    ):
+        self.kind = kind
+        self.id = job_id or (f"revise-{uuid.uuid4().hex}" if kind == "revise" else uuid.uuid4().hex)
+        self.query = query
+        self.key = normalize_query(query) if kind == "research" else f"{kind}:{source_id}"
+        self.source_id = source_id
+        self.initial_state = initial_state
+        self.resume = False
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.result: dict[str, Any] | None = None
+        self.error = ""
+        self.events: list[tuple[int, str, dict[str, Any]]] = []
+        # Set (and dropped) on every change. Each subscriber waits on the event with its own
+        # waiter, so a cancelled subscriber (a disconnected client) doesn't cancel the others.
+        self._changed: asyncio.Event | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in {"done", "error"}
+
+    def publish(self, event: str, payload: dict[str, Any]) -> None:
+        self.events.append((len(self.events) + 1, event, payload))
+        self._notify()
+
+    def finish(self, status: str, error: str = "") -> None:
+        self.status = status
+        self.error = error
+        self.finished_at = time.time()
+        self._notify()
+
+    def reopen(self) -> None:
+        """
+        Readies a failed job to run again. Its `error` events are rewritten in place as `status`
+        events (same ids), so a client replaying the log doesn't stop at the earlier failure.
+        """
+        self.events = [
+            (event_id, "status", {"phase": "failed", "message": payload.get("message", "")})
+            if event == "error" else (event_id, event, payload)
+            for event_id, event, payload in self.events
+        ]
+        self.status = "queued"
+        self.error = ""
+        self.finished_at = None
+        self.resume = True
+
+    def _notify(self) -> None:
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = None
+
+    async def subscribe(self, after_id: int = 0) -> AsyncIterator[tuple[int, str, dict[str, Any]]]:
+        """Yields (id, event, payload) for events after `after_id`, live until the job finishes."""
+        position = max(after_id, 0)
+        while True:
+            while position < len(self.events):
+                yield self.events[position]
+                position += 1
+            if self.finished:
+                return
+            if self._changed is None:
+                self._changed = asyncio.Event()
+            await self._changed.wait()
+
+    async def wait(self) -> None:
+        async for _ in self.subscribe(len(self.events)):
+            pass
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "source_id": self.source_id,
+            "query": self.query,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "last_event_id": len(self.events),
+        }
+
+
+class JobManager:
+    """
+    Bounded worker pool for research runs; submit() refuses new jobs once the queue is full.
+    Runs are single-flight per normalized query: a query that is already queued or running, or
+    finished successfully within JOB_RESULT_CACHE_TTL_SECONDS, returns the existing job.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, queue_max: int = JOB_QUEUE_MAX):
+        self.workers = max(1, workers)
+        self.queue_max = max(0, queue_max)
+        self.jobs: OrderedDict[str, ResearchJob] = OrderedDict()
+        self.inflight: dict[str, ResearchJob] = {}
+        self.recent: dict[str, ResearchJob] = {}
+        self.running = 0
+        self._queue: asyncio.Queue[ResearchJob] | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._evicted: list[str] = []
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweeper()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def submit(self, query: str) -> tuple[ResearchJob, bool]:
+        """Returns (job, reused); reused jobs may still be running or already done."""
+        self.start()
+        self._prune()
+        existing = self._existing(normalize_query(query))
+        if existing is not None:
+            return existing, True
+        self._admit()
+        job = ResearchJob(query)
+        self._enqueue(job, "Research job queued.")
+        return job, False
+
+    async def resume(self, job_id: str) -> ResearchJob:
+        """
+        Requeues a failed or interrupted run to continue from its last checkpoint. Works for jobs
+        this process no longer knows about (e.g. after a restart) as long as the checkpoint exists.
+        """
+        self.start()
+        job = self.jobs.get(job_id)
+        if job is not None and not job.finished:
+            return job
+        if job is not None and job.status == "done":
+            raise JobStateError("Research job already finished; use revise to rerun summarize/critic.")
+        if await get_checkpointer() is None:
+            raise JobStateError("Checkpointing is disabled; submit the query again instead.")
+
+        kind = job.kind if job is not None else ("revise" if job_id.startswith("revise-") else "research")
+        graph = await get_run_graph(kind)
+        snapshot = await graph.aget_state({"configurable": {"thread_id": job_id}})
+        if not snapshot.values:
+            raise LookupError(job_id)
+        if not snapshot.next:
+            raise JobStateError("Research run already completed.")
+
+        self._admit()
+        if job is None:
+            job = ResearchJob(snapshot.values.get("query", ""), kind=kind, job_id=job_id)
+        job.reopen()
+        self._enqueue(job, f"Resuming before {', '.join(snapshot.next)}.")
+        return job
+
+    async def revise(self, job_id: str) -> tuple[ResearchJob, bool]:
+        """
+        Queues a summarize -> critic rerun over a job's sources and memory context, taken from the
+        finished result or, for failed/unknown jobs, from the run's last checkpoint.
+        """
+        self.start()
+        existing = self.inflight.get(f"revise:{job_id}")
+        if existing is not None:
+            return existing, True
+
+        source = self.jobs.get(job_id)
+        state = source.result if source is not None else None
+        if state is None and await get_checkpointer() is not None:
+            kind = source.kind if source is not None else "research"
+            snapshot = await (await get_run_graph(kind)).aget_state({"configurable": {"thread_id": job_id}})
+            if snapshot.values.get("sources"):
+                state = snapshot.values
+        if not state:
+            raise LookupError(job_id)
+
+        self._admit()
+        initial_state = {**state, "status": "running", "draft_report": "", "final_report": "", "logs": []}
+        job = ResearchJob(state.get("query", ""), kind="revise", source_id=job_id, initial_state=initial_state)
+        self._enqueue(job, "Revision job queued.")
+        return job, False
+
+    def _admit(self) -> None:
+        # Admit while a worker is free or the waiting line has room.
+        if self.running >= self.workers and self.queue_depth >= self.queue_max:
+            raise JobQueueFull(self.queue_depth, self.running)
+
+    def _enqueue(self, job: ResearchJob, message: str) -> None:
+        self.jobs[job.id] = job
+        self.inflight.setdefault(job.key, job)
+        job.publish("status", {"phase": "queued", "message": message, "query": job.query})
+        self._queue.put_nowait(job)
+        set_job_counts(self.queue_depth, self.running)
+
+    def _existing(self, key: str) -> ResearchJob | None:
+        job = self.inflight.get(key)
+        if job is not None:
+            return job
+        job = self.recent.get(key)
+        if job is not None and time.time() - job.finished_at < JOB_RESULT_CACHE_TTL_SECONDS:
+            return job
+        return None
+
+    def get(self, job_id: str) -> ResearchJob | None:
+        return self.jobs.get(job_id)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            self.running += 1
+            set_job_counts(self.queue_depth, self.running)
+            job.status = "running"
+            job.started_at = time.time()
+            job.publish("status", {"phase": "starting", "message": "Research run started.", "query": job.query})
+            try:
+                graph = await get_run_graph(job.kind)
+                if job.resume:
+                    initial_state = None
+                else:
+                    initial_state = job.initial_state or build_initial_state(job.query)
+                job.resume = False
+                job.result = await stream_graph_run(initial_state, job.publish, graph=graph, run_id=job.id)
+                job.finish("done")
+                await prune_checkpoints(job.id)
+            except Exception as exc:
+                error = f"Research run failed: {exc}"
+                job.publish("error", {"message": error})
+                job.finish("error", error)
+            finally:
+                if not job.finished:
+                    job.finish("error", "Research run was cancelled.")
+                if self.inflight.get(job.key) is job:
+                    del self.inflight[job.key]
+                # Failed runs are not reused; the next submit for the query runs it again.
+                if job.status == "done" and job.kind == "research":
+                    self.recent[job.key] = job
+                self.running -= 1
+                self._queue.task_done()
+                set_job_counts(self.queue_depth, self.running)
+
+    async def _sweeper(self) -> None:
+        while True:
+            await asyncio.sleep(_SWEEP_INTERVAL_SECONDS)
+            await self.sweep()
+
+    async def sweep(self) -> None:
+        """
+        Evicts expired jobs and deletes their checkpoints, plus those of threads this process
+        does not know (e.g. from before a restart) whose last checkpoint is older than
+        JOB_RETENTION_SECONDS, so a run's checkpoints live about as long as the job itself.
+        """
+        self._prune()
+        evicted, self._evicted = self._evicted, []
+        await delete_checkpoints(evicted, older_than=time.time() - JOB_RETENTION_SECONDS, keep=set(self.jobs))
+
+    def _prune(self) -> None:
+        now = time.time()
+        for key, job in list(self.recent.items()):
+            if now - job.finished_at >= JOB_RESULT_CACHE_TTL_SECONDS:
+                del self.recent[key]
+        cutoff = now - JOB_RETENTION_SECONDS
+        finished = [job for job in self.jobs.values() if job.finished]
+        excess = len(self.jobs) - JOB_MAX_RETAINED
+        for job in finished:
+            if job.finished_at < cutoff or excess > 0:
+                del self.jobs[job.id]
+                # Otherwise a later submit could reuse a job whose id already 404s.
+                if self.recent.get(job.key) is job:
+                    del self.recent[job.key]
+                self._evicted.append(job.id)
+                excess -= 1
+
+
+def get_job_manager() -> JobManager:
+    """Job manager shared by every request in this process."""
+    global _SHARED_MANAGER
+    if _SHARED_MANAGER is None:
+        _SHARED_MANAGER = JobManager()
+    return _SHARED_MANAGER
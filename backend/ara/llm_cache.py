@@ -0,0 +1,158 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+from backend.ara.config import (
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_TTL_SECONDS,
+    LLM_SEMANTIC_CACHE_ENABLED,
+    LLM_SEMANTIC_CACHE_MAX_ENTRIES,
+    LLM_SEMANTIC_CACHE_THRESHOLD,
+)
+
+_SHARED_CACHE = None
+_SHARED_LOCK = threading.Lock()
+
+
+@dataclass
+class CachedResponse:
+    text: str
+    meta: dict
+    expires_at: float
+
+
+@dataclass
+class _SemanticEntry:
+    namespace: str
+    vector: np.ndarray
+    response: CachedResponse
+
+
+def _digest(obj) -> str:
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _unit(vector: list[float]) -> np.ndarray:
+    arr = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(arr))
+    return arr / norm if norm else arr
+
+
+class ResponseCache:
+    """
+    Two-level in-process cache for chat completions.
+
+    - exact: keyed on a hash of (deployment, messages, sampling params)
+    - semantic: near-duplicate lookup by cosine similarity of the last user message's
+      embedding, scoped to a namespace (everything except that message)
+
+    Both levels are LRU-bounded with a TTL and keep hit/miss counters.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_entries: int,
+        semantic_enabled: bool,
+        semantic_threshold: float,
+        semantic_max_entries: int,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.semantic_enabled = semantic_enabled
+        self.semantic_threshold = semantic_threshold
+        self.semantic_max_entries = semantic_max_entries
+        self._exact: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._semantic: OrderedDict[str, _SemanticEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"exact_hits": 0, "exact_misses": 0, "semantic_hits": 0, "semantic_misses": 0}
+
+    @staticmethod
+    def make_key(deployment: str, messages: list[dict], params: dict) -> str:
+        return _digest({"deployment": deployment, "messages": messages, "params": params})
+
+    @staticmethod
+    def semantic_namespace(deployment: str, messages: list[dict], params: dict) -> str:
+        return _digest({"deployment": deployment, "messages": messages[:-1], "params": params})
+
+    def get(self, key: str) -> CachedResponse | None:
+        now = time.time()
+        with self._lock:
+            entry = self._exact.get(key)
+            if entry is not None and entry.expires_at <= now:
+                del self._exact[key]
+                entry = None
+            if entry is None:
+                self.counters["exact_misses"] += 1
+                return None
+            self._exact.move_to_end(key)
+            self.counters["exact_hits"] += 1
+            return entry
+
+    def put(self, key: str, text: str, meta: dict) -> CachedResponse:
+        entry = CachedResponse(text=text, meta=meta, expires_at=time.time() + self.ttl_seconds)
+        with self._lock:
+            self._exact[key] = entry
+            self._exact.move_to_end(key)
+            while len(self._exact) > self.max_entries:
+                self._exact.popitem(last=False)
+        return entry
+
+    def get_similar(self, namespace: str, vector: list[float]) -> CachedResponse | None:
+        query = _unit(vector)
+        now = time.time()
+        with self._lock:
+            for key in [k for k, e in self._semantic.items() if e.response.expires_at <= now]:
+                del self._semantic[key]
+            candidates = [(k, e) for k, e in self._semantic.items() if e.namespace == namespace]
+            best_key, best_score = None, -1.0
+            if candidates:
+                matrix = np.stack([e.vector for _, e in candidates])
+                scores = matrix @ query
+                idx = int(np.argmax(scores))
+                best_key, best_score = candidates[idx][0], float(scores[idx])
+            if best_key is None or best_score < self.semantic_threshold:
+                self.counters["semantic_misses"] += 1
+                return None
+            self._semantic.move_to_end(best_key)
+            self.counters["semantic_hits"] += 1
+            return self._semantic[best_key].response
+
+    def put_similar(self, key: str, namespace: str, vector: list[float], response: CachedResponse) -> None:
+        with self._lock:
+            self._semantic[key] = _SemanticEntry(namespace=namespace, vector=_unit(vector), response=response)
+            self._semantic.move_to_end(key)
+            while len(self._semantic) > self.semantic_max_entries:
+                self._semantic.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self.counters,
+                "exact_entries": len(self._exact),
+                "semantic_entries": len(self._semantic),
+            }
+
+
+def get_llm_cache() -> ResponseCache | None:
+    """Process-wide response cache, or None unless LLM_CACHE_ENABLED is set."""
+    global _SHARED_CACHE
+    if not LLM_CACHE_ENABLED:
+        return None
+    if _SHARED_CACHE is None:
+        with _SHARED_LOCK:
+            if _SHARED_CACHE is None:
+                _SHARED_CACHE = ResponseCache(
+                    ttl_seconds=LLM_CACHE_TTL_SECONDS,
+                    max_entries=LLM_CACHE_MAX_ENTRIES,
+                    semantic_enabled=LLM_SEMANTIC_CACHE_ENABLED,
+                    semantic_threshold=LLM_SEMANTIC_CACHE_THRESHOLD,
+                    semantic_max_entries=LLM_SEMANTIC_CACHE_MAX_ENTRIES,
+                )
+    return _SHARED_CACHE
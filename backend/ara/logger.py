@@ -1,13 +1,142 @@
-from dataclasses import dataclass, field
+import json
+import threading
 import time
+from collections import deque
+from itertools import islice
+from typing import Any
+
+from backend.ara.config import LOG_BUFFER_SIZE, LOG_JSONL_PATH
+
+_SHARED_SINK = None
+_SINK_FAILED = False
+_SINK_LOCK = threading.Lock()
+
+
+class LogRecord:
+    """One log entry. `ts` is time.monotonic(); wall-clock time is derived only when rendered."""
+
+    __slots__ = ("seq", "ts", "node", "level", "message", "fields")
+
+    def __init__(self, seq: int, ts: float, node: str, level: str, message: str, fields: dict[str, Any] | None):
+        self.seq = seq
+        self.ts = ts
+        self.node = node
+        self.level = level
+        self.message = message
+        self.fields = fields
+
+
+class JsonlSink:
+    """Appends one JSON object per log record to a file, for shipping logs elsewhere."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+        self._lock = threading.Lock()
+
+    def write(self, entry: dict[str, Any]) -> None:
+        line = json.dumps(entry, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def get_log_sink() -> JsonlSink | None:
+    """Process-wide JSON-lines sink, or None when LOG_JSONL_PATH is unset or the file can't be opened."""
+    global _SHARED_SINK, _SINK_FAILED
+    if not LOG_JSONL_PATH or _SINK_FAILED:
+        return None
+    if _SHARED_SINK is None:
+        with _SINK_LOCK:
+            if _SHARED_SINK is None and not _SINK_FAILED:
+                try:
+                    _SHARED_SINK = JsonlSink(LOG_JSONL_PATH)
+                except OSError as e:
+                    print(f"Log sink disabled: {e}")
+                    _SINK_FAILED = True
+    return _SHARED_SINK
+
+
+def append_logs(existing: list[str] | None, new: list[str] | None) -> list[str]:
+    """
+    Reducer for the `logs` list in run state: appends like operator.add but keeps only the last
+    LOG_BUFFER_SIZE lines, the same bound as the run's ring buffer. Full history streams as `log`
+    events (and to LOG_JSONL_PATH).
+    """
+    merged = (existing or []) + (new or [])
+    return merged[-LOG_BUFFER_SIZE:] if len(merged) > LOG_BUFFER_SIZE else merged
+
 
-@dataclass
 class InMemoryLogger:
-    events: list[str] = field(default_factory=list)
+    """
+    Run log kept as records in a ring buffer of `capacity` entries (older ones are dropped).
+    Sequence numbers start at 1 and never repeat, so readers can poll with `since(seq)`.
+    """
+
+    def __init__(self, capacity: int = LOG_BUFFER_SIZE, run_id: str | None = None, sink: JsonlSink | None = None):
+        self.records: deque[LogRecord] = deque(maxlen=max(1, capacity))
+        self.run_id = run_id
+        self.sink = sink if sink is not None else get_log_sink()
+        self.seq = 0
+        # Anchors for turning monotonic timestamps into wall-clock time at render time.
+        self._mono0 = time.monotonic()
+        self._wall0 = time.time()
+
+    def log(self, msg: str, node: str = "", level: str = "info", **fields: Any) -> LogRecord:
+        self.seq += 1
+        record = LogRecord(self.seq, time.monotonic(), node, level, msg, fields or None)
+        self.records.append(record)
+        if self.sink is not None:
+            self.sink.write(self.as_dict(record))
+        return record
+
+    def wall_time(self, record: LogRecord) -> float:
+        return self._wall0 + (record.ts - self._mono0)
+
+    def format(self, record: LogRecord) -> str:
+        ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.wall_time(record)))
+        return f"[{ts}] {record.message}"
+
+    def as_dict(self, record: LogRecord) -> dict[str, Any]:
+        entry = {
+            "seq": record.seq,
+            "time": round(self.wall_time(record), 3),
+            "run_id": self.run_id,
+            "node": record.node,
+            "level": record.level,
+            "message": record.message,
+        }
+        if record.fields:
+            entry["fields"] = record.fields
+        return entry
+
+    def since(self, seq: int) -> list[LogRecord]:
+        """Buffered records with a sequence number above `seq`."""
+        if not self.records or seq >= self.seq:
+            return []
+        # Sequence numbers in the buffer are contiguous, so the cursor maps to an offset.
+        start = max(0, seq - self.records[0].seq + 1)
+        return list(islice(self.records, start, None))
+
+    def dump(self) -> list[str]:
+        return [self.format(r) for r in self.records]
+
+
+class NodeLogger:
+    """Logs to the run's logger and keeps this node's own records, so a node's update carries only what it logged."""
+
+    __slots__ = ("run_logger", "node", "records")
+
+    def __init__(self, run_logger: InMemoryLogger, node: str = ""):
+        self.run_logger = run_logger
+        self.node = node
+        self.records: list[LogRecord] = []
 
-    def log(self, msg: str) -> None:
-        ts = time.strftime("%Y-%m-%d %H:%M:%S")
-        self.events.append(f"[{ts}] {msg}")
+    def log(self, msg: str, level: str = "info", **fields: Any) -> LogRecord:
+        record = self.run_logger.log(msg, node=self.node, level=level, **fields)
+        self.records.append(record)
+        return record
 
     def dump(self) -> list[str]:
-        return list(self.events)
\ No newline at end of file
+        return [self.run_logger.format(r) for r in self.records]
@@ -1,7 +1,10 @@
+import asyncio
 import logging
 import os
+import threading
 import time
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 # Disable Chroma telemetry before importing chromadb to avoid noisy telemetry errors
 # when local dependency versions (e.g., posthog/opentelemetry) are incompatible.
@@ -10,11 +13,12 @@ os.environ.pop("CHROMA_PRODUCT_TELEMETRY_IMPL", None)
 os.environ.pop("CHROMA_TELEMETRY_IMPL", None)
 os.environ.setdefault("ANONYMIZED_TELEMETRY", "FALSE")
 
-import chromadb
-from chromadb.config import Settings
-
 from backend.ara.config import CHROMA_PERSIST_DIR, CHROMA_COLLECTION
-from backend.ara.azure_embeddings import AzureEmbeddings
+from backend.ara.azure_embeddings import get_shared_embedder
+from backend.ara.transport import run_sync
+
+if TYPE_CHECKING:
+    from chromadb.config import Settings
 
 # Suppress telemetry logger noise if Chroma still tries to initialize telemetry.
 for _logger_name in (
@@ -26,7 +30,7 @@ for _logger_name in (
 
 _SHARED_CLIENT = None
 _SHARED_COLLECTION = None
-_SHARED_EMBEDDER = None
+_COLLECTION_LOCK = threading.Lock()
 
 
 def _chroma_path() -> str:
@@ -34,11 +38,16 @@ def _chroma_path() -> str:
     return str(Path(CHROMA_PERSIST_DIR).expanduser().resolve())
 
 
-def _build_settings() -> Settings:
+def _build_settings() -> "Settings":
+    from chromadb.config import Settings
+
     return Settings(anonymized_telemetry=False)
 
 
 def _create_persistent_client():
+    # chromadb takes seconds to import; it is loaded when memory is first used, not at startup.
+    import chromadb
+
     path = _chroma_path()
     settings = _build_settings()
     try:
@@ -64,37 +73,73 @@ def _create_persistent_client():
         return chromadb.PersistentClient(path=path)
 
 
+def _shared_collection():
+    """Imports chromadb and opens the collection on first call; blocking, so async callers run it in a thread."""
+    global _SHARED_CLIENT, _SHARED_COLLECTION
+
+    if _SHARED_COLLECTION is None:
+        with _COLLECTION_LOCK:
+            if _SHARED_CLIENT is None:
+                _SHARED_CLIENT = _create_persistent_client()
+            if _SHARED_COLLECTION is None:
+                _SHARED_COLLECTION = _SHARED_CLIENT.get_or_create_collection(name=CHROMA_COLLECTION)
+    return _SHARED_COLLECTION
+
+
+async def awarm_up_memory() -> None:
+    """Opens the Chroma collection in a worker thread, so the first run doesn't pay for it."""
+    try:
+        await asyncio.to_thread(_shared_collection)
+    except Exception as e:
+        print(f"Chroma warm-up failed: {e}")
+
+
 class MemoryStore:
-    def __init__(self):
-        global _SHARED_CLIENT, _SHARED_COLLECTION, _SHARED_EMBEDDER
+    """Chroma-backed research memory. The client and collection are opened on first use."""
 
-        if _SHARED_CLIENT is None:
-            _SHARED_CLIENT = _create_persistent_client()
-        if _SHARED_COLLECTION is None:
-            _SHARED_COLLECTION = _SHARED_CLIENT.get_or_create_collection(name=CHROMA_COLLECTION)
-        if _SHARED_EMBEDDER is None:
-            _SHARED_EMBEDDER = AzureEmbeddings()
+    @property
+    def collection(self):
+        return _shared_collection()
 
-        self.client = _SHARED_CLIENT
-        self.collection = _SHARED_COLLECTION
-        self.embedder = _SHARED_EMBEDDER
+    @property
+    def embedder(self):
+        return get_shared_embedder()
 
     def add(self, texts: list[str], metadatas: list[dict], ids: list[str]) -> None:
-        embeddings = self.embedder.embed(texts)
-        self.collection.add(
-            ids=ids,
-            documents=texts,
-            metadatas=metadatas,
-            embeddings=embeddings,
+        """Sync entry point for scripts; runs aadd on a new event loop."""
+        run_sync(self.aadd(texts, metadatas, ids))
+
+    async def aadd(self, texts: list[str], metadatas: list[dict], ids: list[str]) -> None:
+        embeddings = await self.embedder.aembed(texts)
+        # Chroma's local client is blocking (SQLite + HNSW on disk), and so is opening it on first
+        # use; resolve the collection inside the worker thread too.
+        await asyncio.to_thread(
+            lambda: self.collection.add(
+                ids=ids,
+                documents=texts,
+                metadatas=metadatas,
+                embeddings=embeddings,
+            )
         )
 
     def search(self, query: str, k: int = 5) -> list[str]:
-        q_emb = self.embedder.embed([query])[0]
-        res = self.collection.query(
-            query_embeddings=[q_emb],
-            n_results=k,
-            include=["documents", "metadatas"],
+        """Sync entry point for scripts; runs asearch on a new event loop."""
+        return run_sync(self.asearch(query, k))
+
+    async def asearch(self, query: str, k: int = 5, query_embedding: list[float] | None = None) -> list[str]:
+        """`query_embedding` lets a run reuse the query vector it already computed."""
+        q_emb = query_embedding if query_embedding is not None else (await self.embedder.aembed([query]))[0]
+        res = await asyncio.to_thread(
+            lambda: self.collection.query(
+                query_embeddings=[q_emb],
+                n_results=k,
+                include=["documents", "metadatas"],
+            )
         )
+        return self._format_results(res)
+
+    @staticmethod
+    def _format_results(res: dict) -> list[str]:
         docs = res.get("documents", [[]])[0]
         metas = res.get("metadatas", [[]])[0]
         out = []
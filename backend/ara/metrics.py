@@ -0,0 +1,217 @@
+import contextvars
+import time
+from collections import Counter, defaultdict
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+from backend.ara.config import METRICS_ENABLED
+
+_METRICS = None
+_METRICS_FAILED = False
+_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+# The RunTimings of the research run executing in the current task, if any. LangGraph runs each
+# node in a task created inside the run's context, so they all see (and add to) the same object.
+_CURRENT_RUN: contextvars.ContextVar["RunTimings | None"] = contextvars.ContextVar("ara_run_timings", default=None)
+
+
+def _prometheus():
+    """Process-wide Prometheus collectors, or None when disabled or prometheus_client is missing."""
+    global _METRICS, _METRICS_FAILED
+    if _METRICS is None and METRICS_ENABLED and not _METRICS_FAILED:
+        try:
+            from prometheus_client import Counter as PCounter, Gauge, Histogram
+        except Exception as e:
+            print(f"Prometheus metrics disabled: {e}")
+            _METRICS_FAILED = True
+            return None
+        _METRICS = SimpleNamespace(
+            node_seconds=Histogram(
+                "ara_node_duration_seconds", "Graph node duration.", ["node"], buckets=_LATENCY_BUCKETS
+            ),
+            llm_seconds=Histogram(
+                "ara_llm_call_duration_seconds", "Chat completion call duration, continuations included.",
+                ["streamed"], buckets=_LATENCY_BUCKETS,
+            ),
+            llm_tokens=PCounter("ara_llm_tokens_total", "Tokens reported in chat completion usage.", ["kind"]),
+            llm_continuations=PCounter("ara_llm_continuations_total", "Continuation requests after finish_reason=length."),
+            llm_finish=PCounter("ara_llm_finish_reasons_total", "Chat completion segments by finish reason.", ["reason"]),
+            embedding_seconds=Histogram(
+                "ara_embedding_request_duration_seconds", "Embedding request duration for cache misses.",
+                buckets=_LATENCY_BUCKETS,
+            ),
+            embedding_texts=PCounter("ara_embedding_texts_total", "Texts sent to the embedding API."),
+            search_seconds=Histogram(
+                "ara_search_duration_seconds", "Search API latency.", ["provider"], buckets=_LATENCY_BUCKETS
+            ),
+            fetch_seconds=Histogram(
+                "ara_fetch_duration_seconds", "Page fetch latency.", ["host"], buckets=_LATENCY_BUCKETS
+            ),
+            cache_lookups=PCounter("ara_cache_lookups_total", "Cache lookups by result.", ["cache", "result"]),
+            critic=PCounter("ara_critic_decisions_total", "Critic mode chosen per run (full/sections/skipped).", ["decision"]),
+            queue_depth=Gauge("ara_job_queue_depth", "Research jobs waiting for a worker."),
+            jobs_running=Gauge("ara_jobs_running", "Research jobs currently running."),
+            runs=PCounter("ara_runs_total", "Finished research runs by status.", ["status"]),
+            run_seconds=Histogram(
+                "ara_run_duration_seconds", "Research run duration.", buckets=_LATENCY_BUCKETS
+            ),
+        )
+    return _METRICS
+
+
+class RunTimings:
+    """Timing breakdown of one research run; returned as `timings` in the run's result."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.nodes: dict[str, float] = {}
+        self.llm = {"calls": 0, "seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0, "continuations": 0}
+        self.finish_reasons: Counter = Counter()
+        self.llm_nodes: dict[str, dict] = {}
+        self.embeddings = {"requests": 0, "texts": 0, "seconds": 0.0}
+        self.search: dict[str, dict] = defaultdict(lambda: {"calls": 0, "seconds": 0.0})
+        self.fetch_hosts: dict[str, dict] = defaultdict(lambda: {"calls": 0, "seconds": 0.0})
+        self.cache: dict[str, Counter] = defaultdict(Counter)
+
+    def as_dict(self) -> dict:
+        fetch_calls = sum(h["calls"] for h in self.fetch_hosts.values())
+        return {
+            "total_seconds": round(time.perf_counter() - self.started, 3),
+            "nodes": {k: round(v, 3) for k, v in self.nodes.items()},
+            "llm": {
+                **{k: round(v, 3) if isinstance(v, float) else v for k, v in self.llm.items()},
+                "finish_reasons": dict(self.finish_reasons),
+                "nodes": self.llm_nodes,
+            },
+            "embeddings": {**self.embeddings, "seconds": round(self.embeddings["seconds"], 3)},
+            "search": {k: {**v, "seconds": round(v["seconds"], 3)} for k, v in self.search.items()},
+            "fetch": {
+                "calls": fetch_calls,
+                "seconds": round(sum(h["seconds"] for h in self.fetch_hosts.values()), 3),
+                "hosts": {k: {**v, "seconds": round(v["seconds"], 3)} for k, v in self.fetch_hosts.items()},
+            },
+            "cache": {k: dict(v) for k, v in self.cache.items()},
+        }
+
+
+def start_run() -> tuple[RunTimings, contextvars.Token]:
+    timings = RunTimings()
+    return timings, _CURRENT_RUN.set(timings)
+
+
+def end_run(token: contextvars.Token) -> None:
+    _CURRENT_RUN.reset(token)
+
+
+def observe_node(node: str, seconds: float, llm: dict | None = None) -> None:
+    """`llm` is the node's LLMCallRecorder summary, kept per node in the run's breakdown."""
+    run = _CURRENT_RUN.get()
+    if run is not None:
+        run.nodes[node] = run.nodes.get(node, 0.0) + seconds
+        if llm and llm.get("calls"):
+            run.llm_nodes[node] = llm
+    m = _prometheus()
+    if m is not None:
+        m.node_seconds.labels(node).observe(seconds)
+
+
+def observe_llm(
+    seconds: float,
+    prompt: int,
+    completion: int,
+    segments: int,
+    finish_reasons: list[str],
+    streamed: bool,
+) -> None:
+    finish_reasons = [fr or "unknown" for fr in finish_reasons]
+    continuations = max(0, segments - 1)
+    run = _CURRENT_RUN.get()
+    if run is not None:
+        run.llm["calls"] += 1
+        run.llm["seconds"] += seconds
+        run.llm["prompt_tokens"] += prompt
+        run.llm["completion_tokens"] += completion
+        run.llm["continuations"] += continuations
+        run.finish_reasons.update(finish_reasons)
+    m = _prometheus()
+    if m is not None:
+        m.llm_seconds.labels(str(streamed).lower()).observe(seconds)
+        m.llm_tokens.labels("prompt").inc(prompt)
+        m.llm_tokens.labels("completion").inc(completion)
+        m.llm_continuations.inc(continuations)
+        for reason in finish_reasons:
+            m.llm_finish.labels(reason).inc()
+
+
+def observe_embedding(seconds: float, texts: int) -> None:
+    run = _CURRENT_RUN.get()
+    if run is not None:
+        run.embeddings["requests"] += 1
+        run.embeddings["texts"] += texts
+        run.embeddings["seconds"] += seconds
+    m = _prometheus()
+    if m is not None:
+        m.embedding_seconds.observe(seconds)
+        m.embedding_texts.inc(texts)
+
+
+def observe_search(provider: str, seconds: float) -> None:
+    run = _CURRENT_RUN.get()
+    if run is not None:
+        run.search[provider]["calls"] += 1
+        run.search[provider]["seconds"] += seconds
+    m = _prometheus()
+    if m is not None:
+        m.search_seconds.labels(provider).observe(seconds)
+
+
+def observe_fetch(url: str, seconds: float) -> None:
+    host = urlsplit(url).hostname or "unknown"
+    run = _CURRENT_RUN.get()
+    if run is not None:
+        run.fetch_hosts[host]["calls"] += 1
+        run.fetch_hosts[host]["seconds"] += seconds
+    m = _prometheus()
+    if m is not None:
+        m.fetch_seconds.labels(host).observe(seconds)
+
+
+def record_cache(cache: str, result: str, count: int = 1) -> None:
+    """`result` is "hit", "miss", or a cache-specific outcome such as "revalidated" or "semantic"."""
+    if count <= 0:
+        return
+    run = _CURRENT_RUN.get()
+    if run is not None:
+        run.cache[cache][result] += count
+    m = _prometheus()
+    if m is not None:
+        m.cache_lookups.labels(cache, result).inc(count)
+
+
+def record_critic(decision: str) -> None:
+    m = _prometheus()
+    if m is not None:
+        m.critic.labels(decision).inc()
+
+
+def record_run(status: str, seconds: float) -> None:
+    m = _prometheus()
+    if m is not None:
+        m.runs.labels(status).inc()
+        m.run_seconds.observe(seconds)
+
+
+def set_job_counts(queue_depth: int, running: int) -> None:
+    m = _prometheus()
+    if m is not None:
+        m.queue_depth.set(queue_depth)
+        m.jobs_running.set(running)
+
+
+def render_metrics() -> tuple[bytes, str] | None:
+    """(body, content type) in Prometheus text format, or None when metrics are unavailable."""
+    if _prometheus() is None:
+        return None
+    from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+    return generate_latest(), CONTENT_TYPE_LATEST
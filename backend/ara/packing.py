@@ -0,0 +1,198 @@
+import asyncio
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+
+from backend.ara.config import TOKENIZER_ENCODING
+
+_ENCODING = None
+_ENCODING_FAILED = False
+_ENCODING_LOCK = threading.Lock()
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "the", "and", "for", "with", "from", "that", "this", "are", "was", "were", "into", "about",
+    "what", "which", "how", "why", "include", "including", "research", "sources", "key",
+}
+
+
+def _encoding():
+    """
+    tiktoken encoding, or None when tiktoken or its encoding file is unavailable. The first load
+    may download the BPE file (unless TIKTOKEN_CACHE_DIR has it); while another thread is
+    loading it, callers get None (the chars/4 estimate) instead of blocking.
+    """
+    global _ENCODING, _ENCODING_FAILED
+    if _ENCODING is None and not _ENCODING_FAILED and _ENCODING_LOCK.acquire(blocking=False):
+        try:
+            if _ENCODING is None and not _ENCODING_FAILED:
+                import tiktoken
+
+                _ENCODING = tiktoken.get_encoding(TOKENIZER_ENCODING)
+        except Exception as e:
+            print(f"Tokenizer unavailable, estimating tokens as chars/4: {e}")
+            _ENCODING_FAILED = True
+        finally:
+            _ENCODING_LOCK.release()
+    return _ENCODING
+
+
+async def awarm_up_tokenizer() -> None:
+    """Loads the encoding in a worker thread, so a download never runs on the event loop."""
+    await asyncio.to_thread(_encoding)
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    enc = _encoding()
+    if enc is None:
+        return (len(text) + 3) // 4
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    if max_tokens <= 0:
+        return ""
+    enc = _encoding()
+    if enc is None:
+        return text[: max_tokens * 4]
+    tokens = enc.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else enc.decode(tokens[:max_tokens])
+
+
+def split_passages(text: str, max_chars: int = 600) -> list[str]:
+    """Splits page text into passages of up to `max_chars`, on paragraph then sentence boundaries."""
+    passages: list[str] = []
+    current = ""
+    for block in re.split(r"\n\s*\n|\n", text or ""):
+        block = " ".join(block.split())
+        if not block:
+            continue
+        pieces = [block] if len(block) <= max_chars else re.split(r"(?<=[.!?])\s+", block)
+        for piece in pieces:
+            while len(piece) > max_chars:
+                passages.append(piece[:max_chars])
+                piece = piece[max_chars:]
+            if current and len(current) + 1 + len(piece) > max_chars:
+                passages.append(current)
+                current = ""
+            current = f"{current} {piece}".strip()
+    if current:
+        passages.append(current)
+    return passages
+
+
+def _terms(text: str) -> list[str]:
+    return [w for w in _WORD.findall(text.lower()) if len(w) > 2 and w not in _STOPWORDS]
+
+
+def lexical_scores(query: str, passages: list[str], k1: float = 1.2, b: float = 0.75) -> list[float]:
+    """BM25 scores of each passage against the query, with IDF taken over `passages`."""
+    query_terms = set(_terms(query))
+    docs = [Counter(_terms(p)) for p in passages]
+    if not query_terms or not docs:
+        return [0.0] * len(passages)
+    avg_len = sum(sum(d.values()) for d in docs) / len(docs) or 1.0
+    df = Counter(t for d in docs for t in query_terms if t in d)
+    scores = []
+    for d in docs:
+        length = sum(d.values())
+        score = 0.0
+        for t in query_terms:
+            tf = d.get(t, 0)
+            if tf:
+                idf = math.log(1 + (len(docs) - df[t] + 0.5) / (df[t] + 0.5))
+                score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_len))
+        scores.append(score)
+    return scores
+
+
+@dataclass
+class PackedSources:
+    text: str
+    tokens: int
+    sources: int
+    passages: int
+
+
+def pack_sources(
+    query: str,
+    sources: list[dict],
+    token_budget: int,
+    snippet_tokens: int = 80,
+    max_sources: int = 20,
+    first_number: int = 1,
+) -> PackedSources:
+    """
+    Formats sources for a prompt within `token_budget` tokens. Every kept source gets its title,
+    URL and snippet; the remaining budget goes to the most query-relevant passages of the fetched
+    content, whichever source they come from (passages with no relevance only stand in for a
+    source that has nothing better). Sources keep their [n] position in `sources`, so
+    citations line up with the run's source list (`first_number` offsets them when packing a
+    slice of that list). Sources that carry pre-scored `passages`
+    ({"text", "score"}) use those; otherwise content is split and scored lexically here.
+    """
+    candidates = list(enumerate(sources[:max_sources], first_number))
+    headers: dict[int, str] = {}
+    for n, s in candidates:
+        title = (s.get("title") or "")[:160]
+        snippet = truncate_tokens(s.get("snippet") or "", snippet_tokens)
+        headers[n] = f"[{n}] {title}\nURL: {s.get('url', '')}\nSnippet: {snippet}\n"
+
+    # (score, source number, passage index, text)
+    scored: list[tuple[float, int, int, str]] = []
+    unscored: list[tuple[int, int, str]] = []
+    for n, s in candidates:
+        if s.get("passages"):
+            for i, p in enumerate(s["passages"]):
+                scored.append((float(p.get("score", 0.0)), n, i, p.get("text", "")))
+        else:
+            unscored.extend((n, i, text) for i, text in enumerate(split_passages(s.get("content") or "")))
+    lexical = lexical_scores(query, [text for _, _, text in unscored])
+    scored.extend((score, n, i, text) for score, (n, i, text) in zip(lexical, unscored))
+    # Best passage first; ties go to earlier sources and earlier passages on the page.
+    scored.sort(key=lambda p: (-p[0], p[1], p[2]))
+
+    # Keep sources in relevance order of their best passage if the headers alone overflow.
+    best = {}
+    for score, n, _, _ in scored:
+        best.setdefault(n, score)
+    order = sorted(headers, key=lambda n: (-best.get(n, 0.0), n))
+    kept: list[int] = []
+    used = 0
+    for n in order:
+        cost = count_tokens(headers[n])
+        if used + cost > token_budget:
+            break
+        kept.append(n)
+        used += cost
+
+    kept_set = set(kept)
+    chosen: dict[int, list[tuple[int, str]]] = {n: [] for n in kept}
+    passages = 0
+    for score, n, i, text in scored:
+        if n not in kept_set or score <= 0:
+            continue
+        cost = count_tokens(text) + 1
+        if used + cost > token_budget:
+            continue
+        chosen[n].append((i, text))
+        used += cost
+        passages += 1
+    # Sources with no matching passage still get their opening passage if it fits.
+    for score, n, i, text in sorted(scored, key=lambda p: (p[1], p[2])):
+        if n not in kept_set or chosen[n] or score > 0:
+            continue
+        cost = count_tokens(text) + 1
+        if used + cost <= token_budget:
+            chosen[n].append((i, text))
+            used += cost
+            passages += 1
+
+    blocks = []
+    for n in sorted(kept):
+        extract = "\n".join(text for _, text in sorted(chosen[n]))
+        blocks.append(f"{headers[n]}Extract: {extract}\n")
+    return PackedSources(text="\n".join(blocks), tokens=used, sources=len(kept), passages=passages)
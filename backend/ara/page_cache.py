@@ -0,0 +1,157 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from backend.ara.config import (
+    PAGE_CACHE_ENABLED,
+    PAGE_CACHE_MAX_BYTES,
+    PAGE_CACHE_PATH,
+    PAGE_CACHE_TTL_SECONDS,
+)
+from backend.ara.sqlite_store import ThreadLocalSQLite
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    text TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at);
+-- Total text size kept by triggers, so checking the byte budget doesn't scan the table.
+CREATE TABLE IF NOT EXISTS pages_stats (id INTEGER PRIMARY KEY CHECK (id = 1), total_bytes INTEGER NOT NULL);
+INSERT OR IGNORE INTO pages_stats (id, total_bytes)
+    SELECT 1, COALESCE(SUM(size), 0) FROM pages WHERE NOT EXISTS (SELECT 1 FROM pages_stats);
+CREATE TRIGGER IF NOT EXISTS pages_size_insert AFTER INSERT ON pages
+    BEGIN UPDATE pages_stats SET total_bytes = total_bytes + NEW.size WHERE id = 1; END;
+CREATE TRIGGER IF NOT EXISTS pages_size_update AFTER UPDATE OF size ON pages
+    BEGIN UPDATE pages_stats SET total_bytes = total_bytes + NEW.size - OLD.size WHERE id = 1; END;
+CREATE TRIGGER IF NOT EXISTS pages_size_delete AFTER DELETE ON pages
+    BEGIN UPDATE pages_stats SET total_bytes = total_bytes - OLD.size WHERE id = 1; END;
+"""
+
+# Evict down to this fraction of the byte budget so eviction doesn't run on every insert.
+_EVICT_TARGET_RATIO = 0.9
+
+_SHARED_CACHE = None
+_SHARED_CACHE_FAILED = False
+_SHARED_LOCK = threading.Lock()
+
+
+@dataclass
+class CachedPage:
+    url: str
+    text: str
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float
+
+    def is_fresh(self, ttl_seconds: float) -> bool:
+        return time.time() - self.fetched_at < ttl_seconds
+
+    def validators(self) -> dict[str, str]:
+        """Conditional GET headers for revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def page_key(canonical: str) -> str:
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class PageCache:
+    """
+    On-disk cache of cleaned page text keyed by canonical URL, with TTL freshness,
+    ETag/Last-Modified validators and size-bounded LRU eviction.
+
+    Safe to share across threads and worker processes (see ThreadLocalSQLite).
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_bytes: int):
+        self.db = ThreadLocalSQLite(path, _SCHEMA)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+    def get(self, canonical: str) -> CachedPage | None:
+        key = page_key(canonical)
+        conn = self.db.conn()
+        row = conn.execute(
+            "SELECT url, text, etag, last_modified, fetched_at FROM pages WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE pages SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return CachedPage(*row)
+
+    def put(self, canonical: str, text: str, etag: str | None, last_modified: str | None) -> None:
+        now = time.time()
+        conn = self.db.conn()
+        # The insert and the budget check share one write transaction, so concurrent writers
+        # (threads or processes) see each other's totals.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # An upsert rather than INSERT OR REPLACE, whose implicit delete would skip the size trigger.
+            conn.execute(
+                "INSERT INTO pages (key, url, text, etag, last_modified, fetched_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                "url = excluded.url, text = excluded.text, etag = excluded.etag, "
+                "last_modified = excluded.last_modified, fetched_at = excluded.fetched_at, "
+                "accessed_at = excluded.accessed_at, size = excluded.size",
+                (page_key(canonical), canonical, text, etag, last_modified, now, now, len(text.encode("utf-8"))),
+            )
+            self._evict(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def mark_revalidated(self, canonical: str, etag: str | None, last_modified: str | None) -> None:
+        """A 304 came back: the stored text is still current, restart its TTL."""
+        now = time.time()
+        self.db.conn().execute(
+            "UPDATE pages SET fetched_at = ?, accessed_at = ?, "
+            "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE key = ?",
+            (now, now, etag, last_modified, page_key(canonical)),
+        )
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Runs inside put()'s transaction."""
+        total = conn.execute("SELECT total_bytes FROM pages_stats WHERE id = 1").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * _EVICT_TARGET_RATIO)
+        doomed = []
+        # Walk the accessed_at index only as far as needed instead of loading every row.
+        for key, size in conn.execute("SELECT key, size FROM pages ORDER BY accessed_at ASC"):
+            if total <= target:
+                break
+            doomed.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM pages WHERE key = ?", doomed)
+
+
+def get_page_cache() -> PageCache | None:
+    """Process-wide page cache, or None when PAGE_CACHE_ENABLED is off or the file can't be opened."""
+    global _SHARED_CACHE, _SHARED_CACHE_FAILED
+    if not PAGE_CACHE_ENABLED or _SHARED_CACHE_FAILED:
+        return None
+    if _SHARED_CACHE is None:
+        with _SHARED_LOCK:
+            if _SHARED_CACHE is None and not _SHARED_CACHE_FAILED:
+                try:
+                    _SHARED_CACHE = PageCache(PAGE_CACHE_PATH, PAGE_CACHE_TTL_SECONDS, PAGE_CACHE_MAX_BYTES)
+                except (OSError, sqlite3.Error) as e:
+                    print(f"Page cache disabled: {e}")
+                    _SHARED_CACHE_FAILED = True
+    return _SHARED_CACHE
@@ -0,0 +1,116 @@
+import re
+from dataclasses import asdict, dataclass, field
+
+from backend.ara.config import QUALITY_MIN_WORDS
+
+REQUIRED_HEADINGS = (
+    "executive summary",
+    "key findings",
+    "risks",
+    "recommendations",
+    "references",
+)
+
+_HEADING = re.compile(r"^(#{1,6})\s*(.+?)\s*$", re.M)
+_CITATION = re.compile(r"\[(\d{1,3})\]")
+_URL = re.compile(r"https?://[^\s)\]>]+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\[\"(])")
+# Sentences that describe the report itself rather than state facts.
+_NON_FACTUAL = re.compile(
+    r"^(this report|the report|see |refer to|note:|further research|more research|it is recommended)",
+    re.I,
+)
+
+
+@dataclass
+class QualityScore:
+    score: float
+    citation_coverage: float
+    heading_coverage: float
+    reference_consistency: float
+    length: float
+    factual_sentences: int
+    words: int
+    issues: list[str] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return {k: round(v, 3) if isinstance(v, float) else v for k, v in asdict(self).items()}
+
+
+def _split_references(draft: str) -> tuple[str, str]:
+    """(body, references section) split at the `## References` heading."""
+    m = re.search(r"^#{1,3}\s*references?\b.*$", draft, re.I | re.M)
+    if not m:
+        return draft, ""
+    return draft[: m.start()], draft[m.end():]
+
+
+def _factual_sentences(body: str) -> list[str]:
+    sentences = []
+    for line in body.splitlines():
+        line = line.strip().lstrip("-*> ").strip()
+        if not line or line.startswith("#") or line.startswith("|"):
+            continue
+        for sentence in _SENTENCE_END.split(line):
+            if len(sentence.split()) >= 8 and not _NON_FACTUAL.match(sentence):
+                sentences.append(sentence)
+    return sentences
+
+
+def _normalize_url(url: str) -> str:
+    return url.strip().rstrip(".,;/").lower().replace("://www.", "://")
+
+
+def score_draft(draft: str, sources: list[dict]) -> QualityScore:
+    """
+    Cheap, local quality estimate of a summarizer draft, in [0, 1]: share of factual sentences
+    carrying an [n] citation, required headings present, citations and reference URLs that match
+    the run's sources, and length.
+    """
+    issues: list[str] = []
+    body, references = _split_references(draft or "")
+
+    sentences = _factual_sentences(body)
+    cited = sum(1 for s in sentences if _CITATION.search(s))
+    citation_coverage = cited / len(sentences) if sentences else 0.0
+    if sentences and citation_coverage < 1.0:
+        issues.append(f"{len(sentences) - cited} of {len(sentences)} factual sentences lack a citation")
+
+    headings = {m.group(2).lower() for m in _HEADING.finditer(draft or "")}
+    missing = [h for h in REQUIRED_HEADINGS if not any(found.startswith(h) for found in headings)]
+    heading_coverage = 1 - len(missing) / len(REQUIRED_HEADINGS)
+    if missing:
+        issues.append(f"missing headings: {', '.join(missing)}")
+
+    # Every cited number must exist among the sources, and listed reference URLs must be ones the
+    # run actually fetched (a hallucinated or renumbered reference list fails here).
+    numbers = {int(n) for n in _CITATION.findall(body)}
+    bad_numbers = sorted(n for n in numbers if not 1 <= n <= len(sources))
+    source_urls = {_normalize_url(s.get("url") or "") for s in sources if s.get("url")}
+    ref_urls = [_normalize_url(u) for u in _URL.findall(references)]
+    unknown_urls = [u for u in ref_urls if u not in source_urls]
+    checks = len(numbers) + len(ref_urls)
+    reference_consistency = 1 - (len(bad_numbers) + len(unknown_urls)) / checks if checks else 0.0
+    if bad_numbers:
+        issues.append(f"citations with no matching source: {bad_numbers[:10]}")
+    if unknown_urls:
+        issues.append(f"{len(unknown_urls)} reference URLs not among the run's sources")
+    if not references.strip():
+        issues.append("no references section")
+
+    words = len((draft or "").split())
+    length = min(1.0, words / QUALITY_MIN_WORDS) if QUALITY_MIN_WORDS > 0 else 1.0
+    if length < 1.0:
+        issues.append(f"short draft ({words} words)")
+
+    score = 0.4 * citation_coverage + 0.2 * heading_coverage + 0.3 * reference_consistency + 0.1 * length
+    return QualityScore(
+        score=score,
+        citation_coverage=citation_coverage,
+        heading_coverage=heading_coverage,
+        reference_consistency=reference_consistency,
+        length=length,
+        factual_sentences=len(sentences),
+        words=words,
+        issues=issues,
+    )
@@ -0,0 +1,46 @@
+import asyncio
+import heapq
+import time
+
+
+class AsyncRateLimiter:
+    """
+    Spaces out calls to an upstream provider to at most one per `interval` seconds.
+
+    Each caller reserves the next free slot and sleeps until it, so concurrent callers
+    queue up without a lock (the reservation happens before the first await). Slots are
+    tracked with time.monotonic(), so one limiter can be shared across event loops.
+    A caller cancelled while waiting hands its slot back for the next caller to reuse.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = max(0.0, interval)
+        self._next_slot = 0.0
+        self._released: list[float] = []
+
+    def _reserve(self, now: float) -> float:
+        while self._released:
+            slot = heapq.heappop(self._released)
+            if slot >= now:
+                return slot
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        return slot
+
+    def _release(self, slot: float) -> None:
+        if slot + self.interval == self._next_slot:
+            self._next_slot = slot
+        else:
+            heapq.heappush(self._released, slot)
+
+    async def acquire(self) -> None:
+        if self.interval <= 0:
+            return
+        now = time.monotonic()
+        slot = self._reserve(now)
+        if slot > now:
+            try:
+                await asyncio.sleep(slot - now)
+            except asyncio.CancelledError:
+                self._release(slot)
+                raise
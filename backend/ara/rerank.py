@@ -0,0 +1,58 @@
+import numpy as np
+
+from backend.ara.azure_embeddings import get_shared_embedder
+from backend.ara.config import (
+    RERANK_MAX_PASSAGES_PER_SOURCE,
+    RERANK_PASSAGE_CHARS,
+    RERANK_TOP_K_GLOBAL,
+    RERANK_TOP_K_PER_SOURCE,
+)
+from backend.ara.packing import split_passages
+
+
+def cosine_scores(matrix: np.ndarray, query_vec: np.ndarray) -> np.ndarray:
+    """Cosine similarity of each row of `matrix` to `query_vec`."""
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_vec)
+    return (matrix @ query_vec) / np.maximum(norms, 1e-12)
+
+
+async def rerank_sources(
+    query_vec: np.ndarray,
+    sources: list[dict],
+    per_source_k: int = RERANK_TOP_K_PER_SOURCE,
+    global_k: int = RERANK_TOP_K_GLOBAL,
+) -> tuple[list[dict], int, int]:
+    """
+    Splits each source's fetched content into passages, embeds them (cached, micro-batched) and
+    scores them against the query. A passage is kept if it is among its source's top
+    `per_source_k` and the top `global_k` overall; each source with content keeps at least its
+    best passage. Returns (sources with `passages` [{"text", "score"}] in page order,
+    passages kept, passages scored).
+    """
+    owners: list[int] = []
+    texts: list[str] = []
+    for idx, s in enumerate(sources):
+        for text in split_passages(s.get("content") or "", RERANK_PASSAGE_CHARS)[:RERANK_MAX_PASSAGES_PER_SOURCE]:
+            owners.append(idx)
+            texts.append(text)
+    if not texts:
+        return sources, 0, 0
+
+    scores = cosine_scores(await get_shared_embedder().aembed_array(texts), np.asarray(query_vec, dtype=np.float32))
+    owner_arr = np.asarray(owners)
+
+    candidates: list[int] = []
+    best: list[int] = []
+    for idx in np.unique(owner_arr):
+        members = np.flatnonzero(owner_arr == idx)
+        ranked = members[np.argsort(-scores[members])]
+        candidates.extend(ranked[:per_source_k].tolist())
+        best.append(int(ranked[0]))
+    candidates.sort(key=lambda i: -scores[i])
+    keep = set(candidates[:global_k]) | set(best)
+
+    passages: dict[int, list[dict]] = {}
+    for i in sorted(keep):
+        passages.setdefault(owners[i], []).append({"text": texts[i], "score": round(float(scores[i]), 4)})
+    reranked = [{**s, "passages": passages[idx]} if idx in passages else s for idx, s in enumerate(sources)]
+    return reranked, len(keep), len(texts)
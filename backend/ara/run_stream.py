@@ -0,0 +1,155 @@
+import time
+from typing import Any, Callable
+
+from backend.ara.graph import get_graph, run_config
+from backend.ara.logger import InMemoryLogger, append_logs
+from backend.ara.metrics import end_run, record_run, start_run
+from backend.ara.schemas import ResearchState
+
+# publish(event, payload): receives raw run events; ara/sse.py turns them into frames per client.
+Publish = Callable[[str, dict[str, Any]], None]
+
+NODE_LABELS = {
+    "planner_node": "Planning",
+    "memory_retrieve_node": "Retrieving Memory",
+    "research_node": "Researching Sources",
+    "rerank_node": "Ranking Evidence",
+    "summarize_node": "Generating Draft",
+    "critic_node": "Revising Report",
+    "memory_store_node": "Storing Memory",
+}
+
+
+def build_initial_state(query: str) -> dict[str, Any]:
+    return ResearchState(
+        query=query,
+        status="running",
+        created_at=time.time(),
+        logs=[],
+        plan=[],
+        tool_results=[],
+        sources=[],
+        memory_context=[],
+        draft_report="",
+        final_report="",
+    ).model_dump()
+
+
+async def stream_graph_run(
+    initial_state: dict[str, Any] | None,
+    publish: Publish,
+    graph=None,
+    run_id: str | None = None,
+) -> dict[str, Any]:
+    """
+    Runs the graph once, publishing progress/plan/source/log events, token deltas and finally
+    `result` (full state plus a `timings` breakdown of this run) and `done`. Returns the final state; exceptions propagate to the caller,
+    which reports them.
+
+    On a checkpointed graph, `run_id` is the checkpoint thread and `initial_state=None` resumes
+    that thread from its last completed node.
+    """
+    graph = graph or get_graph()
+    logger = InMemoryLogger(run_id=run_id)
+    config = run_config(logger, emit=publish, thread_id=run_id)
+    log_cursor = 0
+    if initial_state is None:
+        latest_state = dict((await graph.aget_state(config)).values)
+    else:
+        latest_state = dict(initial_state)
+
+    def progress(node_name: str, status: str) -> None:
+        logs = latest_state.get("logs", [])
+        publish(
+            "progress",
+            {
+                "node": node_name,
+                "label": NODE_LABELS.get(node_name, node_name),
+                "status": status,
+                "plan_count": len(latest_state.get("plan", [])),
+                "source_count": len(latest_state.get("sources", [])),
+                "last_log": logs[-1] if logs else "",
+            },
+        )
+
+    def publish_logs(cursor: int) -> int:
+        for record in logger.since(cursor):
+            publish(
+                "log",
+                {"text": logger.format(record), "seq": record.seq, "node": record.node, "level": record.level},
+            )
+            cursor = record.seq
+        return cursor
+
+    timings, token = start_run()
+    status = "error"
+    try:
+        # "debug" task events mark node starts; planner/memory/research run concurrently,
+        # so the client cannot infer the active node from completion order alone.
+        async for mode, update in graph.astream(
+            initial_state,
+            config=config,
+            stream_mode=["updates", "debug"],
+        ):
+            if mode == "debug":
+                if update.get("type") == "task":
+                    progress(update["payload"]["name"], "running")
+                continue
+
+            for node_name, node_update in update.items():
+                if isinstance(node_update, dict):
+                    # Node updates carry only their new log lines; accumulate them here.
+                    new_logs = node_update.get("logs")
+                    latest_state.update({k: v for k, v in node_update.items() if k != "logs"})
+                    if isinstance(new_logs, list):
+                        latest_state["logs"] = append_logs(latest_state.get("logs"), new_logs)
+
+                    if "plan" in node_update and isinstance(node_update["plan"], list):
+                        plan = node_update["plan"]
+                        publish(
+                            "plan",
+                            {
+                                "items": [
+                                    {"index": idx, "text": str(step), "total": len(plan)}
+                                    for idx, step in enumerate(plan, start=1)
+                                ]
+                            },
+                        )
+
+                    if "sources" in node_update and isinstance(node_update["sources"], list):
+                        sources = node_update["sources"]
+                        publish(
+                            "source",
+                            {
+                                "items": [
+                                    {
+                                        "index": idx,
+                                        "total": len(sources),
+                                        "title": source.get("title", ""),
+                                        "url": source.get("url", ""),
+                                        "snippet": source.get("snippet", ""),
+                                        "type": source.get("type", "web"),
+                                    }
+                                    for idx, source in enumerate(sources, start=1)
+                                    if isinstance(source, dict)
+                                ]
+                            },
+                        )
+
+                # Includes lines from nodes still running concurrently, not only this update's.
+                log_cursor = publish_logs(log_cursor)
+
+                progress(node_name, "completed")
+
+        status = "done"
+    finally:
+        # Lines a failing node logged before raising still reach the client.
+        publish_logs(log_cursor)
+        end_run(token)
+        record_run(status, timings.as_dict()["total_seconds"])
+
+    latest_state["status"] = "done"
+    latest_state["timings"] = timings.as_dict()
+    publish("result", latest_state)
+    publish("done", {"ok": True})
+    return latest_state
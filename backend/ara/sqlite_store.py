@@ -0,0 +1,25 @@
+import sqlite3
+import threading
+from pathlib import Path
+
+
+class ThreadLocalSQLite:
+    """
+    A SQLite file opened once per thread in WAL mode, so several threads and several
+    worker processes can read and write the same cache file concurrently.
+    """
+
+    def __init__(self, path: str, schema: str):
+        self.path = str(Path(path).expanduser().resolve())
+        self._local = threading.local()
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn().executescript(schema)
+
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
@@ -0,0 +1,54 @@
+import json
+import zlib
+from typing import Any, AsyncIterator
+
+# Raw run events whose payload is {"items": [...]}; sent one frame per item unless batching.
+ITEM_EVENTS = {"plan", "source"}
+
+
+def format_event(event: str, payload: dict[str, Any], event_id: int | None = None) -> str:
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+def slim_result(state: dict[str, Any]) -> dict[str, Any]:
+    """Final state without fetched page text, reranked passages or the raw tool results the sources were built from."""
+    slim = {k: v for k, v in state.items() if k != "tool_results"}
+    slim["sources"] = [
+        {k: v for k, v in source.items() if k not in {"content", "passages"}} if isinstance(source, dict) else source
+        for source in state.get("sources", [])
+    ]
+    return slim
+
+
+class SSEWriter:
+    """
+    Frames raw run events for one client. With `batch=True`, list-shaped events (plan steps,
+    sources) are coalesced into one `<event>_batch` frame instead of one frame per item;
+    pacing their display is left to the client. Unless `full=True`, the `result` event is
+    slimmed (see slim_result).
+    """
+
+    def __init__(self, batch: bool = False, full: bool = False):
+        self.batch = batch
+        self.full = full
+
+    def render(self, event: str, payload: dict[str, Any], event_id: int | None = None) -> list[str]:
+        if event in ITEM_EVENTS:
+            items = payload.get("items", [])
+            if not items:
+                return []
+            if self.batch:
+                return [format_event(f"{event}_batch", {"items": items, "total": len(items)}, event_id)]
+            return [format_event(event, item, event_id) for item in items]
+        if event == "result" and not self.full:
+            payload = slim_result(payload)
+        return [format_event(event, payload, event_id)]
+
+
+async def gzip_stream(frames: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """Gzip-encodes a frame stream, sync-flushing after each frame so events are not held back."""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    async for frame in frames:
+        yield compressor.compress(frame.encode("utf-8")) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
@@ -1,37 +1,78 @@
-from tavily import TavilyClient
-from backend.ara.config import TAVILY_API_KEY, TAVILY_MAX_RESULTS
+import asyncio
+import time
+import weakref
+from typing import TYPE_CHECKING
 
-client = TavilyClient(api_key=TAVILY_API_KEY)
+from backend.ara.config import TAVILY_API_BASE_URL, TAVILY_MAX_RESULTS, TAVILY_MIN_INTERVAL_SECONDS, required
+from backend.ara.metrics import observe_search
+from backend.ara.rate_limit import AsyncRateLimiter
+from backend.ara.transport import run_sync
+
+if TYPE_CHECKING:
+    from tavily import AsyncTavilyClient
+
+_rate_limiter = AsyncRateLimiter(TAVILY_MIN_INTERVAL_SECONDS)
+
+# AsyncTavilyClient owns an httpx pool, which is tied to the event loop it was first used on.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncTavilyClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _get_async_client() -> "AsyncTavilyClient":
+    """Tavily client for the running loop, created (and the tavily package imported) on first search."""
+    loop = asyncio.get_running_loop()
+    async_client = _async_clients.get(loop)
+    if async_client is None:
+        from tavily import AsyncTavilyClient
+
+        async_client = AsyncTavilyClient(api_key=required("TAVILY_API_KEY"), api_base_url=TAVILY_API_BASE_URL)
+        _async_clients[loop] = async_client
+    return async_client
+
+
+def _search_kwargs(query: str, max_results: int | None) -> dict:
+    return {
+        "query": query,
+        "search_depth": "advanced",
+        "max_results": max_results or TAVILY_MAX_RESULTS,
+        "include_answer": False,
+        "include_raw_content": False,
+    }
+
+
+def _to_results(response: dict) -> list[dict]:
+    results = []
+
+    for item in response.get("results", []):
+        results.append({
+            "title": item.get("title", ""),
+            "url": item.get("url", ""),
+            "snippet": item.get("content", ""),
+        })
+
+    return results
 
 
 def tavily_search(query: str, max_results: int | None = None) -> list[dict]:
+    """Sync entry point for scripts; runs atavily_search on a new event loop."""
+    return run_sync(atavily_search(query, max_results))
+
+
+async def atavily_search(query: str, max_results: int | None = None) -> list[dict]:
     """
     Tavily search tool for Autonomous Research Agent
     Returns clean structured results optimized for LLM use
     """
 
-    max_results = max_results or TAVILY_MAX_RESULTS
-
+    await _rate_limiter.acquire()
+    started = time.perf_counter()
     try:
-        response = client.search(
-            query=query,
-            search_depth="advanced",
-            max_results=max_results,
-            include_answer=False,
-            include_raw_content=False,
-        )
-
-        results = []
-
-        for item in response.get("results", []):
-            results.append({
-                "title": item.get("title", ""),
-                "url": item.get("url", ""),
-                "snippet": item.get("content", ""),
-            })
-
-        return results
+        response = await _get_async_client().search(**_search_kwargs(query, max_results))
+        return _to_results(response)
 
     except Exception as e:
         print(f"Tavily search error: {e}")
-        return []
\ No newline at end of file
+        return []
+    finally:
+        observe_search("tavily", time.perf_counter() - started)
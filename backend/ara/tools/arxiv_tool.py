@@ -1,41 +1,76 @@
-import arxiv
+import re
 import time
-from backend.ara.config import ARXIV_MAX_RESULTS
+from calendar import timegm
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
+from urllib.parse import urlencode
+
+from backend.ara.config import ARXIV_API_URL, ARXIV_MAX_RESULTS, ARXIV_MIN_INTERVAL_SECONDS
+from backend.ara.metrics import observe_search
+from backend.ara.rate_limit import AsyncRateLimiter
+from backend.ara.transport import arequest, run_sync
+
+if TYPE_CHECKING:
+    import feedparser
+
+# arXiv asks API clients to leave ~3 seconds between requests.
+_rate_limiter = AsyncRateLimiter(ARXIV_MIN_INTERVAL_SECONDS)
+
+
+def _query_url(query: str, max_results: int) -> str:
+    """Query URL built from the export API's documented parameters, most relevant first."""
+    params = {
+        "search_query": query,
+        "start": 0,
+        "max_results": max_results,
+        "sortBy": "relevance",
+        "sortOrder": "descending",
+    }
+    return f"{ARXIV_API_URL}?{urlencode(params)}"
+
+
+def _entry_to_result(entry: "feedparser.FeedParserDict") -> dict | None:
+    """Maps an Atom feed entry to a result dict; None for the API's error entry."""
+    entry_id = entry.get("id")
+    # The API reports a bad query as a single entry under /api/errors.
+    if not entry_id or "/api/errors" in entry_id:
+        return None
+    published = entry.get("published_parsed")
+    return {
+        "title": re.sub(r"\s+", " ", entry.get("title", "")),
+        "url": entry_id,
+        "snippet": (entry.get("summary") or "")[:600],
+        "published": str(datetime.fromtimestamp(timegm(published), tz=timezone.utc)) if published else "",
+        "authors": [a.get("name", "") for a in entry.get("authors", [])],
+    }
+
 
 def arxiv_search(query: str, max_results: int | None = None) -> list[dict]:
+    """Sync entry point for scripts; runs aarxiv_search on a new event loop."""
+    return run_sync(aarxiv_search(query, max_results))
+
+
+async def aarxiv_search(query: str, max_results: int | None = None) -> list[dict]:
+    """
+    arXiv search. Fetches a single results page over the shared async client (which
+    retries 503s with backoff) and parses the Atom feed with feedparser, imported on first
+    search since it is not needed to start the API.
+    """
+    import feedparser
+
     max_results = max_results or ARXIV_MAX_RESULTS
+    url = _query_url(query, min(max_results, 25))
 
-    search = arxiv.Search(
-        query=query,
-        max_results=max_results,
-        sort_by=arxiv.SortCriterion.Relevance,
-    )
-
-    # arXiv intermittently returns 503. Retry with backoff and fail-soft.
-    retries = 3
-    backoff_seconds = 1.5
-    page_size = min(max_results, 25)
-
-    for attempt in range(retries):
-        try:
-            results = []
-            client = arxiv.Client(page_size=page_size, delay_seconds=3.0, num_retries=2)
-            for r in client.results(search):
-                results.append({
-                    "title": r.title,
-                    "url": r.entry_id,
-                    "snippet": (r.summary or "")[:600],
-                    "published": str(r.published) if r.published else "",
-                    "authors": [a.name for a in (r.authors or [])],
-                })
-            return results
-        except Exception as e:
-            message = str(e).lower()
-            is_retryable = "503" in message or "http" in message or "temporar" in message
-            if is_retryable and attempt < retries - 1:
-                time.sleep(backoff_seconds * (2 ** attempt))
-                continue
-            print(f"arXiv search error: {e}")
-            return []
-
-    return []
+    await _rate_limiter.acquire()
+    started = time.perf_counter()
+    try:
+        resp = await arequest("GET", url, timeout=30)
+        resp.raise_for_status()
+        feed = feedparser.parse(resp.text)
+        results = [_entry_to_result(entry) for entry in feed.entries]
+        return [r for r in results if r is not None][:max_results]
+    except Exception as e:
+        print(f"arXiv search error: {e}")
+        return []
+    finally:
+        observe_search("arxiv", time.perf_counter() - started)
@@ -1,19 +1,91 @@
+import asyncio
 import re
-import requests
+import sqlite3
+import time
+from urllib.parse import urlsplit, urlunsplit
 from bs4 import BeautifulSoup
-from backend.ara.config import FETCH_MAX_CHARS
+from backend.ara.config import FETCH_MAX_CHARS, FETCH_TIMEOUT_SECONDS
+from backend.ara.metrics import observe_fetch, record_cache
+from backend.ara.page_cache import CachedPage, PageCache, get_page_cache
+from backend.ara.transport import arequest, run_sync
+
+HEADERS = {"User-Agent": "ARA/1.0 (research agent)"}
+
+
+def canonical_url(url: str) -> str:
+    """URL key for caching and de-duplication: lower-cased scheme/host, no fragment, no trailing slash."""
+    parts = urlsplit((url or "").strip())
+    path = parts.path.rstrip("/")
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
 
-def fetch_clean_text(url: str, max_chars: int | None = None) -> str:
-    max_chars = max_chars or FETCH_MAX_CHARS
-    headers = {"User-Agent": "ARA/1.0 (research agent)"}
-    r = requests.get(url, headers=headers, timeout=30)
-    r.raise_for_status()
 
-    soup = BeautifulSoup(r.text, "lxml")
+def _clean_html(html: str) -> str:
+    soup = BeautifulSoup(html, "lxml")
     # remove noisy tags
     for tag in soup(["script", "style", "noscript", "header", "footer", "nav", "aside"]):
         tag.decompose()
 
     text = soup.get_text(separator="\n")
-    text = re.sub(r"\n{3,}", "\n\n", text).strip()
-    return text[:max_chars]
\ No newline at end of file
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def _cache_lookup(url: str) -> tuple[PageCache | None, str, CachedPage | None]:
+    cache = get_page_cache()
+    if cache is None:
+        return None, "", None
+    canonical = canonical_url(url)
+    try:
+        return cache, canonical, cache.get(canonical)
+    except sqlite3.Error:
+        return None, canonical, None
+
+
+def _request_headers(cached: CachedPage | None) -> dict:
+    if cached is None:
+        return HEADERS
+    return {**HEADERS, **cached.validators()}
+
+
+def _mark_revalidated(cache: PageCache, canonical: str, resp_headers) -> None:
+    try:
+        cache.mark_revalidated(canonical, resp_headers.get("ETag"), resp_headers.get("Last-Modified"))
+    except sqlite3.Error:
+        pass
+
+
+def _clean_and_store(cache: PageCache | None, canonical: str, html: str, resp_headers) -> str:
+    # The full cleaned text is cached so callers with different max_chars can share entries.
+    text = _clean_html(html)
+    if cache is not None:
+        try:
+            cache.put(canonical, text, resp_headers.get("ETag"), resp_headers.get("Last-Modified"))
+        except sqlite3.Error:
+            pass
+    return text
+
+
+def fetch_clean_text(url: str, max_chars: int | None = None) -> str:
+    """Sync entry point for scripts; runs afetch_clean_text on a new event loop."""
+    return run_sync(afetch_clean_text(url, max_chars))
+
+
+async def afetch_clean_text(url: str, max_chars: int | None = None) -> str:
+    max_chars = max_chars or FETCH_MAX_CHARS
+    # SQLite and HTML parsing are blocking; keep them off the event loop.
+    cache, canonical, cached = await asyncio.to_thread(_cache_lookup, url)
+    # A fresh hit skips both the network round trip and the HTML parse.
+    if cached is not None and cached.is_fresh(cache.ttl_seconds):
+        record_cache("page", "hit")
+        return cached.text[:max_chars]
+
+    started = time.perf_counter()
+    r = await arequest("GET", url, headers=_request_headers(cached), timeout=FETCH_TIMEOUT_SECONDS)
+    observe_fetch(url, time.perf_counter() - started)
+    if r.status_code == 304 and cached is not None:
+        record_cache("page", "revalidated")
+        await asyncio.to_thread(_mark_revalidated, cache, canonical, r.headers)
+        return cached.text[:max_chars]
+    record_cache("page", "miss")
+    r.raise_for_status()
+    text = await asyncio.to_thread(_clean_and_store, cache, canonical, r.text, r.headers)
+    return text[:max_chars]
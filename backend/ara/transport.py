@@ -0,0 +1,178 @@
+import asyncio
+import random
+import threading
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from backend.ara.config import (
+    HTTP_BACKOFF_FACTOR,
+    HTTP_BACKOFF_JITTER,
+    HTTP_BACKOFF_MAX,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_RETRIES,
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE,
+)
+
+# Rate limiting and transient upstream failures are worth retrying; everything else surfaces.
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+_SESSION: requests.Session | None = None
+_SESSION_LOCK = threading.Lock()
+
+# httpx connection pools are bound to the event loop that opened them, so keep one client per loop.
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _build_retry() -> Retry:
+    return Retry(
+        total=HTTP_MAX_RETRIES,
+        connect=HTTP_MAX_RETRIES,
+        status=HTTP_MAX_RETRIES,
+        # A read timeout on a long LLM completion is not cheap to repeat; let the caller decide.
+        read=0,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        backoff_jitter=HTTP_BACKOFF_JITTER,
+        backoff_max=HTTP_BACKOFF_MAX,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset({"GET", "HEAD", "POST"}),
+        respect_retry_after_header=True,
+        # Hand the last response back so callers keep using raise_for_status().
+        raise_on_status=False,
+    )
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    # pool_connections = number of per-host pools kept alive, pool_maxsize = sockets per host.
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=_build_retry(),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Process-wide keep-alive session shared by the Azure clients and the page fetcher."""
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                _SESSION = _build_session()
+    return _SESSION
+
+
+def close_session() -> None:
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is not None:
+            _SESSION.close()
+            _SESSION = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Keep-alive async client for the running event loop, with the same pool limits as the sync session."""
+    loop = asyncio.get_running_loop()
+    client = _ASYNC_CLIENTS.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_POOL_MAXSIZE,
+            ),
+            # Match requests' default of following redirects for page fetches.
+            follow_redirects=True,
+        )
+        _ASYNC_CLIENTS[loop] = client
+    return client
+
+
+async def aclose_async_client() -> None:
+    client = _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def run_sync(coro):
+    """
+    Runs an async pipeline step to completion from sync code (scripts, notebooks) on a new event
+    loop, closing that loop's async client afterwards. Must not be called from a running loop.
+    """
+    async def main():
+        try:
+            return await coro
+        finally:
+            await aclose_async_client()
+
+    return asyncio.run(main())
+
+
+def _retry_after_seconds(resp: httpx.Response) -> float | None:
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def backoff_delay(attempt: int, retry_after: float | None = None) -> float:
+    """Exponential backoff with additive jitter, mirroring the urllib3 Retry used by the sync session."""
+    if retry_after is not None:
+        return min(retry_after, HTTP_BACKOFF_MAX)
+    delay = HTTP_BACKOFF_FACTOR * (2 ** attempt) + random.uniform(0, HTTP_BACKOFF_JITTER)
+    return min(delay, HTTP_BACKOFF_MAX)
+
+
+async def arequest(method: str, url: str, **kwargs) -> httpx.Response:
+    """
+    Send a request on the shared async client, retrying connect failures and 429/5xx.
+    Like the sync session, the last response is returned once retries run out.
+    """
+    client = get_async_client()
+    for attempt in range(HTTP_MAX_RETRIES + 1):
+        try:
+            resp = await client.request(method, url, **kwargs)
+        except (httpx.ConnectError, httpx.ConnectTimeout):
+            if attempt >= HTTP_MAX_RETRIES:
+                raise
+            await asyncio.sleep(backoff_delay(attempt))
+            continue
+
+        if resp.status_code not in RETRY_STATUS_CODES or attempt >= HTTP_MAX_RETRIES:
+            return resp
+        await asyncio.sleep(backoff_delay(attempt, _retry_after_seconds(resp)))
+    return resp
+
+
+@asynccontextmanager
+async def astream_request(method: str, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+    """
+    Streaming counterpart of arequest: yields a response whose body has not been read yet.
+    Connect failures and 429/5xx are retried before any of the body is consumed.
+    """
+    client = get_async_client()
+    for attempt in range(HTTP_MAX_RETRIES + 1):
+        try:
+            async with client.stream(method, url, **kwargs) as resp:
+                if resp.status_code not in RETRY_STATUS_CODES or attempt >= HTTP_MAX_RETRIES:
+                    yield resp
+                    return
+                delay = backoff_delay(attempt, _retry_after_seconds(resp))
+        except (httpx.ConnectError, httpx.ConnectTimeout):
+            if attempt >= HTTP_MAX_RETRIES:
+                raise
+            delay = backoff_delay(attempt)
+        await asyncio.sleep(delay)
@@ -0,0 +1,339 @@
+"""
+Local stand-ins for the external services a research run calls: Azure chat completions and
+embeddings, Tavily search, the arXiv API and the web pages search results point at. Used by
+backend.bench.pipeline so the whole pipeline can be load-tested offline and for free.
+
+All routes are served by one threaded HTTP server on 127.0.0.1:
+
+    POST /azure/chat         chat completions (plain and `"stream": true`)
+    POST /azure/embeddings   deterministic embeddings
+    POST /tavily/search      canned results pointing at /pages/...
+    GET  /arxiv/query        canned Atom feed
+    GET  /pages/{n}          HTML page; size depends on n
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+_WORDS = (
+    "adoption productivity latency throughput benchmark developers automation evaluation "
+    "survey deployment reliability governance risk workforce tooling cost accuracy model "
+    "dataset baseline study growth quarter enterprise pipeline quality"
+).split()
+_SOURCE_LINE = re.compile(r"^\[(\d+)\] (.*)\nURL: (\S*)", re.M)
+_SECTION_ID = re.compile(r"^\[section (s\d+)\]", re.M)
+
+
+@dataclass
+class FakeConfig:
+    chat_latency: float = 0.3
+    """Seconds before the first chat token (or the whole response when not streaming)."""
+    tokens_per_second: float = 400.0
+    """Chat output rate; 0 sends the whole completion at once."""
+    completion_tokens: int = 600
+    """Approximate size of summarizer/critic outputs, in words."""
+    length_rate: float = 0.0
+    """Share of chat calls whose first segment stops with finish_reason=length."""
+    rate_limit_rate: float = 0.0
+    """Share of chat/embedding requests answered with 429 and Retry-After."""
+    embedding_latency: float = 0.05
+    embedding_dim: int = 256
+    search_latency: float = 0.4
+    arxiv_latency: float = 0.6
+    search_results: int = 8
+    arxiv_results: int = 3
+    page_latency: float = 0.1
+    page_sizes: list[int] = field(default_factory=lambda: [2_000, 8_000, 20_000, 60_000])
+    """HTML body sizes in characters; page n gets page_sizes[n % len(page_sizes)]."""
+    seed: int = 7
+
+
+class FakeServices:
+    """Starts the fake services in a background thread; use as a context manager."""
+
+    def __init__(self, config: FakeConfig | None = None):
+        self.config = config or FakeConfig()
+        self.counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._random = random.Random(self.config.seed)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> dict[str, str]:
+        """Environment overrides that point the backend at these services."""
+        return {
+            "AZURE_LLM_ENDPOINT": f"{self.base_url}/azure/chat",
+            "AZURE_LLM_API_KEY": "bench",
+            "AZURE_LLM_DEPLOYMENT_NAME": "bench-chat",
+            "AZURE_EMBEDDING_ENDPOINT": f"{self.base_url}/azure/embeddings",
+            "AZURE_EMBEDDING_API_KEY": "bench",
+            "AZURE_EMBEDDING_DEPLOYMENT_NAME": "bench-embedding",
+            "TAVILY_API_KEY": "tvly-bench",
+            "TAVILY_API_BASE_URL": f"{self.base_url}/tavily",
+            "ARXIV_API_URL": f"{self.base_url}/arxiv/query",
+        }
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def chance(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < rate
+
+    def __enter__(self) -> "FakeServices":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def summary(self) -> dict:
+        return {"config": asdict(self.config), "requests": dict(sorted(self.counters.items()))}
+
+
+REPORT_TITLE = "# Research Report: benchmark"
+
+
+def _words(seed: str, n: int) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(_WORDS) for _ in range(max(1, n)))
+
+
+def _embedding(text: str, dim: int) -> list[float]:
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    rng = random.Random(digest)
+    return [rng.uniform(-1, 1) for _ in range(dim)]
+
+
+def _report(user: str, words: int) -> str:
+    sources = _SOURCE_LINE.findall(user)[:12] or [("1", "Benchmark source", "http://127.0.0.1/pages/1")]
+    per_section = max(8, words // 8)
+    numbers = [n for n, _, _ in sources]
+
+    def para(label: str) -> str:
+        sentences = []
+        for i in range(max(1, per_section // 14)):
+            sentences.append(f"{_words(label + str(i), 13).capitalize()} [{numbers[i % len(numbers)]}].")
+        return " ".join(sentences)
+
+    references = "\n".join(f"[{n}] {title} - {url}" for n, title, url in sources)
+    return (
+        f"{REPORT_TITLE}\n" + para("intro")
+        + "\n## Executive Summary\n" + para("summary")
+        + "\n## Scope and Assumptions\n" + para("scope")
+        + "\n## Key Findings\n### Finding 1\n" + para("f1") + "\n### Finding 2\n" + para("f2")
+        + "\n## Risks / Limitations\n" + para("risks")
+        + "\n## Recommendations / Next Steps\n" + para("next")
+        + f"\n## References\n{references}\n"
+    )
+
+
+def _chat_text(system: str, user: str, words: int) -> str:
+    if "PlannerAgent" in system:
+        return "\n".join(f"{i}. {_words(user + str(i), 8)}" for i in range(1, 7))
+    if "reviewing some sections" in system:
+        sections = _SECTION_ID.findall(user)
+        edits = [{"section": sections[0], "content": _words(user, 60) + " [1]."}] if sections else []
+        return json.dumps({"critique": ["Tighten wording in the first section."], "edits": edits})
+    if "CriticAgent" in system:
+        draft = user.split("\n", 1)[-1]
+        return f"## Critique\n- Add more specific figures.\n## Revised Report\n{_report(draft, words)}"
+    if "taking notes" in system:
+        numbers = [n for n, _, _ in _SOURCE_LINE.findall(user)] or ["1"]
+        return "\n".join(f"- {_words(user + n, 14)} [{n}]" for n in numbers)
+    return _report(user, words)
+
+
+def _html(n: int, size: int) -> str:
+    paragraphs = []
+    total = 0
+    i = 0
+    while total < size:
+        p = f"<p>{_words(f'page{n}-{i}', 40).capitalize()}.</p>"
+        paragraphs.append(p)
+        total += len(p)
+        i += 1
+    return (
+        f"<html><head><title>Benchmark page {n}</title><script>var x = {n};</script></head>"
+        f"<body><nav>menu</nav><h1>Benchmark page {n}</h1>{''.join(paragraphs)}<footer>f</footer></body></html>"
+    )
+
+
+def _arxiv_feed(base_url: str, query: str, count: int) -> str:
+    entries = []
+    for i in range(count):
+        entries.append(
+            f"""<entry>
+<id>http://arxiv.org/abs/2401.{i:05d}v1</id>
+<updated>2024-01-0{i % 9 + 1}T00:00:00Z</updated>
+<published>2024-01-0{i % 9 + 1}T00:00:00Z</published>
+<title>{_words(query + str(i), 8).title()}</title>
+<summary>{_words(query + 's' + str(i), 80)}</summary>
+<author><name>Bench Author {i}</name></author>
+<link href="{base_url}/pages/{100 + i}" rel="alternate" type="text/html"/>
+<link title="pdf" href="{base_url}/pages/{100 + i}" rel="related" type="application/pdf"/>
+<arxiv:primary_category xmlns:arxiv="http://arxiv.org/schemas/atom" term="cs.SE" scheme="http://arxiv.org/schemas/atom"/>
+<category term="cs.SE" scheme="http://arxiv.org/schemas/atom"/>
+</entry>"""
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n<feed xmlns="http://www.w3.org/2005/Atom" '
+        'xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">\n'
+        f"<title>ArXiv Query</title><opensearch:totalResults>{count}</opensearch:totalResults>\n"
+        + "\n".join(entries) + "\n</feed>"
+    )
+
+
+def _handler(services: FakeServices):
+    config = services.config
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def _body(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def _send(self, status: int, body: bytes, content_type: str, headers: dict | None = None) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self, payload: dict, status: int = 200, headers: dict | None = None) -> None:
+            self._send(status, json.dumps(payload).encode(), "application/json", headers)
+
+        def _rate_limited(self, name: str) -> bool:
+            if not services.chance(config.rate_limit_rate):
+                return False
+            services.count(f"{name}_429")
+            self._json({"error": {"code": "429", "message": "Rate limit"}}, 429, {"Retry-After": "0.2"})
+            return True
+
+        def do_POST(self) -> None:
+            path = urlsplit(self.path).path
+            body = self._body()
+            if path == "/azure/chat":
+                self._chat(body)
+            elif path == "/azure/embeddings":
+                if self._rate_limited("embedding"):
+                    return
+                services.count("embedding")
+                time.sleep(config.embedding_latency)
+                texts = body.get("input") or []
+                data = [{"index": i, "embedding": _embedding(t, config.embedding_dim)} for i, t in enumerate(texts)]
+                self._json({"data": data, "usage": {"prompt_tokens": sum(len(t.split()) for t in texts)}})
+            elif path == "/tavily/search":
+                services.count("tavily")
+                time.sleep(config.search_latency)
+                query = body.get("query", "")
+                limit = min(int(body.get("max_results") or config.search_results), config.search_results)
+                offset = int(hashlib.sha256(query.encode()).hexdigest(), 16) % 50
+                results = [
+                    {
+                        "title": _words(query + str(i), 6).title(),
+                        "url": f"{services.base_url}/pages/{offset + i}",
+                        "content": _words(query + "c" + str(i), 50),
+                        "score": round(1 - i / 20, 3),
+                    }
+                    for i in range(limit)
+                ]
+                self._json({"query": query, "results": results, "response_time": config.search_latency})
+            else:
+                self._json({"error": "not found"}, 404)
+
+        def do_GET(self) -> None:
+            parts = urlsplit(self.path)
+            if parts.path == "/arxiv/query":
+                services.count("arxiv")
+                time.sleep(config.arxiv_latency)
+                query = parse_qs(parts.query).get("search_query", [""])[0]
+                self._send(200, _arxiv_feed(services.base_url, query, config.arxiv_results).encode(), "application/atom+xml")
+            elif parts.path.startswith("/pages/"):
+                services.count("page")
+                time.sleep(config.page_latency)
+                n = int(parts.path.rsplit("/", 1)[-1] or 0)
+                html = _html(n, config.page_sizes[n % len(config.page_sizes)])
+                self._send(200, html.encode(), "text/html; charset=utf-8")
+            else:
+                self._json({"error": "not found"}, 404)
+
+        def _chat(self, body: dict) -> None:
+            if self._rate_limited("chat"):
+                return
+            services.count("chat")
+            messages = body.get("messages") or []
+            system = str(messages[0].get("content", "")) if messages else ""
+            user = str(messages[1].get("content", "")) if len(messages) > 1 else ""
+            continuation = len(messages) > 2
+            text = _chat_text(system, user, config.completion_tokens)
+            finish_reason = "stop"
+            if not continuation and services.chance(config.length_rate):
+                services.count("chat_length")
+                text, finish_reason = text[: len(text) // 2], "length"
+            elif continuation:
+                text = " " + _words(user, 20)
+            usage = {
+                "prompt_tokens": sum(len(str(m.get("content", "")).split()) for m in messages),
+                "completion_tokens": len(text.split()),
+            }
+            time.sleep(config.chat_latency)
+            if body.get("stream"):
+                include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+                self._stream_chat(text, finish_reason, usage if include_usage else None)
+            else:
+                if config.tokens_per_second > 0:
+                    time.sleep(usage["completion_tokens"] / config.tokens_per_second)
+                choice = {"index": 0, "finish_reason": finish_reason, "message": {"role": "assistant", "content": text}}
+                self._json({"choices": [choice], "usage": usage})
+
+        def _stream_chat(self, text: str, finish_reason: str, usage: dict | None) -> None:
+            """Like the real API, usage comes only when requested, in a last chunk with no choices."""
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def chunk(payload) -> None:
+                data = f"data: {payload if isinstance(payload, str) else json.dumps(payload)}\n\n".encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            # Azure sends a first chunk with empty choices (content-filter results).
+            chunk({"choices": [], "prompt_filter_results": []})
+            words = re.findall(r"\S+\s*", text)
+            step = 4
+            delay = step / config.tokens_per_second if config.tokens_per_second > 0 else 0
+            for i in range(0, len(words), step):
+                chunk({"choices": [{"index": 0, "delta": {"content": "".join(words[i:i + step])}, "finish_reason": None}]})
+                if delay:
+                    time.sleep(delay)
+            chunk({"choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]})
+            if usage is not None:
+                chunk({"choices": [], "usage": usage})
+            chunk("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+
+    return Handler
@@ -0,0 +1,65 @@
+"""
+Per-request graph setup cost: compiling a fresh graph per request (`build_graph()`, as
+requests once did) versus reusing the process-wide compiled graph and only creating a
+logger + run config.
+
+Run from project root (no .env needed; compiling the graph opens no clients, since Chroma
+and the embedder are created on first use):
+
+    python -m backend.bench.graph_setup --iterations 200
+"""
+import argparse
+import json
+import statistics
+import time
+
+from backend.ara.graph import build_graph, get_graph, run_config
+from backend.ara.logger import InMemoryLogger
+
+
+def _time_per_call(fn, iterations: int) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _summary(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "mean_ms": round(statistics.fmean(ordered), 4),
+        "p50_ms": round(ordered[len(ordered) // 2], 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    # Compile the shared graph (and import its modules) once, so both paths measure only per-request work.
+    get_graph()
+
+    def per_request_build():
+        InMemoryLogger()
+        build_graph()
+
+    def shared_graph():
+        get_graph()
+        run_config(InMemoryLogger())
+
+    before = _summary(_time_per_call(per_request_build, args.iterations))
+    after = _summary(_time_per_call(shared_graph, args.iterations))
+    print(json.dumps({
+        "iterations": args.iterations,
+        "build_graph_per_request": before,
+        "shared_compiled_graph": after,
+        "speedup_p50": round(before["p50_ms"] / max(after["p50_ms"], 1e-6), 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Cold-start cost: how long `import backend.app` (and a few heavy modules on their own) takes in a
+fresh interpreter, which optional heavy dependencies that import pulls in, and the time from
+launching uvicorn to the first 200 from /health.
+
+Run from project root (no .env needed; each sample is a new subprocess):
+
+    python -m backend.bench.import_time --repeat 5
+    python -m backend.bench.import_time --repeat 5 --no-server
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+MODULES = ("backend.app", "backend.ara.graph", "chromadb", "reportlab.platypus", "tavily", "feedparser")
+HEAVY = ("chromadb", "reportlab", "tavily", "feedparser", "openai", "langgraph")
+
+_IMPORT_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+try:
+    __import__({module!r})
+    error = None
+except Exception as e:
+    error = f"{{type(e).__name__}}: {{e}}"
+elapsed = time.perf_counter() - start
+loaded = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"seconds": elapsed, "error": error, "loaded": loaded}}))
+"""
+
+
+def _clean_env() -> dict[str, str]:
+    """The current environment without the service settings, as on a host that only serves /health."""
+    prefixes = ("AZURE_", "TAVILY_")
+    return {k: v for k, v in os.environ.items() if not k.startswith(prefixes)}
+
+
+def _import_once(module: str, env: dict[str, str]) -> dict:
+    code = _IMPORT_SNIPPET.format(module=module, heavy=HEAVY)
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env)
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        return {"seconds": None, "error": proc.stderr.strip().splitlines()[-1:] or ["failed"], "loaded": []}
+    return json.loads(lines[-1])
+
+
+def bench_import(module: str, repeat: int, env: dict[str, str]) -> dict:
+    runs = [_import_once(module, env) for _ in range(repeat)]
+    samples = [r["seconds"] for r in runs if r["seconds"] is not None and not r["error"]]
+    result = {"loaded": runs[-1]["loaded"], "error": runs[-1]["error"]}
+    if samples:
+        result.update({
+            "median_ms": round(statistics.median(samples) * 1000, 1),
+            "min_ms": round(min(samples) * 1000, 1),
+        })
+    return result
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def bench_health(repeat: int, env: dict[str, str], timeout: float = 60.0) -> dict:
+    """Launch `uvicorn backend.app:app` and poll /health until it returns 200."""
+    samples, errors = [], []
+    for _ in range(repeat):
+        port = _free_port()
+        cmd = [sys.executable, "-m", "uvicorn", "backend.app:app", "--port", str(port), "--log-level", "warning"]
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        try:
+            while time.perf_counter() - start < timeout:
+                if proc.poll() is not None:
+                    errors.append((proc.stderr.read() or b"").decode(errors="replace").strip()[-300:])
+                    break
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as resp:
+                        if resp.status == 200:
+                            samples.append(time.perf_counter() - start)
+                            break
+                except OSError:
+                    time.sleep(0.02)
+            else:
+                errors.append(f"no 200 from /health within {timeout}s")
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+    result = {"runs": repeat, "errors": errors[:3]}
+    if samples:
+        result.update({
+            "median_ms": round(statistics.median(samples) * 1000, 1),
+            "min_ms": round(min(samples) * 1000, 1),
+        })
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--module", action="append", default=[], help="module to time (repeatable)")
+    parser.add_argument("--no-server", action="store_true", help="skip the uvicorn /health cold start")
+    args = parser.parse_args()
+
+    env = _clean_env()
+    report = {
+        "python": sys.version.split()[0],
+        "imports": {m: bench_import(m, args.repeat, env) for m in (args.module or MODULES)},
+    }
+    if not args.no_server:
+        report["health_cold_start"] = bench_health(args.repeat, env)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+End-to-end pipeline benchmark against local fake services (see backend/bench/fakes.py), so no
+paid API is called. Drives the checkpointed run graph directly, `POST /api/research/run` and
+`GET /api/research/stream` at a configurable concurrency and reports latency percentiles,
+throughput, time to first event and RSS. Results are printed and saved as JSON.
+
+Run from project root (chromadb must be installed; no .env needed):
+
+    python -m backend.bench.pipeline --mode all --requests 24 --concurrency 6
+    python -m backend.bench.pipeline --mode stream --chat-latency 1.0 --rate-limit-rate 0.05
+    python -m backend.bench.pipeline --mode stream --same-query --disconnect-every 3  # shared-job disconnects
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from backend.bench.fakes import REPORT_TITLE, FakeConfig, FakeServices
+
+MODES = ("graph", "run", "stream")
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+def _stats(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+    return {
+        "mean_s": round(statistics.fmean(ordered), 4),
+        "p50_s": round(_percentile(ordered, 50), 4),
+        "p95_s": round(_percentile(ordered, 95), 4),
+        "p99_s": round(_percentile(ordered, 99), 4),
+        "max_s": round(ordered[-1], 4),
+    }
+
+
+def _check_report(report: str) -> None:
+    """Fails the request when the final report is empty or lost the draft's title (e.g. to a critic edit)."""
+    if not report:
+        raise RuntimeError("empty final_report")
+    if not report.lstrip().startswith(REPORT_TITLE):
+        raise RuntimeError(f"report title lost: {report.lstrip().splitlines()[0][:80]!r}")
+
+
+def _rss_mb() -> dict:
+    """Current RSS (Linux /proc) and peak RSS of this process, in MB."""
+    current = None
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+    return {"current": round(current, 1) if current is not None else None, "peak": round(peak, 1)}
+
+
+class _Recorder:
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.first_event: list[float] = []
+        self.first_token: list[float] = []
+        self.errors: list[str] = []
+        self.disconnected = 0
+
+    def result(self, wall: float, requests: int) -> dict:
+        return {
+            "requests": requests,
+            "ok": len(self.latencies),
+            "errors": len(self.errors),
+            "disconnected": self.disconnected,
+            "error_samples": self.errors[:5],
+            "wall_s": round(wall, 3),
+            "throughput_rps": round(len(self.latencies) / wall, 3) if wall else 0.0,
+            "latency": _stats(self.latencies),
+            "time_to_first_event": _stats(self.first_event),
+            "time_to_first_draft_token": _stats(self.first_token),
+            "rss_mb": _rss_mb(),
+        }
+
+
+async def _drive(requests: int, concurrency: int, one) -> tuple[_Recorder, float]:
+    """Runs `one(i, started, marks)` for each request; `marks` collects first_event/first_token offsets."""
+    recorder = _Recorder()
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def limited(i: int) -> None:
+        async with sem:
+            started = time.perf_counter()
+            marks: dict[str, float] = {}
+            try:
+                await one(i, started, marks)
+            except Exception as e:
+                recorder.errors.append(f"{type(e).__name__}: {e}")
+                return
+            if marks.get("disconnected"):
+                recorder.disconnected += 1
+                return
+            recorder.latencies.append(time.perf_counter() - started)
+            if "first_event" in marks:
+                recorder.first_event.append(marks["first_event"])
+            if "first_token" in marks:
+                recorder.first_token.append(marks["first_token"])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(limited(i) for i in range(requests)))
+    return recorder, time.perf_counter() - started
+
+
+async def bench_graph(queries: list[str], concurrency: int) -> dict:
+    """
+    stream_graph_run on the checkpointed graph that jobs run on, with the same checkpoint
+    pruning after each run, but no job queue or HTTP layer.
+    """
+    from backend.ara.graph import aclose_checkpointer, get_run_graph, prune_checkpoints
+    from backend.ara.run_stream import build_initial_state, stream_graph_run
+    from backend.ara.transport import aclose_async_client
+
+    graph = await get_run_graph()
+
+    async def one(i: int, started: float, marks: dict) -> None:
+        def publish(event: str, payload: dict) -> None:
+            marks.setdefault("first_event", time.perf_counter() - started)
+            if event == "draft_delta":
+                marks.setdefault("first_token", time.perf_counter() - started)
+
+        run_id = uuid.uuid4().hex
+        state = await stream_graph_run(build_initial_state(queries[i]), publish, graph=graph, run_id=run_id)
+        await prune_checkpoints(run_id)
+        _check_report(state.get("final_report", ""))
+
+    try:
+        recorder, wall = await _drive(len(queries), concurrency, one)
+    finally:
+        await aclose_checkpointer()
+        await aclose_async_client()
+    return recorder.result(wall, len(queries))
+
+
+async def bench_http(
+    mode: str, base_url: str, queries: list[str], concurrency: int, disconnect_every: int = 0
+) -> dict:
+    """
+    With `disconnect_every=N`, every Nth stream client hangs up after its first event; with
+    --same-query the others share its job and must still receive `done`.
+    """
+    import httpx
+
+    timeout = httpx.Timeout(600.0, connect=10.0)
+    limits = httpx.Limits(max_connections=max(10, concurrency * 2))
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+
+        async def run_one(i: int, started: float, marks: dict) -> None:
+            resp = await client.post("/api/research/run", json={"query": queries[i]})
+            resp.raise_for_status()
+            _check_report(resp.json().get("final_report", ""))
+
+        async def stream_one(i: int, started: float, marks: dict) -> None:
+            done = False
+            event = ""
+            async with client.stream("GET", "/api/research/stream", params={"query": queries[i]}) as resp:
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    if line.startswith("data:") and event == "result":
+                        _check_report(json.loads(line[5:]).get("final_report", ""))
+                    if not line.startswith("event:"):
+                        continue
+                    event = line[6:].strip()
+                    marks.setdefault("first_event", time.perf_counter() - started)
+                    if disconnect_every and i % disconnect_every == 0:
+                        marks["disconnected"] = True
+                        return
+                    if event == "draft_delta":
+                        marks.setdefault("first_token", time.perf_counter() - started)
+                    if event == "error":
+                        raise RuntimeError("run reported an error event")
+                    done = done or event == "done"
+            if not done:
+                raise RuntimeError("stream ended without a done event")
+
+        recorder, wall = await _drive(len(queries), concurrency, run_one if mode == "run" else stream_one)
+    return recorder.result(wall, len(queries))
+
+
+class _Server:
+    """backend.app served by uvicorn on an ephemeral port in a background thread."""
+
+    def __init__(self):
+        import uvicorn
+
+        from backend.app import app
+
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self) -> str:
+        self.thread.start()
+        while not self.server.started:
+            if not self.thread.is_alive():
+                raise RuntimeError("API server failed to start")
+            time.sleep(0.05)
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=30)
+
+
+def _parse_args() -> argparse.Namespace:
+    defaults = FakeConfig()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mode", choices=(*MODES, "all"), default="all")
+    parser.add_argument("--requests", type=int, default=12, help="runs per mode")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--query", default="Impact of AI coding assistants on developer productivity")
+    parser.add_argument("--same-query", action="store_true", help="send one query (exercises single-flight reuse)")
+    parser.add_argument(
+        "--disconnect-every", type=int, default=0, metavar="N",
+        help="in stream mode, every Nth client disconnects after its first event (use with --same-query)",
+    )
+    parser.add_argument("--out", default="", help="JSON output path (default: bench_results/pipeline-<time>.json)")
+    parser.add_argument("--chat-latency", type=float, default=defaults.chat_latency)
+    parser.add_argument("--tokens-per-second", type=float, default=defaults.tokens_per_second)
+    parser.add_argument("--completion-tokens", type=int, default=defaults.completion_tokens)
+    parser.add_argument("--length-rate", type=float, default=defaults.length_rate)
+    parser.add_argument("--rate-limit-rate", type=float, default=defaults.rate_limit_rate)
+    parser.add_argument("--embedding-latency", type=float, default=defaults.embedding_latency)
+    parser.add_argument("--search-latency", type=float, default=defaults.search_latency)
+    parser.add_argument("--arxiv-latency", type=float, default=defaults.arxiv_latency)
+    parser.add_argument("--page-latency", type=float, default=defaults.page_latency)
+    parser.add_argument("--page-sizes", default=",".join(map(str, defaults.page_sizes)))
+    parser.add_argument(
+        "--env", action="append", default=[], metavar="NAME=VALUE",
+        help="extra backend setting for the run, e.g. --env CRITIC_MODE=sections (repeatable)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    fake_config = FakeConfig(
+        chat_latency=args.chat_latency,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        length_rate=args.length_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        embedding_latency=args.embedding_latency,
+        search_latency=args.search_latency,
+        arxiv_latency=args.arxiv_latency,
+        page_latency=args.page_latency,
+        page_sizes=[int(s) for s in args.page_sizes.split(",") if s.strip()],
+    )
+    modes = MODES if args.mode == "all" else (args.mode,)
+
+    with FakeServices(fake_config) as services, tempfile.TemporaryDirectory(prefix="ara-bench-") as tmp:
+        # Settings are read when backend.ara.config is imported, so they must be in place first.
+        overrides = {
+            **services.env(),
+            "CHROMA_PERSIST_DIR": str(Path(tmp) / "chroma"),
+            "PAGE_CACHE_PATH": str(Path(tmp) / "pages.sqlite3"),
+            "EMBEDDING_CACHE_PATH": str(Path(tmp) / "embeddings.sqlite3"),
+            "CHECKPOINT_PATH": str(Path(tmp) / "checkpoints.sqlite3"),
+            "ARXIV_MIN_INTERVAL_SECONDS": "0",
+            "TAVILY_MIN_INTERVAL_SECONDS": "0",
+            "JOB_RESULT_CACHE_TTL_SECONDS": "0" if not args.same_query else "300",
+        }
+        overrides.update(item.split("=", 1) for item in args.env)
+        os.environ.update(overrides)
+
+        results = {}
+        for mode in modes:
+            # Distinct queries per mode so neither single-flight nor caches hand back earlier results.
+            queries = [args.query if args.same_query else f"{args.query} ({mode} #{i})" for i in range(args.requests)]
+            if mode == "graph":
+                results[mode] = asyncio.run(bench_graph(queries, args.concurrency))
+            else:
+                with _Server() as base_url:
+                    results[mode] = asyncio.run(
+                        bench_http(mode, base_url, queries, args.concurrency, args.disconnect_every)
+                    )
+
+        # The job queue limits run/stream concurrency; report it unless --env set it explicitly.
+        from backend.ara.config import JOB_QUEUE_MAX, JOB_WORKERS
+
+        report = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "settings": {
+                "JOB_WORKERS": str(JOB_WORKERS),
+                "JOB_QUEUE_MAX": str(JOB_QUEUE_MAX),
+                **{k: v for k, v in overrides.items() if not k.endswith("_KEY")},
+            },
+            "fakes": services.summary(),
+            "results": results,
+        }
+
+    out = Path(args.out or f"bench_results/pipeline-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
+    print(f"Saved to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 "use client";
 
 import Image from "next/image";
-import { FormEvent, useMemo, useState } from "react";
+import { FormEvent, useMemo, useRef, useState } from "react";
 import ThemeToggle from "@/components/theme-toggle";
 
 type ToolResult = {
@@ -54,10 +54,15 @@ type StreamSourceEvent = {
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_BASE_URL ?? "http://localhost:8001";
 const SAMPLE_QUERY =
   "Research the impact of AI on software engineering jobs from 2023 to 2026. Include key findings, risks, and recommendations with sources.";
+// Sources arrive in one batch per research node; reveal them one at a time on the client.
+const SOURCE_REVEAL_INTERVAL_MS = 150;
+const MAX_STREAM_RECONNECTS = 5;
+const RECONNECT_DELAY_MS = 1000;
 const WORKFLOW_STEPS = [
   { node: "planner_node", label: "Planning" },
   { node: "memory_retrieve_node", label: "Retrieving Memory" },
   { node: "research_node", label: "Researching Sources" },
+  { node: "rerank_node", label: "Ranking Evidence" },
   { node: "summarize_node", label: "Generating Draft" },
   { node: "critic_node", label: "Revising Report" },
   { node: "memory_store_node", label: "Storing Memory" }
@@ -74,8 +79,14 @@ export default function Home() {
   const [livePlan, setLivePlan] = useState<string[]>([]);
   const [liveSources, setLiveSources] = useState<SourceItem[]>([]);
   const [liveLogs, setLiveLogs] = useState<string[]>([]);
+  const [liveDraft, setLiveDraft] = useState("");
+  const [liveReport, setLiveReport] = useState("");
+  const pendingSources = useRef<SourceItem[]>([]);
+  const revealTimer = useRef<ReturnType<typeof setInterval> | null>(null);
 
   const reportText = useMemo(() => result?.final_report?.trim() ?? "", [result]);
+  // Until the result arrives, show the critic's revision as it streams, else the draft.
+  const displayReport = reportText || liveReport.trim() || liveDraft.trim();
   const planItems = livePlan.length ? livePlan : result?.plan ?? [];
   const sourceItems = liveSources.length ? liveSources : result?.sources ?? [];
   const logItems = liveLogs.length ? liveLogs : result?.logs ?? [];
@@ -89,16 +100,51 @@ export default function Home() {
   const progressByNode = useMemo(() => {
     return new Map(progress.map((item) => [item.node, item]));
   }, [progress]);
-  const activeNode = useMemo(() => {
-    if (!isRunning) return null;
-    const completedNodes = WORKFLOW_STEPS.filter((step) => progressByNode.has(step.node));
-    if (!completedNodes.length) return WORKFLOW_STEPS[0]?.node ?? null;
 
-    const lastCompletedNode = completedNodes[completedNodes.length - 1];
-    const completedIdx = WORKFLOW_STEPS.findIndex((step) => step.node === lastCompletedNode.node);
-    const nextStep = WORKFLOW_STEPS[completedIdx + 1];
-    return nextStep?.node ?? lastCompletedNode.node;
-  }, [isRunning, progressByNode]);
+  const appendSources = (items: SourceItem[]) => {
+    setLiveSources((prev) => {
+      const seen = new Set(prev.map((s) => `${s.title}|${s.url}`));
+      const next = [...prev];
+      for (const item of items) {
+        const key = `${item.title}|${item.url}`;
+        if (seen.has(key)) continue;
+        seen.add(key);
+        next.push(item);
+      }
+      return next.length === prev.length ? prev : next;
+    });
+  };
+
+  const stopReveal = () => {
+    if (revealTimer.current !== null) {
+      clearInterval(revealTimer.current);
+      revealTimer.current = null;
+    }
+  };
+
+  const flushSources = () => {
+    stopReveal();
+    const rest = pendingSources.current;
+    pendingSources.current = [];
+    if (rest.length) appendSources(rest);
+  };
+
+  const queueSources = (items: SourceItem[]) => {
+    pendingSources.current.push(...items);
+    if (revealTimer.current !== null) return;
+    revealTimer.current = setInterval(() => {
+      const next = pendingSources.current.shift();
+      if (next) appendSources([next]);
+      if (!pendingSources.current.length) stopReveal();
+    }, SOURCE_REVEAL_INTERVAL_MS);
+  };
+
+  const toSourceItem = (item: Partial<StreamSourceEvent>): SourceItem => ({
+    title: item.title ?? "",
+    url: item.url ?? "",
+    snippet: item.snippet ?? "",
+    type: item.type ?? "web"
+  });
 
   const runResearch = async (event: FormEvent<HTMLFormElement>) => {
     event.preventDefault();
@@ -117,31 +163,30 @@ export default function Home() {
     setLivePlan([]);
     setLiveSources([]);
     setLiveLogs([]);
+    setLiveDraft("");
+    setLiveReport("");
+    stopReveal();
+    pendingSources.current = [];
 
     try {
-      const response = await fetch(
-        `${API_BASE_URL}/api/research/stream?query=${encodeURIComponent(cleanQuery)}`,
-        {
-          method: "GET",
-          headers: { Accept: "text/event-stream" }
-        }
-      );
+      // Runs are background jobs: a dropped stream reconnects and resumes after the last event id.
+      const jobResponse = await fetch(`${API_BASE_URL}/api/research/jobs`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ query: cleanQuery })
+      });
 
-      if (!response.ok) {
-        const body = (await response.json().catch(() => null)) as
+      if (!jobResponse.ok) {
+        const body = (await jobResponse.json().catch(() => null)) as
           | { detail?: string }
           | null;
-        throw new Error(body?.detail ?? `Request failed (${response.status})`);
+        throw new Error(body?.detail ?? `Request failed (${jobResponse.status})`);
       }
 
-      if (!response.body) {
-        throw new Error("Streaming not supported by this browser.");
-      }
-
-      const reader = response.body.getReader();
-      const decoder = new TextDecoder("utf-8");
-      let buffer = "";
+      const job = (await jobResponse.json()) as { id: string };
+      let lastEventId = 0;
       let gotDone = false;
+      let gotError = false;
 
       const applyEvent = (eventName: string, rawData: string) => {
         let payload: unknown = null;
@@ -177,35 +222,31 @@ export default function Home() {
           return;
         }
 
-        if (eventName === "plan") {
-          const item = (payload ?? {}) as Partial<StreamPlanEvent>;
-          const stepText = (item.text ?? "").trim();
-          if (!stepText) return;
+        if (eventName === "plan" || eventName === "plan_batch") {
+          const items =
+            eventName === "plan_batch"
+              ? ((payload as { items?: Partial<StreamPlanEvent>[] } | null)?.items ?? [])
+              : [(payload ?? {}) as Partial<StreamPlanEvent>];
+          const steps = items.map((item) => (item.text ?? "").trim()).filter(Boolean);
+          if (!steps.length) return;
 
           setLivePlan((prev) => {
-            if (prev.includes(stepText)) return prev;
-            return [...prev, stepText];
+            const next = [...prev];
+            for (const step of steps) {
+              if (!next.includes(step)) next.push(step);
+            }
+            return next.length === prev.length ? prev : next;
           });
           return;
         }
 
-        if (eventName === "source") {
-          const item = (payload ?? {}) as Partial<StreamSourceEvent>;
-          const nextSource: SourceItem = {
-            title: item.title ?? "",
-            url: item.url ?? "",
-            snippet: item.snippet ?? "",
-            type: item.type ?? "web"
-          };
-
-          if (!nextSource.url && !nextSource.title) return;
-
-          setLiveSources((prev) => {
-            const key = `${nextSource.title}|${nextSource.url}`;
-            const exists = prev.some((s) => `${s.title}|${s.url}` === key);
-            if (exists) return prev;
-            return [...prev, nextSource];
-          });
+        if (eventName === "source" || eventName === "source_batch") {
+          const items =
+            eventName === "source_batch"
+              ? ((payload as { items?: Partial<StreamSourceEvent>[] } | null)?.items ?? [])
+              : [(payload ?? {}) as Partial<StreamSourceEvent>];
+          const sources = items.map(toSourceItem).filter((s) => s.url || s.title);
+          if (sources.length) queueSources(sources);
           return;
         }
 
@@ -217,8 +258,17 @@ export default function Home() {
           return;
         }
 
+        if (eventName === "draft_delta" || eventName === "report_delta") {
+          const item = (payload ?? {}) as { text?: string };
+          if (!item.text) return;
+          const append = eventName === "draft_delta" ? setLiveDraft : setLiveReport;
+          append((prev) => prev + item.text);
+          return;
+        }
+
         if (eventName === "result") {
           const finalResult = (payload ?? null) as ResearchResponse | null;
+          flushSources();
           setResult(finalResult);
           if (finalResult) {
             setLivePlan((prev) => (prev.length ? prev : finalResult.plan ?? []));
@@ -229,6 +279,8 @@ export default function Home() {
         }
 
         if (eventName === "error") {
+          gotError = true;
+          flushSources();
           const p = (payload ?? {}) as { message?: string };
           setError(p.message ?? "Stream failed.");
           return;
@@ -240,36 +292,82 @@ export default function Home() {
         }
       };
 
-      while (true) {
-        const { value, done } = await reader.read();
-        if (done) break;
-
-        buffer += decoder.decode(value, { stream: true });
+      const readEvents = async (body: ReadableStream<Uint8Array>) => {
+        const reader = body.getReader();
+        const decoder = new TextDecoder("utf-8");
+        let buffer = "";
 
         while (true) {
-          const boundary = buffer.indexOf("\n\n");
-          if (boundary === -1) break;
-
-          const block = buffer.slice(0, boundary);
-          buffer = buffer.slice(boundary + 2);
+          const { value, done } = await reader.read();
+          if (done) break;
+
+          buffer += decoder.decode(value, { stream: true });
+
+          while (true) {
+            const boundary = buffer.indexOf("\n\n");
+            if (boundary === -1) break;
+
+            const block = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let eventName = "message";
+            let eventId = 0;
+            const dataLines: string[] = [];
+
+            for (const line of block.split("\n")) {
+              if (line.startsWith("id:")) {
+                eventId = Number(line.slice(3).trim()) || 0;
+              } else if (line.startsWith("event:")) {
+                eventName = line.slice(6).trim();
+              } else if (line.startsWith("data:")) {
+                dataLines.push(line.slice(5).trim());
+              }
+            }
 
-          let eventName = "message";
-          const dataLines: string[] = [];
+            applyEvent(eventName, dataLines.join("\n"));
+            if (eventId) lastEventId = eventId;
+          }
 
-          for (const line of block.split("\n")) {
-            if (line.startsWith("event:")) {
-              eventName = line.slice(6).trim();
-            } else if (line.startsWith("data:")) {
-              dataLines.push(line.slice(5).trim());
-            }
+          if (gotDone) {
+            await reader.cancel();
+            break;
           }
+        }
+      };
+
+      for (let attempt = 0; !gotDone && !gotError; attempt++) {
+        if (attempt > MAX_STREAM_RECONNECTS) {
+          throw new Error("Lost connection to the research job.");
+        }
+        if (attempt > 0) {
+          await new Promise((resolve) => setTimeout(resolve, RECONNECT_DELAY_MS * attempt));
+        }
 
-          applyEvent(eventName, dataLines.join("\n"));
+        let response: Response;
+        try {
+          response = await fetch(`${API_BASE_URL}/api/research/jobs/${job.id}/events?batch=1&gzip=1`, {
+            method: "GET",
+            headers: { Accept: "text/event-stream", "Last-Event-ID": String(lastEventId) }
+          });
+        } catch {
+          continue;
         }
 
-        if (gotDone) {
-          await reader.cancel();
-          break;
+        if (!response.ok) {
+          const body = (await response.json().catch(() => null)) as
+            | { detail?: string }
+            | null;
+          throw new Error(body?.detail ?? `Request failed (${response.status})`);
+        }
+
+        if (!response.body) {
+          throw new Error("Streaming not supported by this browser.");
+        }
+
+        try {
+          await readEvents(response.body);
+        } catch {
+          // Dropped mid-stream: reconnect and resume after lastEventId.
         }
       }
     } catch (err) {
@@ -396,8 +494,10 @@ export default function Home() {
               <ul className="timeline">
                 {WORKFLOW_STEPS.map((step) => {
                   const item = progressByNode.get(step.node);
-                  const isCompleted = Boolean(item);
-                  const isActive = !isCompleted && isRunning && activeNode === step.node;
+                  // Planning, memory retrieval and research run concurrently, so each step
+                  // reports its own "running"/"completed" status.
+                  const isCompleted = item?.status === "completed";
+                  const isActive = !isCompleted && isRunning && item?.status === "running";
                   const checkState = isCompleted
                     ? "timeline-check--completed"
                     : isActive
@@ -453,8 +553,8 @@ export default function Home() {
 
             <article className="panel panel-wide">
               <h2>Final Report</h2>
-              {reportText ? (
-                <pre className="report-block">{reportText}</pre>
+              {displayReport ? (
+                <pre className="report-block">{displayReport}</pre>
               ) : (
                 <p className="muted">No report generated.</p>
               )}